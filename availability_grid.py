@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytz
+from instrumentation import span
+from timezones import zone_offsets
+
+AVAILABILITY_OPTIONS = ["Available", "Monitor", "Tentative", "Sleep", "Blocked"]
+DEFAULT_AVAILABILITY = "Tentative"
+
+# Numeric codes for the availability states, in AVAILABILITY_OPTIONS order
+AVAILABLE, MONITOR, TENTATIVE, SLEEP, BLOCKED = range(len(AVAILABILITY_OPTIONS))
+STATE_CODES = {name: code for code, name in enumerate(AVAILABILITY_OPTIONS)}
+
+# "HH:MM" label for every minute of the day, indexed by minute-of-day
+CLOCK_LABELS = np.array([f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60)])
+
+
+class AvailabilityGrid:
+    """Time axis and per-driver local times for a whole race, held as arrays."""
+
+    def __init__(self, block_times, race_hours, gmt, sim_time, driver_names, driver_timezones, local_times, time_block):
+        self.block_times = block_times  # tz-aware UTC DatetimeIndex, one entry per block
+        self.race_hours = race_hours  # elapsed whole hours since green flag
+        self.gmt = gmt
+        self.sim_time = sim_time  # None when no sim start time was given
+        self.driver_names = driver_names
+        self.driver_timezones = driver_timezones
+        self.local_times = local_times  # [driver, block] array of "HH:MM" strings
+        self.time_block = time_block
+
+    @property
+    def num_blocks(self):
+        return len(self.gmt)
+
+    @property
+    def num_drivers(self):
+        return len(self.driver_names)
+
+    def headers(self):
+        """Header row in sheet column order."""
+        headers = ["Race Time", "GMT"]
+        if self.sim_time is not None:
+            headers.append("Sim Time")
+        for driver_name in self.driver_names:
+            headers.append(f"{driver_name} Local")
+            headers.append(f"{driver_name} Availability")
+        return headers
+
+    def rows(self, availability=None):
+        """Yields one sheet row per block. availability is an optional [driver, block] array of state names."""
+        for block in range(self.num_blocks):
+            row = [int(self.race_hours[block]), self.gmt[block]]
+            if self.sim_time is not None:
+                row.append(self.sim_time[block])
+            for driver in range(self.num_drivers):
+                row.append(self.local_times[driver, block])
+                row.append(DEFAULT_AVAILABILITY if availability is None else availability[driver, block])
+            yield row
+
+
+def minutes_of_day(block_times):
+    """Minute-of-day for each entry of a DatetimeIndex (in whatever zone it is in)."""
+    return np.asarray(block_times.hour * 60 + block_times.minute, dtype=np.int64)
+
+
+def parse_race_start(start_gmt_str, today=None):
+    """Parses a race start of "YYYY-MM-DD HH:MM" or "HH:MM" (on today's GMT date) into an aware UTC datetime.
+
+    Giving the date makes local times right when a DST change falls on or near race day.
+    """
+    start_gmt_str = start_gmt_str.strip()
+    if " " in start_gmt_str:
+        return datetime.strptime(start_gmt_str, "%Y-%m-%d %H:%M").replace(tzinfo=pytz.utc)
+    start_time = datetime.strptime(start_gmt_str, "%H:%M").time()
+    today = today or datetime.now(pytz.utc).date()
+    return datetime.combine(today, start_time).replace(tzinfo=pytz.utc)
+
+
+def build_availability_grid(driver_names, driver_timezones, race_start_gmt, race_length, time_block, start_local_str=None):
+    """Builds the full time axis and every driver's local time column in one pass."""
+    if time_block <= 0:
+        raise ValueError("Time block must be a positive number of minutes.")
+    if race_length < timedelta(0):
+        raise ValueError("Race length cannot be negative.")
+
+    driver_names = list(driver_names)
+    driver_timezones = list(driver_timezones)
+
+    with span("time axis"):
+        num_blocks = race_length // timedelta(minutes=time_block) + 1  # the race end is included
+        elapsed = np.arange(num_blocks, dtype=np.int64) * time_block
+
+        race_start = pd.Timestamp(race_start_gmt)
+        if race_start.tzinfo is None:
+            race_start = race_start.tz_localize("UTC")
+        block_times = pd.date_range(start=race_start.tz_convert("UTC"), periods=num_blocks, freq=f"{time_block}min")
+
+        race_hours = elapsed // 60  # total hours, so it keeps counting past 24
+        gmt = CLOCK_LABELS[minutes_of_day(block_times)]
+
+        sim_time = None
+        if start_local_str:
+            sim_start = pd.Timestamp(f"2000-01-01 {start_local_str}")
+            sim_time = CLOCK_LABELS[(sim_start.hour * 60 + sim_start.minute + elapsed) % (24 * 60)]
+
+    # Each distinct zone gets one cached offset table for the race window; local times are UTC plus offset
+    with span("driver local times"):
+        utc_seconds = block_times.asi8 // 10**9
+        window = (int(utc_seconds[0]), int(utc_seconds[-1])) if num_blocks else (0, 0)
+        zone_columns = {}
+        local_times = np.empty((len(driver_names), num_blocks), dtype=CLOCK_LABELS.dtype)
+        for driver, (driver_name, timezone_str) in enumerate(zip(driver_names, driver_timezones)):
+            if timezone_str not in zone_columns:
+                try:
+                    offsets = zone_offsets(timezone_str, *window)
+                except pytz.UnknownTimeZoneError:
+                    raise pytz.UnknownTimeZoneError(f"{timezone_str} for driver {driver_name}")
+                local_minutes = offsets.local_seconds(utc_seconds) // 60
+                zone_columns[timezone_str] = CLOCK_LABELS[local_minutes % (24 * 60)]
+            local_times[driver] = zone_columns[timezone_str]
+
+    return AvailabilityGrid(block_times, race_hours, gmt, sim_time, driver_names, driver_timezones, local_times, time_block)
@@ -0,0 +1,271 @@
+import argparse
+import sys
+import numpy as np
+from availability_grid import AVAILABILITY_OPTIONS, AVAILABLE, TENTATIVE
+from xlsx_writer import write_availability_workbook
+
+
+def union(*interval_arrays):
+    """Merges [start, end) intervals, given as (N, 2) arrays, into sorted disjoint ones. Touching intervals join."""
+    intervals = np.concatenate([np.asarray(a, dtype=np.int64).reshape(-1, 2) for a in interval_arrays] or
+                               [np.zeros((0, 2), dtype=np.int64)])
+    intervals = intervals[intervals[:, 1] > intervals[:, 0]]
+    if not len(intervals):
+        return intervals
+    intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+    reach = np.maximum.accumulate(intervals[:, 1])
+    first = np.flatnonzero(np.r_[True, intervals[1:, 0] > reach[:-1]])
+    return np.column_stack([intervals[first, 0], np.maximum.reduceat(intervals[:, 1], first)])
+
+
+def intersection(a, b):
+    """[start, end) intervals covered by both a and b, each sorted and disjoint as union returns them."""
+    a, b = union(a), union(b)
+    points = np.concatenate([a[:, 0], a[:, 1], b[:, 0], b[:, 1]])
+    deltas = np.concatenate([np.ones(len(a)), -np.ones(len(a)), np.ones(len(b)), -np.ones(len(b))]).astype(np.int8)
+    order = np.lexsort((deltas, points))  # ends before starts at the same minute, so touching isn't overlap
+    points, depth = points[order], np.cumsum(deltas[order])
+    both = np.flatnonzero(depth == 2)
+    return union(np.column_stack([points[both], points[np.minimum(both + 1, len(points) - 1)]]))
+
+
+def complement(intervals, end, start=0):
+    """The parts of [start, end) not covered by intervals."""
+    intervals = union(intervals)
+    edges = np.concatenate([[start], intervals.ravel(), [end]])
+    return union(np.clip(edges.reshape(-1, 2), start, end))
+
+
+def longest(intervals):
+    """The longest (start, end) of intervals, or None if there are none."""
+    intervals = union(intervals)
+    if not len(intervals):
+        return None
+    i = int(np.argmax(intervals[:, 1] - intervals[:, 0]))
+    return int(intervals[i, 0]), int(intervals[i, 1])
+
+
+class StateIntervals:
+    """One driver's availability as a step function of race minutes.
+
+    states[i] holds from starts[i] up to starts[i + 1], and the last state up to end. starts[0] is always 0
+    and neighbouring states always differ, so memory grows with the number of changes, not the race length.
+    """
+    __slots__ = ("starts", "states", "end")
+
+    def __init__(self, starts, states, end):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.states = np.asarray(states, dtype=np.uint8)
+        self.end = int(end)
+        if not len(self.starts):  # a zero-length race still has a state, so lookups never index an empty array
+            self.starts = np.zeros(1, dtype=np.int64)
+            self.states = np.full(1, TENTATIVE, dtype=np.uint8)
+
+    @classmethod
+    def constant(cls, state, end):
+        return cls([0], [state], end)
+
+    @classmethod
+    def from_blocks(cls, block_states, time_block, end=None):
+        """From one row of [driver, block] states, e.g. an AvailabilityMatrix read from a sheet."""
+        block_states = np.asarray(block_states, dtype=np.uint8)
+        end = len(block_states) * time_block if end is None else end
+        if not len(block_states):
+            return cls.constant(TENTATIVE, end)
+        changes = np.flatnonzero(np.r_[True, block_states[1:] != block_states[:-1]])
+        starts = changes * time_block
+        keep = (starts < end) | (starts == 0)
+        return cls(starts[keep], block_states[changes][keep], end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        runs = ", ".join(f"{start}: {AVAILABILITY_OPTIONS[state]}" for start, state in zip(self.starts, self.states))
+        return f"StateIntervals({runs}; end {self.end})"
+
+    @property
+    def ends(self):
+        return np.append(self.starts[1:], self.end)
+
+    def state_at(self, minute):
+        """State at a race minute, or an array of them for an array of minutes."""
+        index = np.searchsorted(self.starts, minute, side="right") - 1
+        return self.states[np.maximum(index, 0)]
+
+    def set(self, start, end, state):
+        """Sets [start, end) to state, at any minute resolution."""
+        start, end = max(0, int(start)), min(int(end), self.end)
+        if start >= end:
+            return self
+        after = self.state_at(end)
+        outside = (self.starts < start) | (self.starts > end)
+        starts = np.concatenate([self.starts[outside], [start], [end] if end < self.end else []]).astype(np.int64)
+        states = np.concatenate([self.states[outside], [state], [after] if end < self.end else []]).astype(np.uint8)
+        order = np.argsort(starts, kind="stable")
+        starts, states = starts[order], states[order]
+        keep = np.r_[True, states[1:] != states[:-1]]
+        self.starts, self.states = starts[keep], states[keep]
+        return self
+
+    def intervals(self, states=(AVAILABLE,)):
+        """Sorted, disjoint [start, end) minutes spent in any of the given states."""
+        mask = np.isin(self.states, np.asarray(states, dtype=np.uint8))
+        return union(np.column_stack([self.starts[mask], self.ends[mask]]))
+
+    def to_blocks(self, time_block, num_blocks):
+        """State of every block of time_block minutes. A block that changes state inside it takes its worst
+        state, so a driver is only shown Available for a block if they are for all of it."""
+        block_starts = np.arange(num_blocks, dtype=np.int64) * time_block
+        if not num_blocks:
+            return np.zeros(0, dtype=np.uint8)
+        inside = self.starts[(self.starts > 0) & (self.starts < block_starts[-1] + time_block)]
+        points = np.union1d(block_starts, inside)
+        return np.maximum.reduceat(self.state_at(points), np.searchsorted(points, block_starts))
+
+
+class AvailabilityIntervals:
+    """Every driver's availability as StateIntervals over a race of race_minutes."""
+
+    def __init__(self, driver_names, drivers, race_minutes):
+        self.driver_names = list(driver_names)
+        self.drivers = list(drivers)
+        self.race_minutes = int(race_minutes)
+
+    @classmethod
+    def from_states(cls, driver_names, states, time_block, race_minutes=None):
+        states = np.asarray(states)
+        race_minutes = states.shape[1] * time_block if race_minutes is None else race_minutes
+        return cls(driver_names, [StateIntervals.from_blocks(row, time_block, race_minutes) for row in states],
+                   race_minutes)
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """From an AvailabilityMatrix. The sheet's last row is the checkered flag, so it isn't a block of the race."""
+        time_block = matrix.time_block or 1
+        race_minutes = max(matrix.num_blocks - 1, 0) * time_block
+        return cls.from_states(matrix.driver_names, matrix.states, time_block, race_minutes)
+
+    @classmethod
+    def for_grid(cls, grid, states=None):
+        """Over every row of a sheet's grid, the checkered flag row included, so any row can be set. From
+        dense [driver, block] states if given, else all Tentative."""
+        time_block = grid.time_block or 1
+        minutes = grid.num_blocks * time_block
+        if states is None:
+            return cls.blank(grid.driver_names, minutes)
+        return cls.from_states(grid.driver_names, states, time_block, minutes)
+
+    @classmethod
+    def blank(cls, driver_names, race_minutes, state=TENTATIVE):
+        return cls(driver_names, [StateIntervals.constant(state, race_minutes) for _ in driver_names], race_minutes)
+
+    @property
+    def num_changes(self):
+        return sum(len(driver) for driver in self.drivers)
+
+    def index(self, driver):
+        return driver if isinstance(driver, (int, np.integer)) else self.driver_names.index(driver)
+
+    def set(self, driver, start, end, state):
+        """Sets a driver (index or name) to state over [start, end) race minutes."""
+        self.drivers[self.index(driver)].set(start, end, state)
+        return self
+
+    def set_blocks(self, driver, blocks, states, time_block):
+        """Sets whole blocks of time_block minutes to a state each, e.g. from a form with one field per block.
+        Neighbouring blocks in the same state go in as one run."""
+        blocks = np.asarray(blocks, dtype=np.int64)
+        states = np.asarray(states, dtype=np.uint8)
+        if not len(blocks):
+            return self
+        order = np.argsort(blocks, kind="stable")
+        blocks, states = blocks[order], states[order]
+        firsts = np.flatnonzero(np.r_[True, (np.diff(blocks) != 1) | (states[1:] != states[:-1])])
+        lasts = np.append(firsts[1:], len(blocks)) - 1
+        intervals = self.drivers[self.index(driver)]
+        for first, last in zip(firsts, lasts):
+            intervals.set(blocks[first] * time_block, (blocks[last] + 1) * time_block, states[first])
+        return self
+
+    def state_at(self, minute):
+        """Every driver's state at a race minute."""
+        return np.array([driver.state_at(minute) for driver in self.drivers], dtype=np.uint8)
+
+    def who_covers(self, minute, states=(AVAILABLE,)):
+        """Indices of the drivers in any of the given states at a race minute."""
+        return np.flatnonzero(np.isin(self.state_at(minute), np.asarray(states, dtype=np.uint8)))
+
+    def coverage(self, states=(AVAILABLE,)):
+        """[start, end) minutes when at least one driver is in any of the given states."""
+        return union(*[driver.intervals(states) for driver in self.drivers])
+
+    def coverage_gaps(self, states=(AVAILABLE,)):
+        return complement(self.coverage(states), self.race_minutes)
+
+    def longest_coverage(self, states=(AVAILABLE,)):
+        """The longest stretch with somebody in any of the given states, as (start, end) minutes."""
+        return longest(self.coverage(states))
+
+    def longest_run(self, driver, states=(AVAILABLE,)):
+        """A driver's longest continuous stretch in any of the given states."""
+        return longest(self.drivers[self.index(driver)].intervals(states))
+
+    def to_blocks(self, time_block, num_blocks=None):
+        """Dense [driver, block] states at any block size. num_blocks defaults to the race plus the checkered
+        flag row, as in build_availability_grid."""
+        if time_block <= 0:
+            raise ValueError("Time block must be a positive number of minutes.")
+        num_blocks = self.race_minutes // time_block + 1 if num_blocks is None else num_blocks
+        states = np.empty((len(self.drivers), num_blocks), dtype=np.uint8)
+        for i, driver in enumerate(self.drivers):
+            states[i] = driver.to_blocks(time_block, num_blocks)
+        return states
+
+    def write_sheet(self, grid, path, progress=None):
+        """Renders a filled-in availability sheet on grid's time axis, at whatever block size it was built with."""
+        order = [self.index(name) for name in grid.driver_names]
+        states = self.to_blocks(grid.time_block, grid.num_blocks)[order]
+        write_availability_workbook(grid, path, availability=np.array(AVAILABILITY_OPTIONS, dtype=object)[states],
+                                    progress=progress)
+        return path
+
+
+def format_minutes(minute):
+    return f"{int(minute) // 60}:{int(minute) % 60:02d}"
+
+
+def main(argv=None):
+    from availability_reader import read_availability_workbook
+
+    parser = argparse.ArgumentParser(description="Summarise a filled-in availability sheet as intervals.")
+    parser.add_argument("availability", help="filled-in availability sheet")
+    parser.add_argument("--at", default=None, help="race time H:MM to list who is Available")
+    args = parser.parse_args(argv)
+
+    try:
+        intervals = AvailabilityIntervals.from_matrix(read_availability_workbook(args.availability))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    cells = len(intervals.drivers) * intervals.race_minutes
+    print(f"{len(intervals.drivers)} drivers, {intervals.num_changes} state runs "
+          f"(a 1 minute grid would be {cells} cells)")
+    span = intervals.longest_coverage()
+    if span:
+        print(f"Longest covered stretch: {format_minutes(span[0])} - {format_minutes(span[1])}")
+    for start, end in intervals.coverage_gaps():
+        print(f"  nobody Available {format_minutes(start)} - {format_minutes(end)}")
+    if args.at:
+        try:
+            hours, minutes = map(int, args.at.split(":"))
+        except ValueError:
+            print("Error: --at must be H:MM", file=sys.stderr)
+            return 1
+        names = [intervals.driver_names[d] for d in intervals.who_covers(hours * 60 + minutes)]
+        print(f"Available at {args.at}: {', '.join(names) or 'nobody'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
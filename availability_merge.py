@@ -0,0 +1,210 @@
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from availability_grid import AvailabilityGrid, TENTATIVE
+from availability_intervals import AvailabilityIntervals, StateIntervals
+from availability_reader import AvailabilityMatrix, read_availability_workbook
+
+
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _tokens(name):
+    return [token for token in re.split(r"[^a-z0-9]+", name.lower()) if token]
+
+
+def _read_return(filepath):
+    """Worker: parse one returned workbook. Errors come back as text so one bad file can't sink the merge."""
+    try:
+        return filepath, read_availability_workbook(filepath), None
+    except Exception as e:
+        return filepath, None, str(e)
+
+
+def find_returns(directory):
+    """All workbooks in a directory, skipping Excel's ~$ lock files."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(".xlsx") and not name.startswith("~$"))
+
+
+class MergeResult:
+    def __init__(self, grid, intervals, submissions, conflicts, missing_drivers, unknown_drivers, mismatched_files,
+                 failed_files, warnings=()):
+        self.grid = grid  # the merged sheet's time axis, drivers in roster order
+        self.intervals = intervals  # AvailabilityIntervals in roster order, over every row of grid
+        self.submissions = submissions  # driver name -> file their availability was taken from
+        self.conflicts = conflicts  # (driver name, kept file, other file, blocks that differ)
+        self.missing_drivers = missing_drivers
+        self.unknown_drivers = unknown_drivers  # (file, driver name) for columns not on the roster
+        self.mismatched_files = mismatched_files  # files whose time axis doesn't match the reference
+        self.failed_files = failed_files  # (file, error)
+        self.warnings = list(warnings)
+        self._matrix = None
+
+    @property
+    def matrix(self):
+        """The merged availability as a dense AvailabilityMatrix, built the first time it is asked for."""
+        if self._matrix is None:
+            self._matrix = AvailabilityMatrix(self.grid, self.intervals.to_blocks(self.grid.time_block or 1,
+                                                                                  self.grid.num_blocks))
+        return self._matrix
+
+    def save(self, path):
+        """Writes the master availability sheet."""
+        return self.intervals.write_sheet(self.grid, path)
+
+    def report(self):
+        lines = [f"Merged availability for {len(self.submissions)} of {len(self.intervals.drivers)} drivers."]
+        for driver_name, kept, other, differing in self.conflicts:
+            lines.append(f"Conflict: {driver_name} differs in {differing} blocks between "
+                         f"{os.path.basename(kept)} (kept) and {os.path.basename(other)}")
+        if self.missing_drivers:
+            lines.append(f"Missing drivers: {', '.join(self.missing_drivers)}")
+        for filepath, driver_name in self.unknown_drivers:
+            lines.append(f"Not on roster: {driver_name} in {os.path.basename(filepath)}")
+        for filepath in self.mismatched_files:
+            lines.append(f"Time axis doesn't match: {os.path.basename(filepath)}")
+        for filepath, error in self.failed_files:
+            lines.append(f"Could not read {os.path.basename(filepath)}: {error}")
+        for warning in self.warnings:
+            lines.append(f"Warning: {warning}")
+        return "\n".join(lines)
+
+
+def _same_axis(grid, reference):
+    return (len(grid.gmt) == len(reference.gmt) and np.array_equal(grid.gmt, reference.gmt)
+            and np.array_equal(grid.race_hours, reference.race_hours))
+
+
+def _named_driver(filepath, names):
+    """The driver a file is named after: the whole stem, or a run of whole words in it, equal to a name.
+
+    "Bob final.xlsx" is Bob's, but "Sally final.xlsx" is not Al's. The longest name wins when several match.
+    """
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    stem_tokens = _tokens(stem)
+    matches = []
+    for name in names:
+        name_tokens = _tokens(name)
+        if not name_tokens:
+            continue
+        count = len(name_tokens)
+        if _normalize(name) == _normalize(stem) or any(stem_tokens[i:i + count] == name_tokens
+                                                       for i in range(len(stem_tokens) - count + 1)):
+            matches.append(name)
+    return max(matches, key=lambda name: len(_normalize(name))) if matches else None
+
+
+def _submitted_columns(filepath, matrix, roster_index):
+    """Which driver columns a returned file is the source for, and a warning if that is in doubt.
+
+    A file named after a roster driver counts for that driver only; otherwise every column that was
+    changed from the all-Tentative default counts. If the named driver's column wasn't changed but
+    others were, the changed columns count and the mismatch is reported.
+    """
+    changed = [i for i in range(matrix.num_drivers) if (matrix.states[i] != TENTATIVE).any()]
+    name = _named_driver(filepath, [name for name in matrix.driver_names if name in roster_index])
+    if name is None:
+        return changed, None
+    column = matrix.driver_names.index(name)
+    if column in changed or not changed:
+        return [column], None
+    others = ", ".join(matrix.driver_names[i] for i in changed)
+    return changed, (f"{os.path.basename(filepath)} is named for {name}, but only {others} filled in "
+                     f"their availability; used {others}")
+
+
+def merge_availability_returns(filepaths, roster, template=None, workers=None):
+    """Merges returned availability workbooks into one AvailabilityIntervals in roster order.
+
+    Files are parsed concurrently in a process pool, and each submitted column is kept as runs of state
+    rather than one cell per block. template is the blank sheet from generate_availability_sheet; without
+    it the first readable return sets the time axis.
+    """
+    filepaths = list(filepaths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = list(pool.map(_read_return, filepaths))
+
+    failed_files = [(filepath, error) for filepath, matrix, error in parsed if matrix is None]
+    returns = [(filepath, matrix) for filepath, matrix, error in parsed if matrix is not None]
+    # Newest file wins when two returns disagree about the same driver
+    returns.sort(key=lambda item: os.path.getmtime(item[0]), reverse=True)
+
+    reference = read_availability_workbook(template).grid if template else None
+    if reference is None:
+        if not returns:
+            raise ValueError("None of the returned availability sheets could be read.")
+        reference = min(returns, key=lambda item: item[0])[1].grid
+
+    roster_names = [driver.name for driver in roster.drivers]
+    roster_index = {name: i for i, name in enumerate(roster_names)}
+    time_block, num_blocks = reference.time_block or 1, len(reference.gmt)
+    intervals = AvailabilityIntervals.blank(roster_names, num_blocks * time_block)
+    local_times = np.full((len(roster_names), len(reference.gmt)), "", dtype=reference.gmt.dtype)
+    submissions, conflicts, unknown_drivers, mismatched_files, warnings = {}, [], [], [], []
+
+    # Local times come from whichever sheet has the driver's column, preferring the template
+    sources = ([reference] if template else []) + [matrix.grid for filepath, matrix in returns]
+    for grid in sources:
+        if not len(reference.gmt) or not _same_axis(grid, reference):
+            continue
+        for i, name in enumerate(grid.driver_names):
+            if name in roster_index and not local_times[roster_index[name], 0]:
+                local_times[roster_index[name]] = grid.local_times[i]
+
+    for filepath, matrix in returns:
+        if not _same_axis(matrix.grid, reference):
+            mismatched_files.append(filepath)
+            continue
+        columns, warning = _submitted_columns(filepath, matrix, roster_index)
+        if warning:
+            warnings.append(warning)
+        for column in columns:
+            name = matrix.driver_names[column]
+            if name not in roster_index:
+                unknown_drivers.append((filepath, name))
+                continue
+            row = roster_index[name]
+            if name in submissions:
+                kept = intervals.drivers[row].to_blocks(time_block, num_blocks)
+                differing = int((kept != matrix.states[column]).sum())
+                if differing:
+                    conflicts.append((name, submissions[name], filepath, differing))
+                continue
+            intervals.drivers[row] = StateIntervals.from_blocks(matrix.states[column], time_block,
+                                                                intervals.race_minutes)
+            submissions[name] = filepath
+
+    grid = AvailabilityGrid(block_times=reference.block_times, race_hours=reference.race_hours, gmt=reference.gmt,
+                            sim_time=reference.sim_time, driver_names=roster_names,
+                            driver_timezones=[driver.timezone for driver in roster.drivers],
+                            local_times=local_times, time_block=reference.time_block)
+    missing_drivers = [name for name in roster_names if name not in submissions]
+    return MergeResult(grid, intervals, submissions, conflicts, missing_drivers, unknown_drivers, mismatched_files,
+                       failed_files, warnings)
+
+
+def main(argv=None):
+    from roster import read_roster
+    parser = argparse.ArgumentParser(description="Merge returned driver availability sheets into one master sheet.")
+    parser.add_argument("returns", help="directory of returned availability workbooks")
+    parser.add_argument("--roster", required=True, help="roster CSV the sheets were generated from")
+    parser.add_argument("--template", help="the blank sheet generated for the event (sets the time axis)")
+    parser.add_argument("-o", "--output", default="master_availability.xlsx", help="master workbook to write")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    roster = read_roster(args.roster)
+    result = merge_availability_returns(find_returns(args.returns), roster, args.template, args.workers)
+    result.save(args.output)
+    print(result.report())
+    print(f"Master availability sheet saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
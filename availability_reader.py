@@ -0,0 +1,138 @@
+import numpy as np
+import openpyxl
+from availability_grid import AvailabilityGrid, AVAILABILITY_OPTIONS, STATE_CODES, AVAILABLE, TENTATIVE
+
+LOCAL_SUFFIX = " Local"
+AVAILABILITY_SUFFIX = " Availability"
+
+
+def _clock_minutes(label):
+    return int(label[:2]) * 60 + int(label[3:5])
+
+
+class AvailabilityMatrix:
+    """Availability states of every driver for every block, packed as a uint8 [driver, block] array.
+
+    grid holds the sheet's time axis and local times so the matrix can be written back out.
+    """
+
+    def __init__(self, grid, states, unrecognized=0):
+        self.grid = grid
+        self.states = states
+        self.unrecognized = unrecognized  # cells that weren't one of AVAILABILITY_OPTIONS (read as Tentative)
+
+    @property
+    def driver_names(self):
+        return self.grid.driver_names
+
+    @property
+    def num_drivers(self):
+        return self.states.shape[0]
+
+    @property
+    def num_blocks(self):
+        return self.states.shape[1]
+
+    @property
+    def time_block(self):
+        return self.grid.time_block
+
+    def bitplanes(self):
+        """One packed bit per driver per block for each state: a uint8 [state, driver, ceil(blocks / 8)] array."""
+        codes = np.arange(len(AVAILABILITY_OPTIONS), dtype=np.uint8)
+        return np.packbits(self.states[None, :, :] == codes[:, None, None], axis=2)
+
+    def in_states(self, states=(AVAILABLE,)):
+        """Boolean [driver, block] mask of cells in any of the given states."""
+        return np.isin(self.states, np.asarray(states, dtype=np.uint8))
+
+    def drivers_at(self, block, states=(AVAILABLE,)):
+        """Indices of the drivers in one of the given states at a block."""
+        return np.flatnonzero(np.isin(self.states[:, block], np.asarray(states, dtype=np.uint8)))
+
+    def available_at(self, block):
+        """Names of the drivers who are Available at a block."""
+        return [self.driver_names[d] for d in self.drivers_at(block)]
+
+    def coverage(self, states=(AVAILABLE,)):
+        """Number of drivers in one of the given states at each block."""
+        return self.in_states(states).sum(axis=0)
+
+    def coverage_gaps(self, states=(AVAILABLE,)):
+        """(first_block, end_block) ranges, end exclusive, where nobody is in one of the given states."""
+        uncovered = np.concatenate(([False], self.coverage(states) == 0, [False])).astype(np.int8)
+        edges = np.flatnonzero(np.diff(uncovered))
+        return [(int(start), int(end)) for start, end in zip(edges[::2], edges[1::2])]
+
+    def available_hours(self, states=(AVAILABLE,)):
+        """Hours each driver spends in one of the given states."""
+        return self.in_states(states).sum(axis=1) * (self.time_block or 0) / 60
+
+    def state_names(self):
+        """[driver, block] array of state names, as written to the sheet."""
+        return np.array(AVAILABILITY_OPTIONS)[self.states]
+
+    def for_roster(self, roster):
+        """States reordered to match a roster's driver order."""
+        index = {name: i for i, name in enumerate(self.driver_names)}
+        missing = [driver.name for driver in roster.drivers if driver.name not in index]
+        if missing:
+            raise ValueError(f"Availability sheet has no column for: {', '.join(missing)}")
+        return self.states[[index[driver.name] for driver in roster.drivers]]
+
+
+def read_availability_workbook(filepath):
+    """Streams a filled-in availability workbook into an AvailabilityMatrix."""
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        try:
+            headers = [str(value) if value is not None else "" for value in next(rows)]
+        except StopIteration:
+            raise ValueError("Availability sheet is empty.")
+        columns = {header: i for i, header in enumerate(headers)}
+        if "GMT" not in columns or "Race Time" not in columns:
+            raise ValueError("Availability sheet must have Race Time and GMT columns.")
+
+        driver_names = [header[:-len(AVAILABILITY_SUFFIX)] for header in headers if header.endswith(AVAILABILITY_SUFFIX)]
+        state_cols = [columns[f"{name}{AVAILABILITY_SUFFIX}"] for name in driver_names]
+        local_cols = [columns.get(f"{name}{LOCAL_SUFFIX}") for name in driver_names]
+        race_col, gmt_col, sim_col = columns["Race Time"], columns["GMT"], columns.get("Sim Time")
+
+        race_hours, gmt, sim_time, local_times, states = [], [], [], [], []
+        unrecognized = 0
+        for row in rows:
+            if gmt_col >= len(row) or row[gmt_col] is None:
+                continue
+            race_hours.append(int(row[race_col] or 0))
+            gmt.append(str(row[gmt_col]))
+            if sim_col is not None:
+                sim_time.append(str(row[sim_col] or ""))
+            local_times.append([str(row[col] or "") if col is not None else "" for col in local_cols])
+            block_states = []
+            for col in state_cols:
+                value = row[col] if col < len(row) else None
+                code = STATE_CODES.get(str(value).strip()) if value is not None else TENTATIVE
+                if code is None:
+                    code = TENTATIVE
+                    unrecognized += 1
+                block_states.append(code)
+            states.append(block_states)
+    finally:
+        wb.close()
+
+    num_drivers = len(driver_names)
+    time_block = None
+    if len(gmt) > 1:
+        time_block = (_clock_minutes(gmt[1]) - _clock_minutes(gmt[0])) % (24 * 60)
+
+    grid = AvailabilityGrid(block_times=None,
+                            race_hours=np.array(race_hours, dtype=np.int64),
+                            gmt=np.array(gmt),
+                            sim_time=np.array(sim_time) if sim_col is not None else None,
+                            driver_names=driver_names,
+                            driver_timezones=[None] * num_drivers,
+                            local_times=np.array(local_times).T.reshape(num_drivers, len(gmt)),
+                            time_block=time_block)
+    states = np.array(states, dtype=np.uint8).T.reshape(num_drivers, len(gmt))
+    return AvailabilityMatrix(grid, np.ascontiguousarray(states), unrecognized)
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import html
+import logging
+import secrets
+import socket
+import sys
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pytz
+from availability_grid import AVAILABILITY_OPTIONS
+from availability_intervals import AvailabilityIntervals, StateIntervals
+from availability_reader import AvailabilityMatrix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1 << 20
+REQUEST_TIMEOUT = 30  # seconds to send a whole request
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+STATUS_TEXT = {200: "OK", 303: "See Other", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def lan_address():
+    """This machine's address on the local network, or 127.0.0.1 if it isn't on one.
+
+    Connecting a UDP socket sends nothing; it only makes the OS pick the outgoing interface.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.connect(("10.255.255.255", 1))
+            return probe.getsockname()[0]
+    except OSError:
+        return DEFAULT_HOST
+
+
+class AvailabilityCollection:
+    """The shared availability that drivers submit into, held as AvailabilityIntervals over the grid's rows.
+
+    Memory grows with the number of changes drivers make, not with the number of blocks, and the dense
+    [driver, block] states are only built for a form, a snapshot or a saved sheet. Each driver has their own
+    lock and link token, so submissions from different drivers never wait on each other. Times nobody has
+    filled in yet are Tentative, as they are when read from a sheet. Listeners are called with the driver
+    index after every submission, on the thread that took it.
+    """
+
+    def __init__(self, grid, states=None):
+        self.grid = grid
+        self.time_block = grid.time_block or 1
+        self.intervals = AvailabilityIntervals.for_grid(grid, states)
+        num_drivers = len(grid.driver_names)
+        self.tokens = {secrets.token_urlsafe(8): driver for driver in range(num_drivers)}
+        self.links = {driver: token for token, driver in self.tokens.items()}
+        self.submitted = [None] * num_drivers  # UTC time of each driver's last submission
+        self.listeners = []
+        self._locks = [threading.Lock() for _ in range(num_drivers)]
+
+    @property
+    def num_blocks(self):
+        return self.grid.num_blocks
+
+    def driver_intervals(self, driver):
+        """A copy of one driver's StateIntervals, safe to read while they submit again."""
+        with self._locks[driver]:
+            intervals = self.intervals.drivers[driver]
+            return StateIntervals(intervals.starts, intervals.states, intervals.end)
+
+    def driver_states(self, driver):
+        return self.driver_intervals(driver).to_blocks(self.time_block, self.num_blocks)
+
+    def submit(self, driver, changes):
+        """Writes {block: state code} for one driver. Raises ValueError for blocks or codes out of range."""
+        blocks = np.fromiter(changes.keys(), dtype=np.int64, count=len(changes))
+        codes = np.fromiter(changes.values(), dtype=np.int64, count=len(changes))
+        if ((blocks < 0) | (blocks >= self.num_blocks)).any():
+            raise ValueError("Time block out of range.")
+        if ((codes < 0) | (codes >= len(AVAILABILITY_OPTIONS))).any():
+            raise ValueError("Unknown availability state.")
+        with self._locks[driver]:
+            self.intervals.set_blocks(driver, blocks, codes, self.time_block)
+            self.submitted[driver] = datetime.now(pytz.utc)
+        for listener in self.listeners:
+            try:
+                listener(driver)
+            except Exception:
+                logger.exception("Availability listener failed")
+
+    def snapshot_intervals(self):
+        """AvailabilityIntervals of everything submitted so far, copied one driver at a time."""
+        return AvailabilityIntervals(self.grid.driver_names,
+                                     [self.driver_intervals(driver) for driver in range(len(self._locks))],
+                                     self.intervals.race_minutes)
+
+    def snapshot(self):
+        """An AvailabilityMatrix of everything submitted so far, with the dense states built on demand."""
+        return AvailabilityMatrix(self.grid, self.snapshot_intervals().to_blocks(self.time_block, self.num_blocks))
+
+    def save(self, path, grid=None):
+        """Writes the collected availability as a filled-in availability sheet, on grid's time axis if given
+        (any block size over the same race) or else the one it was collected on."""
+        return self.snapshot_intervals().write_sheet(grid or self.grid, path)
+
+
+PAGE_STYLE = ("body{font-family:Arial,sans-serif;background:#3d3d3d;color:#eee;margin:2em}"
+              "table{border-collapse:collapse}td,th{padding:2px 8px;border-bottom:1px solid #555}"
+              "select{background:#2b2b2b;color:#eee}")
+
+
+def page(title, body):
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<style>{PAGE_STYLE}</style></head><body>{body}</body></html>")
+
+
+def render_index(collection, title):
+    rows = []
+    for driver, name in enumerate(collection.grid.driver_names):
+        submitted = collection.submitted[driver]
+        rows.append(f"<tr><td>{html.escape(name)}</td><td>{html.escape(str(collection.grid.driver_timezones[driver]))}"
+                    f"</td><td>{f'{submitted:%Y-%m-%d %H:%M} GMT' if submitted else 'not yet'}</td></tr>")
+    return page(title, f"<h1>{html.escape(title)}</h1><p>Each driver has their own link to fill in.</p>"
+                       f"<table><tr><th>Driver</th><th>Timezone</th><th>Submitted</th></tr>{''.join(rows)}</table>")
+
+
+# One <option> list per current state, so a page of several hundred blocks is just string joins
+OPTION_LISTS = ["".join(f"<option value='{code}'{' selected' if code == current else ''}>{name}</option>"
+                        for code, name in enumerate(AVAILABILITY_OPTIONS))
+                for current in range(len(AVAILABILITY_OPTIONS))]
+
+
+def render_driver_form(collection, driver, title, saved=False):
+    grid = collection.grid
+    name = grid.driver_names[driver]
+    states = collection.driver_states(driver)
+    local_times = grid.local_times[driver]
+    sim_times = grid.sim_time if grid.sim_time is not None else [""] * len(grid.gmt)
+    rows = [f"<tr><td>{local}</td><td>{gmt}</td><td>{sim}</td><td>{hour}</td>"
+            f"<td><select name='b{block}'>{OPTION_LISTS[state]}</select></td></tr>"
+            for block, (local, gmt, sim, hour, state)
+            in enumerate(zip(local_times, grid.gmt, sim_times, grid.race_hours, states))]
+    notice = "<p><b>Saved.</b> You can change it again any time before the race.</p>" if saved else ""
+    return page(f"{title}: {name}",
+                f"<h1>{html.escape(title)}</h1><h2>{html.escape(name)} "
+                f"({html.escape(str(grid.driver_timezones[driver]))})</h2>{notice}"
+                f"<form method='post'><table><tr><th>Your Time</th><th>GMT</th><th>Sim Time</th><th>Race Hour</th>"
+                f"<th>Availability</th></tr>{''.join(rows)}</table><p><input type='submit' value='Save'></p></form>")
+
+
+def parse_form_states(body):
+    """{block: code} from a posted form of b<block>=<code> fields."""
+    try:
+        fields = parse_qs(body.decode("utf-8"), strict_parsing=bool(body))
+        return {int(key[1:]): int(values[-1]) for key, values in fields.items() if key.startswith("b")}
+    except (UnicodeDecodeError, ValueError):
+        raise HttpError(400, "Malformed form.")
+
+
+async def read_request(reader):
+    """(method, target, headers, body) of one HTTP/1.1 request."""
+    request_line = await reader.readline()
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Bad Content-Length.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Request too large.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+class AvailabilityServer:
+    """Serves every driver a form of their own time blocks and writes submissions into an AvailabilityCollection.
+
+    Runs on an asyncio loop, on a background thread with start() or in the foreground with serve().
+    """
+
+    def __init__(self, collection, host=DEFAULT_HOST, port=DEFAULT_PORT, title="Driver Availability"):
+        self.collection = collection
+        self.host = host
+        self.port = port
+        self.title = title
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    @property
+    def link_host(self):
+        """Address to put in links; listening on every interface still needs a real address in the link."""
+        return lan_address() if self.host in ("", "0.0.0.0") else self.host
+
+    def url_for(self, driver):
+        return f"http://{self.link_host}:{self.port}/d/{self.collection.links[driver]}"
+
+    async def handle(self, reader, writer):
+        try:
+            method, target, headers, body = await asyncio.wait_for(read_request(reader), REQUEST_TIMEOUT)
+            status, content_type, content, location = self.route(method, target, body)
+        except HttpError as e:
+            status, content_type, content, location = e.status, "text/plain", str(e), None
+        except asyncio.TimeoutError:
+            status, content_type, content, location = 408, "text/plain", "Request timed out.", None
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+        except Exception:
+            logger.exception("Error handling request")
+            status, content_type, content, location = 500, "text/plain", "Internal error.", None
+
+        payload = content.encode("utf-8")
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", f"Content-Type: {content_type}; charset=utf-8",
+                f"Content-Length: {len(payload)}", "Connection: close", "Cache-Control: no-store"]
+        if location:
+            head.append(f"Location: {location}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, target, body):
+        """(status, content type, content, redirect location) for a request."""
+        url = urlsplit(target)
+        if url.path == "/":
+            if method != "GET":
+                raise HttpError(405, "Method not allowed.")
+            return 200, "text/html", render_index(self.collection, self.title), None
+        if url.path.startswith("/d/"):
+            driver = self.collection.tokens.get(url.path[3:])
+            if driver is None:
+                raise HttpError(404, "Unknown link. Ask your team for yours.")
+            if method == "GET":
+                return 200, "text/html", render_driver_form(self.collection, driver, self.title,
+                                                            saved="saved" in parse_qs(url.query)), None
+            if method == "POST":
+                try:
+                    self.collection.submit(driver, parse_form_states(body))
+                except ValueError as e:
+                    raise HttpError(400, str(e))
+                logger.info("Availability submitted by %s", self.collection.grid.driver_names[driver])
+                return 303, "text/plain", "Saved.", f"{url.path}?saved=1"
+            raise HttpError(405, "Method not allowed.")
+        raise HttpError(404, "Not found.")
+
+    async def open(self):
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # the real port when 0 was asked for
+        return self._server
+
+    async def serve(self, ready=None):
+        """Serves until cancelled. ready() is called once the port is open."""
+        server = await self.open()
+        if ready is not None:
+            ready()
+        async with server:
+            await server.serve_forever()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts serving on a daemon thread. Raises OSError if the port can't be opened."""
+        self._loop = asyncio.new_event_loop()
+        opened = threading.Event()
+        errors = []
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.open())
+            except OSError as e:
+                errors.append(e)
+                opened.set()
+                self._loop.close()
+                return
+            opened.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                self._server.close()
+                self._loop.run_until_complete(self._server.wait_closed())
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="availability-server", daemon=True)
+        self._thread.start()
+        opened.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self, wait=True):
+        """Stops serving. From a UI thread pass wait=False: a listener on the server thread may be waiting on
+        that UI thread, so joining there could hang until the timeout."""
+        if self.running:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if wait:
+                self._thread.join(timeout=5)
+
+
+def main(argv=None):
+    from availability_sheet import generate_availability
+    from roster import read_roster, RosterError
+
+    parser = argparse.ArgumentParser(description="Collect driver availability over HTTP instead of emailing sheets.")
+    parser.add_argument("roster", help="roster CSV")
+    parser.add_argument("--start", required=True, help='race start GMT, "YYYY-MM-DD HH:MM" or "HH:MM"')
+    parser.add_argument("--sim-start", default=None, help="sim time at the green flag, HH:MM")
+    parser.add_argument("--offset", type=int, default=30, help="green flag offset in minutes (default 30)")
+    parser.add_argument("--block", type=int, default=15, help="time block in minutes (default 15)")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"address to listen on (default {DEFAULT_HOST}; use your LAN address to reach other machines)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default {DEFAULT_PORT})")
+    parser.add_argument("-o", "--output", default="availability.xlsx", help="filled-in sheet written on exit")
+    parser.add_argument("--save-block", type=int, default=None,
+                        help="time block of the written sheet in minutes (default: --block)")
+    args = parser.parse_args(argv)
+
+    try:
+        roster = read_roster(args.roster)
+        sheet = generate_availability(roster, args.start, args.sim_start, args.offset, args.block)
+        output_grid = sheet.grid_at(args.save_block or args.block)
+    except (OSError, RosterError, ValueError, pytz.UnknownTimeZoneError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    collection = AvailabilityCollection(sheet.grid)
+    server = AvailabilityServer(collection, args.host, args.port, roster.event.get("Event Name") or "Driver Availability")
+    collection.listeners.append(lambda driver: print(f"{roster.drivers[driver].name} submitted"))
+
+    def print_links():
+        print(f"Serving on http://{server.link_host}:{server.port}/ - send each driver their link, Ctrl+C to finish")
+        for driver, name in enumerate(roster.driver_names):
+            print(f"  {name}: {server.url_for(driver)}")
+
+    try:
+        asyncio.run(server.serve(print_links))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    collection.save(args.output, output_grid)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import logging
+import shutil
+import sys
+from datetime import datetime, timedelta
+import pytz
+from availability_grid import build_availability_grid, parse_race_start
+import instrumentation
+from instrumentation import span
+from roster import read_roster, parse_race_length, RosterError
+from sheet_cache import SheetCache, sheet_key
+from xlsx_writer import write_availability_workbook
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCancelled(Exception):
+    """Raised from a progress callback to stop a sheet generation part way through."""
+
+
+class AvailabilitySheet:
+    """Result of generate_availability: the grid plus the inputs that produced it."""
+
+    def __init__(self, roster, grid, race_start, race_length, sim_start, time_block, path=None):
+        self.roster = roster
+        self.grid = grid
+        self.race_start = race_start  # green flag, aware UTC datetime
+        self.race_length = race_length
+        self.sim_start = sim_start
+        self.time_block = time_block
+        self.path = path  # set once the workbook has been written
+        self.cached = False  # True when the workbook was copied out of a SheetCache
+
+    def grid_at(self, time_block):
+        """The same race's grid at another block size, e.g. to save availability collected in finer blocks."""
+        if time_block == self.time_block:
+            return self.grid
+        return build_availability_grid(self.grid.driver_names, self.grid.driver_timezones, self.race_start,
+                                       self.race_length, time_block, self.sim_start)
+
+    def save(self, path, progress=None):
+        """Writes the workbook to path. progress(blocks_written, num_blocks) is called as rows go out."""
+        write_availability_workbook(self.grid, path, progress=progress)
+        self.path = path
+        return path
+
+
+def generate_availability(roster, start_gmt, sim_start=None, offset_minutes=0, time_block=15, race_length=None,
+                          output_path=None, progress=None, cache=None):
+    """Builds the availability grid for a roster, and writes the workbook if output_path is given.
+
+    start_gmt is an aware datetime or a "YYYY-MM-DD HH:MM"/"HH:MM" GMT string for the race start before the
+    green flag offset. race_length defaults to the roster's Race Length. Raises RosterError, ValueError or
+    pytz.UnknownTimeZoneError on bad input. progress is passed on to AvailabilitySheet.save.
+
+    With a SheetCache and an output_path, a sheet generated before from the same drivers and settings is
+    copied out of the cache instead of being rebuilt, and new sheets are added to it.
+    """
+    if not roster.drivers:
+        raise RosterError("Roster file must contain event and driver data.")
+
+    with span("event parsing"):
+        logger.debug("Event data: %s", roster.event)
+        if race_length is None:
+            if not roster.race_length:
+                raise RosterError("Roster file must contain 'Race Length' data.")
+            race_length = roster.race_length
+        if not isinstance(race_length, timedelta):
+            try:
+                race_length = parse_race_length(race_length)
+            except ValueError as e:
+                raise ValueError(f"Invalid race length format: {e}")
+
+        if isinstance(start_gmt, datetime):
+            start_gmt = start_gmt if start_gmt.tzinfo else start_gmt.replace(tzinfo=pytz.utc)
+        else:
+            start_gmt = parse_race_start(start_gmt)
+        if time_block <= 0:
+            raise ValueError("Time block must be a positive number of minutes.")
+    logger.debug("Race length %s, start %s, %d drivers", race_length, start_gmt, len(roster.drivers))
+
+    race_start = start_gmt + timedelta(minutes=int(offset_minutes))
+    key = None
+    if cache is not None and output_path:
+        key = sheet_key(roster.driver_names, roster.driver_timezones, race_start, race_length, sim_start or None,
+                        time_block)
+        with span("cache lookup"):
+            hit = cache.get(key)
+        if hit:
+            cached_path, grid = hit
+            logger.debug("Sheet cache hit %s", key)
+            sheet = AvailabilitySheet(roster, grid, race_start, race_length, sim_start or None, time_block)
+            with span("cache copy"):
+                shutil.copyfile(cached_path, output_path)
+            sheet.path = output_path
+            sheet.cached = True
+            return sheet
+
+    grid = build_availability_grid(roster.driver_names, roster.driver_timezones, race_start, race_length,
+                                   time_block, sim_start or None)
+    sheet = AvailabilitySheet(roster, grid, race_start, race_length, sim_start or None, time_block)
+    if output_path:
+        sheet.save(output_path, progress)
+        if key:
+            with span("cache store"):
+                cache.put(key, output_path, grid)
+    return sheet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a driver availability sheet from a roster CSV.")
+    parser.add_argument("roster", help="roster CSV saved from the Team Roster window")
+    parser.add_argument("--start", required=True, help='race start in GMT, "YYYY-MM-DD HH:MM" or "HH:MM"')
+    parser.add_argument("--sim-start", help="race start in sim time, HH:MM")
+    parser.add_argument("--offset", type=int, default=30, help="green flag offset in minutes (default 30)")
+    parser.add_argument("--block", type=int, default=15, help="time block in minutes (default 15)")
+    parser.add_argument("--race-length", help="override the roster's Race Length (HH:MM or D:HH:MM)")
+    parser.add_argument("-o", "--output", default="driver_availability.xlsx", help="workbook to write")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, ignoring the sheet cache")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging and phase timings")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    try:
+        with instrumentation.run("availability sheet") as timings:
+            roster = read_roster(args.roster)
+            sheet = generate_availability(roster, args.start, args.sim_start, args.offset, args.block,
+                                          args.race_length, output_path=args.output,
+                                          cache=None if args.no_cache else SheetCache())
+    except (OSError, ValueError, pytz.UnknownTimeZoneError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Driver Availability sheet saved to {sheet.path} "
+          f"({sheet.grid.num_drivers} drivers, {sheet.grid.num_blocks} blocks{', from cache' if sheet.cached else ''})")
+    if args.verbose:
+        print("\n".join(timings.lines()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
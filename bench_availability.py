@@ -0,0 +1,180 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from availability_grid import build_availability_grid, parse_race_start
+from roster import read_roster, clear_roster_cache, parse_race_length, EVENT_COLUMNS, DRIVER_COLUMNS
+from roster_validation import validate_roster_file
+from timezones import timezone_mapping, zone_offsets
+from xlsx_writer import AvailabilityWorkbookWriter
+
+DRIVER_COUNTS = [5, 20, 60, 200, 500]
+RACE_LENGTHS = ["1:00", "6:00", "24:00", "7:00:00"]  # HH:MM and D:HH:MM
+QUICK_DRIVER_COUNTS = [5, 60]
+QUICK_RACE_LENGTHS = ["1:00", "24:00"]
+PHASES = ["parse", "grid", "styling", "rows", "validation", "save"]
+
+
+def write_synthetic_roster(filepath, num_drivers, race_length, seed=0):
+    """Writes a roster CSV with num_drivers drivers spread over the zones in timezone_mapping."""
+    rng = random.Random(seed)
+    zones = sorted(timezone_mapping)
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(EVENT_COLUMNS)
+        writer.writerow(["Bench Event", "Bench Team", "Spa", "GT3", race_length])
+        writer.writerow([])
+        writer.writerow(DRIVER_COLUMNS)
+        for i in range(num_drivers):
+            back_to_back = rng.random() < 0.6
+            writer.writerow([rng.randint(1000, 6000), f"Driver {i:03d}", back_to_back,
+                             back_to_back and rng.random() < 0.3, timezone_mapping[rng.choice(zones)],
+                             rng.random() < 0.2, rng.random() < 0.2])
+    return filepath
+
+
+def run_case(roster_path, output_path, start, time_block, sim_start="08:00", measure_memory=False):
+    """Runs every generation phase once and returns {phase: {"seconds": ..., "peak_bytes": ...}}."""
+    results = {}
+
+    def phase(name, func):
+        if measure_memory:
+            tracemalloc.start()
+        began = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - began
+        entry = {"seconds": seconds}
+        if measure_memory:
+            entry["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[name] = entry
+        return value
+
+    clear_roster_cache()
+    zone_offsets.cache_clear()
+    def load_roster():
+        # What check_roster_data does on every load: check every cell, then build the Roster from the same read
+        problems = validate_roster_file(roster_path)
+        if problems:
+            raise ValueError(f"Synthetic roster is invalid: {problems[0]}")
+        return read_roster(roster_path)
+
+    roster = phase("parse", load_roster)
+    race_length = parse_race_length(roster.race_length)
+    grid = phase("grid", lambda: build_availability_grid(roster.driver_names, roster.driver_timezones,
+                                                         start, race_length, time_block, sim_start))
+    writer = AvailabilityWorkbookWriter(grid)
+    phase("styling", lambda: (writer.add_styles(), writer.set_column_widths()))
+    phase("rows", writer.write_rows)
+    phase("validation", writer.add_validations)
+    phase("save", lambda: writer.save(output_path))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(driver_counts, race_lengths, time_block=15, repeat=1, measure_memory=True, progress=None):
+    """Benchmarks every driver count/race length pair. Timings are the best of repeat runs."""
+    start = parse_race_start("2026-03-28 20:00")  # crosses the European DST change
+    cases = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for num_drivers in driver_counts:
+            for race_length in race_lengths:
+                roster_path = write_synthetic_roster(os.path.join(tmpdir, f"roster_{num_drivers}.csv"),
+                                                     num_drivers, race_length)
+                output_path = os.path.join(tmpdir, "bench.xlsx")
+                best = None
+                for _ in range(repeat):
+                    timings = run_case(roster_path, output_path, start, time_block)
+                    if best is None:
+                        best = timings
+                    else:
+                        for name in PHASES:
+                            best[name]["seconds"] = min(best[name]["seconds"], timings[name]["seconds"])
+                if measure_memory:
+                    memory = run_case(roster_path, output_path, start, time_block, measure_memory=True)
+                    for name in PHASES:
+                        best[name]["peak_bytes"] = memory[name]["peak_bytes"]
+                case = {
+                    "drivers": num_drivers,
+                    "race_length": race_length,
+                    "time_block": time_block,
+                    "blocks": parse_race_length(race_length) // timedelta(minutes=time_block) + 1,
+                    "file_bytes": os.path.getsize(output_path),
+                    "total_seconds": sum(best[name]["seconds"] for name in PHASES),
+                    "phases": best,
+                }
+                cases.append(case)
+                if progress:
+                    progress(case)
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+
+
+def format_case(case):
+    phases = " ".join(f"{name}={case['phases'][name]['seconds'] * 1000:.0f}ms" for name in PHASES)
+    peak = max((case["phases"][name].get("peak_bytes", 0) for name in PHASES), default=0)
+    memory = f" peak={peak / 2**20:.1f}MiB" if peak else ""
+    return (f"{case['drivers']:>4} drivers {case['race_length']:>8} ({case['blocks']} blocks): "
+            f"{case['total_seconds']:.3f}s  {phases}{memory}")
+
+
+def compare_results(results, baseline):
+    """One line per case also present in baseline, with the change in total time."""
+    previous = {(case["drivers"], case["race_length"], case["time_block"]): case for case in baseline["cases"]}
+    lines = [f"Compared with {baseline.get('revision') or 'baseline'}:"]
+    for case in results["cases"]:
+        old = previous.get((case["drivers"], case["race_length"], case["time_block"]))
+        if old and old["total_seconds"]:
+            change = (case["total_seconds"] - old["total_seconds"]) / old["total_seconds"] * 100
+            lines.append(f"{case['drivers']:>4} drivers {case['race_length']:>8}: "
+                         f"{old['total_seconds']:.3f}s -> {case['total_seconds']:.3f}s ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark roster parsing and availability sheet generation.")
+    parser.add_argument("--drivers", type=int, nargs="+", help=f"driver counts (default {DRIVER_COUNTS})")
+    parser.add_argument("--lengths", nargs="+", help=f"race lengths, HH:MM or D:HH:MM (default {RACE_LENGTHS})")
+    parser.add_argument("--block", type=int, default=15, help="time block in minutes (default 15)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, best time is kept")
+    parser.add_argument("--quick", action="store_true", help="only a small set of cases")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    driver_counts = args.drivers or (QUICK_DRIVER_COUNTS if args.quick else DRIVER_COUNTS)
+    race_lengths = args.lengths or (QUICK_RACE_LENGTHS if args.quick else RACE_LENGTHS)
+    results = run_benchmarks(driver_counts, race_lengths, args.block, max(1, args.repeat), not args.no_memory,
+                             progress=lambda case: print(format_case(case)))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print(compare_results(results, json.load(f)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
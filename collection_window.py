@@ -0,0 +1,177 @@
+import logging
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from availability_server import AvailabilityCollection, AvailabilityServer, DEFAULT_PORT, lan_address
+
+logger = logging.getLogger(__name__)
+
+POLL_MS = 1000  # only used when Tcl is built without threads and the server thread can't wake the window
+
+
+def open_collection_window(master, sheet, title="Driver Availability"):
+    """Serves sheet's time grid to the drivers over HTTP and shows who has submitted as it happens."""
+    collection = AvailabilityCollection(sheet.grid)
+    server = None
+
+    collection_window = tk.Toplevel(master)
+    try:
+        icon = tk.PhotoImage(file='racing_flag_PNG.png')
+        collection_window.iconphoto(False, icon)
+    except:
+        logger.warning("icon not found")
+    collection_window.configure(bg='#3d3d3d')
+    collection_window.title("Collect Availability")
+    collection_window.geometry("760x500")
+
+    # Where to listen: the links only work for drivers who can reach this address
+    server_frame = ttk.Frame(collection_window)
+    server_frame.grid(row=0, column=0, columnspan=3, sticky="ew", padx=10, pady=5)
+    ttk.Label(server_frame, text="Host:").grid(row=0, column=0, sticky="w")
+    host_entry = ttk.Entry(server_frame, width=16)
+    host_entry.insert(0, lan_address())
+    host_entry.grid(row=0, column=1, sticky="w", padx=5)
+    ttk.Label(server_frame, text="Port:").grid(row=0, column=2, sticky="w")
+    port_entry = ttk.Entry(server_frame, width=7)
+    port_entry.insert(0, str(DEFAULT_PORT))
+    port_entry.grid(row=0, column=3, sticky="w", padx=5)
+    server_label = ttk.Label(server_frame, text="", wraplength=720, justify="left")
+    server_label.grid(row=1, column=0, columnspan=5, sticky="w", pady=(5, 0))
+    server_label.config(text="Links work for drivers on this network. Drivers elsewhere need a port forwarded to "
+                             "this machine, and 127.0.0.1 only works on this computer.")
+
+    columns = ("Driver", "Timezone", "Submitted", "Link")
+    tree = ttk.Treeview(collection_window, columns=columns, show="headings")
+    for col, width in zip(columns, (160, 140, 130, 300)):
+        tree.heading(col, text=col)
+        tree.column(col, width=width)
+    scrollbar = ttk.Scrollbar(collection_window, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    tree.grid(row=1, column=0, columnspan=3, sticky="nsew", padx=(10, 0), pady=5)
+    scrollbar.grid(row=1, column=3, sticky="ns", padx=(0, 10), pady=5)
+    collection_window.rowconfigure(1, weight=1)
+    collection_window.columnconfigure(2, weight=1)
+
+    items = [tree.insert("", tk.END, values=(name, zone, "not yet", ""))
+             for name, zone in zip(sheet.grid.driver_names, sheet.grid.driver_timezones)]
+    status_label = ttk.Label(collection_window, text=f"0 of {len(items)} drivers have submitted.")
+    status_label.grid(row=3, column=0, columnspan=3, sticky="w", padx=10, pady=(0, 10))
+
+    # Submissions arrive on the server thread; it only marks drivers changed, and the window picks them up
+    changed = set()
+    changed_lock = threading.Lock()
+    threaded = collection_window.tk.eval("set tcl_platform(threaded)") == "1"
+
+    def on_submit(driver):
+        with changed_lock:
+            first = not changed
+            changed.add(driver)
+        if first and threaded:
+            try:
+                collection_window.event_generate("<<AvailabilitySubmitted>>", when="tail")
+            except (tk.TclError, RuntimeError):
+                pass  # window already closed
+
+    def show_submissions(event=None):
+        with changed_lock:
+            drivers = list(changed)
+            changed.clear()
+        for driver in drivers:
+            submitted = collection.submitted[driver]
+            tree.set(items[driver], "Submitted", f"{submitted:%Y-%m-%d %H:%M} GMT")
+        count = sum(submitted is not None for submitted in collection.submitted)
+        status_label.config(text=f"{count} of {len(items)} drivers have submitted.")
+
+    def poll_submissions():
+        if server is not None and collection_window.winfo_exists():
+            show_submissions()
+            collection_window.after(POLL_MS, poll_submissions)
+
+    def stop_server():
+        nonlocal server
+        if server is None:
+            return
+        if on_submit in collection.listeners:
+            collection.listeners.remove(on_submit)
+        server.stop(wait=False)  # the server thread may be waiting on this thread in event_generate
+        server = None
+
+    def toggle_server():
+        nonlocal server
+        if server is not None:
+            stop_server()
+            start_button.config(text="Start Server")
+            server_label.config(text="Server stopped. Submissions so far are kept.")
+            return
+        try:
+            port = int(port_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Port must be a number.", parent=collection_window)
+            return
+        new_server = AvailabilityServer(collection, host_entry.get().strip(), port, title)
+        try:
+            new_server.start()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not start the availability server: {e}", parent=collection_window)
+            return
+        server = new_server
+        collection.listeners.append(on_submit)
+        for driver, item in enumerate(items):
+            tree.set(item, "Link", server.url_for(driver))
+        start_button.config(text="Stop Server")
+        local_only = server.link_host.startswith("127.")
+        server_label.config(text=f"Serving on http://{server.link_host}:{server.port}/ - send each driver their link."
+                                 + (" This address only works on this computer." if local_only else ""))
+        if not threaded:
+            poll_submissions()
+
+    def copy_link():
+        selected = tree.selection()
+        if not selected or not tree.set(selected[0], "Link"):
+            messagebox.showinfo("Copy Link", "Start the server and select a driver first.", parent=collection_window)
+            return
+        collection_window.clipboard_clear()
+        collection_window.clipboard_append(tree.set(selected[0], "Link"))
+
+    def save_sheet():
+        try:
+            block_minutes = int(save_block.get())
+        except ValueError:
+            block_minutes = 0
+        if block_minutes < 1:
+            messagebox.showerror("Invalid Input", "Save block must be a whole number of minutes, at least 1.",
+                                 parent=collection_window)
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")],
+                                            title="Save Collected Availability", parent=collection_window)
+        if not path:
+            return
+        try:
+            # Collected as runs of minutes, so the sheet can use any block size over the same race
+            collection.save(path, sheet.grid_at(block_minutes))
+        except Exception as e:
+            logger.exception("Error saving collected availability")
+            messagebox.showerror("Save Error", f"Could not save the sheet: {e}", parent=collection_window)
+            return
+        messagebox.showinfo("Success", f"Availability sheet saved to {path}", parent=collection_window)
+
+    def close_window():
+        submitted = any(time is not None for time in collection.submitted)
+        if not submitted or messagebox.askyesno("Stop Collecting", "Close and stop the server? Unsaved submissions "
+                                                "will be lost.", parent=collection_window):
+            stop_server()
+            collection_window.destroy()
+
+    start_button = ttk.Button(server_frame, text="Start Server", command=toggle_server)
+    start_button.grid(row=0, column=4, sticky="w", padx=5)
+    ttk.Button(collection_window, text="Copy Link", command=copy_link).grid(row=2, column=0, sticky="ew", padx=(10, 5), pady=5)
+    ttk.Button(collection_window, text="Save Sheet", command=save_sheet).grid(row=2, column=1, sticky="ew", padx=5, pady=5)
+    save_frame = ttk.Frame(collection_window)
+    save_frame.grid(row=2, column=2, sticky="w", padx=5, pady=5)
+    ttk.Label(save_frame, text="Save block (minutes):").grid(row=0, column=0, sticky="w")
+    save_block = ttk.Spinbox(save_frame, from_=1, to=240, width=5)
+    save_block.set(str(sheet.time_block))
+    save_block.grid(row=0, column=1, sticky="w", padx=5)
+    collection_window.bind("<<AvailabilitySubmitted>>", show_submissions)
+    collection_window.protocol("WM_DELETE_WINDOW", close_window)
+    return collection_window
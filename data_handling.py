@@ -1,40 +1,38 @@
 import csv
-import os
-from tkinter import messagebox, filedialog
-import pandas as pd
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from roster import read_roster, RosterError, EVENT_COLUMNS, DRIVER_COLUMNS
+from roster_validation import validate_roster_file
+
+logger = logging.getLogger(__name__)
 
 def save_roster_data(event_data, roster_data, filename):
     try:
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
             # Write event data as a header row
-            writer.writerow(["Event Name", "Team Name", "Track", "Car", "Race Length"])
+            writer.writerow(EVENT_COLUMNS)
             writer.writerow(event_data)
             writer.writerow([]) #Blank row for spacing
             # Write driver data
-            writer.writerow(["iRating", "Driver Name", "Back to Back Stints", "Triple Stint", "Timezone", "Start", "Finish"])
+            writer.writerow(DRIVER_COLUMNS)
             writer.writerows(roster_data)
         return True  # Indicate success
     except Exception as e:
-        print(f"Error saving data: {e}")
+        logger.error("Error saving data: %s", e)
         return False #Indicate failure
 
 def load_roster_data(filename):
     try:
-        with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            event_header = next(reader)  # Read and discard event header
-            event_data = next(reader)      # Read the actual event data
-            next(reader) #Skip blank row
-            driver_header = next(reader) #Read and discard driver header
-            roster_data = list(reader)  # Read the rest as driver data
-        return event_data, roster_data
-    except StopIteration: #Handle empty files
-        return [], []
+        roster = read_roster(filename)
+        if not roster.event_header:  # Handle empty files
+            return [], []
+        return list(roster.event_values), roster.to_rows()
     except FileNotFoundError:
         raise
     except Exception as e:
-        print(f"Error loading data: {e}")
+        logger.error("Error loading data: %s", e)
         raise #Re-raise the exception
 
 def open_roster_file():
@@ -45,44 +43,59 @@ def open_roster_file():
     else:
         return None  # Return None if the dialog was cancelled
 
-def check_roster_data(filepath):
+def show_roster_problems(master, problems, title="Roster Problems"):
+    """Lists every problem found in a roster in one scrollable window."""
+    report_window = tk.Toplevel(master)
+    report_window.title(title)
+    report_window.configure(bg='#3d3d3d')
+    ttk.Label(report_window, text=f"{len(problems)} problems found. Fix them and load the roster again.").grid(
+        row=0, column=0, columnspan=2, sticky="w", padx=10, pady=(10, 5))
+
+    columns = ("Line", "Column", "Value", "Problem")
+    tree = ttk.Treeview(report_window, columns=columns, show="headings", height=min(len(problems), 15))
+    for col, width in zip(columns, (50, 120, 120, 380)):
+        tree.heading(col, text=col)
+        tree.column(col, width=width)
+    for problem in problems:
+        tree.insert("", tk.END, values=("" if problem.line is None else problem.line, problem.column, problem.value,
+                                        problem.message))
+    scrollbar = ttk.Scrollbar(report_window, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    tree.grid(row=1, column=0, sticky="nsew", padx=(10, 0), pady=(0, 10))
+    scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 10), pady=(0, 10))
+    report_window.columnconfigure(0, weight=1)
+    report_window.rowconfigure(1, weight=1)
+    return report_window
+
+def check_roster_data(filepath, master=None):
+    """(Race Length, Roster) for a roster file, or None once the problems have been shown to the user."""
     if filepath is None:
         return None
     try:
-        data = []
-        with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                if row:
-                    data.append(row)
+        problems = validate_roster_file(filepath)
+        if problems:
+            show_roster_problems(master, problems, "Invalid Roster File")
+            return None
+        roster = read_roster(filepath)
 
-        if len(data) < 4:
+        if not roster.drivers:
             messagebox.showerror("Error", "Roster file must contain event and driver data.")
             return None
 
-        # Correctly create event_data dictionary
-        event_data = {}
-        for i in range(len(data[0])):  # Iterate through the columns
-            if i < len(data[1]): #check to make sure the index exists in the second row
-                event_data[data[0][i]] = data[1][i]
-            else:
-                event_data[data[0][i]] = "" #if it doesnt exist, make it an empty string
+        event_data = roster.event
 
         if "Race Length" not in event_data:
             messagebox.showerror("Error", "Roster file must contain 'Race Length' data.")
             return None
 
-        driver_data = data[3:]
-        if not driver_data or not driver_data[0]:
-            messagebox.showerror("Error", "Roster file must contain driver data.")
-            return None
-        driver_df = pd.DataFrame(driver_data[1:], columns=driver_data[0])
-
-        return event_data["Race Length"], driver_df
+        return event_data["Race Length"], roster
 
     except FileNotFoundError:
         messagebox.showerror("Error", "File not found.")
         return None
+    except RosterError as e:
+        messagebox.showerror("Error", f"Invalid roster file: {e}")
+        return None
     except IndexError as e:
         messagebox.showerror("Error", f"Invalid roster file format (Index Error): {e}")
         return None
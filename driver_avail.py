@@ -1,30 +1,169 @@
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
-import pandas as pd
 import data_handling as dh
-import csv
+import instrumentation
+from availability_sheet import generate_availability, GenerationCancelled
+from roster import RosterError
+from sheet_cache import SheetCache
 from functools import partial
 
+logger = logging.getLogger(__name__)
+
+TIMINGS_RUN = "availability sheet"
+POLL_MS = 100  # how often the window checks the worker's message queue
+
+
+class SheetGenerationJob:
+    """Generates an availability sheet on a worker thread.
+
+    The workbook is written to a temporary file. Progress, the finished sheet or the error that stopped
+    it are put on a queue for the Tk thread to pick up, since Tk widgets must only be touched from there.
+    """
+
+    def __init__(self, filepath, start_gmt_str, start_local_str, offset, time_block):
+        self.filepath = filepath
+        self.start_gmt_str = start_gmt_str
+        self.start_local_str = start_local_str
+        self.offset = offset
+        self.time_block = time_block
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+        self._finish_lock = threading.Lock()  # so a sheet is either handed over or discarded, never both
+        self.thread = threading.Thread(target=self.run, name="availability sheet", daemon=True)
+        self._progress_step = 1
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def discard(self):
+        """Cancels the job for good, e.g. when its window closes, and deletes a finished sheet nobody picked up.
+
+        Once this returns the worker can't queue another sheet, so nothing is left behind in the temp directory.
+        """
+        with self._finish_lock:
+            self.cancelled.set()
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return
+            if message[0] == "done":
+                remove_file(message[1].path)
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise GenerationCancelled()
+
+    def status(self, text):
+        self.check_cancelled()
+        self.messages.put(("status", text))
+
+    def progress(self, done, total):
+        self.check_cancelled()
+        # About a hundred updates per sheet is plenty for a progress bar
+        if done == 1:
+            self._progress_step = max(1, total // 100)
+        if done == total or done % self._progress_step == 0:
+            self.messages.put(("progress", done, total))
+
+    def run(self):
+        fd, temp_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            with instrumentation.run(TIMINGS_RUN):
+                self.status("Reading roster...")
+                roster = dh.read_roster(self.filepath)
+                self.status(f"Building time grid for {len(roster.drivers)} drivers...")
+                sheet = generate_availability(roster, self.start_gmt_str, self.start_local_str, self.offset,
+                                              self.time_block, output_path=temp_path, progress=self.progress,
+                                              cache=SheetCache())
+            with self._finish_lock:
+                self.check_cancelled()  # cancelled while saving, nobody is going to pick the sheet up
+                self.messages.put(("done", sheet))
+        except GenerationCancelled:
+            remove_file(temp_path)
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            remove_file(temp_path)
+            self.messages.put(("error", e))
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def show_generation_error(e):
+    if isinstance(e, RosterError):
+        messagebox.showerror("Roster Error", f"Invalid roster file: {e}")
+    elif isinstance(e, ValueError):
+        messagebox.showerror("ValueError", f"A value error has occurred: {e}")
+    elif isinstance(e, pytz.UnknownTimeZoneError):
+        messagebox.showerror("Timezone Error", f"Invalid Timezone: {e}")
+    else:
+        logger.error("Error generating Excel sheet", exc_info=e)  # Log the full exception information for debugging
+        messagebox.showerror("Error", f"Error generating Excel sheet: {str(e)}")
+
+
+def save_generated_sheet(sheet, availability_window):
+    """Asks where to save a finished sheet and moves its temporary workbook there. Returns True once saved."""
+    temp_path = sheet.path
+    filepath = filedialog.asksaveasfilename(
+        defaultextension=".xlsx",
+        filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+        title="Save Driver Availability Sheet",
+        initialfile="driver_availability.xlsx",
+        parent=availability_window
+    )
+
+    if not filepath:
+        remove_file(temp_path)
+        messagebox.showinfo("Info", "Save operation cancelled.")
+        return False
+    try:
+        shutil.move(temp_path, filepath)
+        sheet.path = filepath
+        messagebox.showinfo("Success", f"Driver Availability sheet saved to {filepath}!")
+        return True
+    except OSError as e:
+        remove_file(temp_path)
+        messagebox.showerror("Save Error", f"Error saving file: {e}")
+    except Exception as e:
+        remove_file(temp_path)
+        messagebox.showerror("Save Error", f"An unexpected error occurred during save: {e}")
+    return False
+
+
 def open_availability_window(master):
     """Opens the driver availability input window."""
 
-    def create_availability_input_window(master, filepath, race_length, driver_df):
+    def create_availability_input_window(master, filepath, race_length, roster):
         availability_window = tk.Toplevel(master)
         try:
             icon = tk.PhotoImage(file='racing_flag_PNG.png')
             availability_window.iconphoto(False, icon)
         except:
-            print("icon not found")
+            logger.warning("icon not found")
         availability_window.configure(bg='#3d3d3d')
         availability_window.title("Driver Availability Input")
-        availability_window.geometry("450x400")  # Increased size slightly
+        availability_window.geometry("520x640")  # Increased size slightly
 
         # Input fields
-        ttk.Label(availability_window, text="Race Start Time (GMT):", font=("Arial", 12)).grid(row=0, column=0, sticky="w", padx=10, pady=5)
+        ttk.Label(availability_window, text="Race Start (GMT, [YYYY-MM-DD] HH:MM):", font=("Arial", 12)).grid(row=0, column=0, sticky="w", padx=10, pady=5)
         start_gmt_entry = ttk.Entry(availability_window, width=20)
         start_gmt_entry.grid(row=0, column=1, sticky="ew", padx=10, pady=5)
 
@@ -49,13 +188,125 @@ def open_availability_window(master):
         time_block_values = [15, 30, 45, 60]
         for i, value in enumerate(time_block_values):
             ttk.Radiobutton(time_block_frame, text=f"{value} Minutes", variable=time_block, value=value).grid(row=i, column=0, sticky="w", pady=2)
+        # Any block size down to one minute; 0 means "use the custom box". Availability collected online is kept
+        # as runs of minutes, and can be saved at a coarser block size than it was collected in.
+        ttk.Radiobutton(time_block_frame, text="Other:", variable=time_block, value=0).grid(row=len(time_block_values), column=0, sticky="w", pady=2)
+        custom_block = ttk.Spinbox(time_block_frame, from_=1, to=240, width=5)
+        custom_block.set("5")
+        custom_block.grid(row=len(time_block_values), column=1, sticky="w", padx=5, pady=2)
+
+        def chosen_time_block():
+            if time_block.get():
+                return time_block.get()
+            try:
+                minutes = int(custom_block.get())
+            except ValueError:
+                minutes = 0
+            if minutes < 1:
+                messagebox.showerror("ValueError", "Time block must be a whole number of minutes, at least 1.")
+                return None
+            return minutes
+
+        job = None
 
         def create_availability(availability_window):
-            offset = offset_entry.get()
+            nonlocal job
             start_gmt_str = start_gmt_entry.get()
             start_local_str = start_local_entry.get() if start_local_entry.get() else None
-
-            generate_availability_sheet(filepath, start_gmt_str, start_local_str, int(offset), time_block.get(), race_length, master, availability_window)  # pass the filepath
+            try:
+                offset = int(offset_entry.get())
+            except ValueError:
+                messagebox.showerror("ValueError", "Green flag offset must be a whole number of minutes.")
+                return
+            block_minutes = chosen_time_block()
+            if block_minutes is None:
+                return
+
+            job = generate_availability_sheet(filepath, start_gmt_str, start_local_str, offset, block_minutes)  # pass the filepath
+            create_button.config(state="disabled")
+            cancel_button.config(state="normal")
+            progress_bar.config(value=0)
+            status_label.config(text="Starting...")
+            availability_window.after(POLL_MS, poll_job)
+
+        def collect_online():
+            # The grid alone is quick to build; no workbook is written until the collected sheet is saved
+            try:
+                offset = int(offset_entry.get())
+            except ValueError:
+                messagebox.showerror("ValueError", "Green flag offset must be a whole number of minutes.")
+                return
+            block_minutes = chosen_time_block()
+            if block_minutes is None:
+                return
+            try:
+                sheet = generate_availability(roster, start_gmt_entry.get(), start_local_entry.get() or None, offset,
+                                              block_minutes)
+            except Exception as e:
+                show_generation_error(e)
+                return
+            from collection_window import open_collection_window
+            open_collection_window(master, sheet, roster.event.get("Event Name") or "Driver Availability")
+
+        def cancel_availability():
+            if job is not None:
+                job.cancel()
+                status_label.config(text="Cancelling...")
+                cancel_button.config(state="disabled")
+
+        def finish_job():
+            nonlocal job
+            job = None
+            create_button.config(state="normal")
+            cancel_button.config(state="disabled")
+
+        def poll_job():
+            if job is None or not availability_window.winfo_exists():
+                return
+            try:
+                while True:
+                    message = job.messages.get_nowait()
+                    kind = message[0]
+                    if kind == "status":
+                        status_label.config(text=message[1])
+                    elif kind == "progress":
+                        done, total = message[1], message[2]
+                        progress_bar.config(maximum=total, value=done)
+                        status_label.config(text=f"Writing rows: {done}/{total} blocks")
+                    elif kind == "done":
+                        sheet = message[1]
+                        finish_job()
+                        status_label.config(text="Sheet ready.")
+                        show_last_timings()
+                        if save_generated_sheet(sheet, availability_window):
+                            availability_window.destroy()
+                        return
+                    elif kind == "cancelled":
+                        finish_job()
+                        progress_bar.config(value=0)
+                        status_label.config(text="Cancelled.")
+                        return
+                    elif kind == "error":
+                        finish_job()
+                        status_label.config(text="Failed.")
+                        show_generation_error(message[1])
+                        return
+            except queue.Empty:
+                pass
+            availability_window.after(POLL_MS, poll_job)
+
+        def close_window():
+            if job is not None:
+                # A running worker notices at its next row and cleans up; a sheet it already finished is deleted
+                job.discard()
+            availability_window.destroy()
+
+        def show_last_timings():
+            timings = instrumentation.last_run(TIMINGS_RUN)
+            if timings is None:
+                timings_label.config(text="No sheet generated yet.")
+            else:
+                timings_label.config(text="\n".join(timings.lines()))
 
         # Center the window
         availability_window.update_idletasks()
@@ -67,189 +318,39 @@ def open_availability_window(master):
 
         create_button_command = partial(create_availability, availability_window)  # Create the partial function
         create_button = ttk.Button(availability_window, text="Create Availability Sheet", command=create_button_command) # Assign the partial function to command
-        create_button.grid(row=4, column=0, columnspan=2, pady=(10, 20), sticky="ew")
+        create_button.grid(row=4, column=0, pady=(10, 5), padx=(10, 5), sticky="ew")
+        cancel_button = ttk.Button(availability_window, text="Cancel", command=cancel_availability, state="disabled")
+        cancel_button.grid(row=4, column=1, pady=(10, 5), padx=(5, 10), sticky="ew")
+
+        # Progress
+        progress_bar = ttk.Progressbar(availability_window, mode="determinate")
+        progress_bar.grid(row=5, column=0, columnspan=2, sticky="ew", padx=10, pady=(5, 0))
+        status_label = ttk.Label(availability_window, text="")
+        status_label.grid(row=6, column=0, columnspan=2, sticky="w", padx=10, pady=(0, 10))
+        availability_window.protocol("WM_DELETE_WINDOW", close_window)
+
+        # Last Run Timings Panel
+        timings_frame = ttk.LabelFrame(availability_window, text="Last Run Timings")
+        timings_frame.grid(row=7, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
+        timings_label = ttk.Label(timings_frame, text="", justify="left")
+        timings_label.grid(row=0, column=0, sticky="w", padx=5, pady=5)
+        show_last_timings()
+
+        ttk.Button(availability_window, text="Collect Availability Online", command=collect_online).grid(row=8, column=0, columnspan=2, pady=(0, 10), padx=10, sticky="ew")
 
     filepath = dh.open_roster_file()
     if filepath:
-        result = dh.check_roster_data(filepath)
-        if result:
-            race_length, driver_df = result
-            if driver_df is not None and race_length is not None:
-                create_availability_input_window(master, filepath, race_length, driver_df)
+        result = dh.check_roster_data(filepath, master)
+        if result:  # otherwise check_roster_data has already shown what was wrong
+            race_length, roster = result
+            if roster is not None and race_length is not None:
+                create_availability_input_window(master, filepath, race_length, roster)
             else:
                 messagebox.showerror("Error", "Could not read data from roster file.")
-        else:
-            messagebox.showerror("Error", "Could not open roster file.")
-
 
 
 
-def generate_availability_sheet(filepath, start_gmt_str, start_local_str, offset_str, time_block, race_length_str, master, availability_window): #take filepath as a parameter
-    try:
-        wb = openpyxl.Workbook()
-        sheet = wb.active
-        sheet.title = "Driver Availability"
-        data = []
-        with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                if row:
-                    data.append(row)
-        print("Raw Data from CSV:", data)  # print the raw data
-
-        if len(data) < 4:
-            messagebox.showerror("Error", "Roster file must contain event and driver data.")
-            return None
-
-        # Correctly create event_data dictionary
-        event_data = {}
-        for i in range(len(data[0])):  # Iterate through the columns
-            if i < len(data[1]):  # check to make sure the index exists in the second row
-                event_data[data[0][i]] = data[1][i]
-            else:
-                event_data[data[0][i]] = ""  # if it doesnt exist, make it an empty string
-        print("Event Data:", event_data)
-
-        if "Race Length" not in event_data:
-            messagebox.showerror("Error", "Roster file must contain 'Race Length' data.")
-            return None
-        try:
-            race_length_parts = list(map(int, event_data["Race Length"].split(':')))
-            if len(race_length_parts) == 2:
-                race_length = timedelta(hours=race_length_parts[0], minutes=race_length_parts[1])
-            elif len(race_length_parts) == 3:
-                race_length = timedelta(days=race_length_parts[0], hours=race_length_parts[1],
-                                        minutes=race_length_parts[2])
-            else:
-                raise ValueError("Invalid race length format. Use HH:MM or D:HH:MM")
-            print("Race Length:", race_length)
-
-        except ValueError as e:
-            messagebox.showerror("ValueError", f"Invalid race length format: {e}")
-            return
-
-        driver_data = data[2:]  # start at the fourth line
-        print("Driver Data:", driver_data)
-        if not driver_data or not driver_data[0]:
-            messagebox.showerror("Error", "Roster file must contain driver data.")
-            return
-
-        roster_df = pd.DataFrame(driver_data[1:], columns=driver_data[0])
-
-        start_gmt = datetime.strptime(start_gmt_str, "%H:%M").replace(tzinfo=pytz.utc)
-        offset = int(offset_str)
-
-        race_start_gmt = start_gmt + timedelta(minutes=offset)
-        race_end_gmt = race_start_gmt + race_length
-
-        # Write Time Headers
-        sheet.cell(row=1, column=1).value = "Race Time"
-        sheet.cell(row=1, column=2).value = "GMT"
-        sim_time_col = 3  # Column for Sim Time (if needed)
-        if start_local_str:
-            sheet.cell(row=1, column=sim_time_col).value = "Sim Time"
-
-        # Driver Headers
-        driver_start_col = sim_time_col + 1  # Start column for driver data
-        driver_col_index = driver_start_col
-        for driver_name in roster_df["Driver Name"]:  # iterate through the driver names
-            sheet.cell(row=1, column=driver_col_index).value = f"{driver_name} Local"
-            sheet.cell(row=1, column=driver_col_index + 1).value = f"{driver_name} Availability"
-            driver_col_index += 2
-
-        current_time_gmt = race_start_gmt
-        row_num = 2
-        while current_time_gmt <= race_end_gmt:
-            sheet.cell(row=row_num, column=1).value = (current_time_gmt - race_start_gmt).seconds // 3600
-            sheet.cell(row=row_num, column=2).value = current_time_gmt.strftime("%H:%M")
-            if start_local_str:
-                local_time = (datetime.combine(datetime.today(), datetime.strptime(start_local_str, "%H:%M").time()) + (
-                            current_time_gmt - race_start_gmt)).time()
-                sheet.cell(row=row_num, column=sim_time_col).value = local_time.strftime("%H:%M")
-
-            # Driver Local Time and Availability
-            driver_data_row = 0
-            driver_col_index = driver_start_col
-            for _, driver_row_data in roster_df.iterrows():
-                timezone_str = driver_row_data["Timezone"]
-                try:
-                    driver_timezone = pytz.timezone(timezone_str)
-                except pytz.UnknownTimeZoneError:
-                    messagebox.showerror("Timezone Error",
-                                         f"Unknown timezone: {timezone_str} for driver {driver_row_data['Driver Name']}")
-                    return
-                driver_gmt = current_time_gmt.astimezone(driver_timezone)
-                sheet.cell(row=row_num, column=driver_col_index).value = driver_gmt.strftime("%H:%M")
-                sheet.cell(row=row_num,
-                           column=driver_col_index + 1).value = "Available\nMonitor\nTentative\nSleep\nBlocked"
-                driver_col_index += 2
-                driver_data_row += 1
-
-            current_time_gmt += timedelta(minutes=time_block)
-            row_num += 1
-
-        # Apply Formatting
-        bold_font = Font(bold=True)
-        alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'),
-                        bottom=Side(style='thin'))
-
-        for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, max_col=sheet.max_column):
-            for cell in row:
-                cell.alignment = alignment
-                cell.border = border
-                if row[0].row == 1:  # format the header row
-                    cell.font = bold_font
-                if cell.column == 4:  # format availability column
-                    cell.alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
-
-        # Auto-adjust column widths
-        for column in sheet.columns:
-            max_length = 0
-            column = [cell for cell in column if cell.value]  # check if the cell has a value
-            if column:  # check if the column list is not empty
-                try:
-                    max_length = max(len(str(cell.value)) for cell in column)
-                except ValueError:  # if there is a value error, set the max length to 0
-                    max_length = 0
-                adjusted_width = (max_length + 2)
-                sheet.column_dimensions[column[0].column_letter].width = adjusted_width
-
-        availability_options = ["Available", "Monitor", "Tentative", "Sleep", "Blocked"]
-        for row in range(2, row_num):
-            for driver_index in range(0, len(roster_df)):
-                availability_col = driver_start_col + (driver_index * 2) + 1
-                cell = sheet.cell(row=row, column=availability_col)
-                dv = openpyxl.worksheet.datavalidation.DataValidation(type="list", formula1='"{}"'.format(
-                    ",".join(availability_options)))
-                sheet.add_data_validation(dv)
-                dv.add(cell)
-                cell.value = "Tentative"
-
-        filepath = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-            title="Save Driver Availability Sheet",
-            initialfile="driver_availability.xlsx",
-            parent=master
-        )
-
-        if filepath:
-            try:
-                wb.save(filepath)
-                messagebox.showinfo("Success", f"Driver Availability sheet saved to {filepath}!")
-                availability_window.destroy()
-            except OSError as e:
-                messagebox.showerror("Save Error", f"Error saving file: {e}")
-            except Exception as e:
-                messagebox.showerror("Save Error", f"An unexpected error occurred during save: {e}")
-        else:
-            messagebox.showinfo("Info", "Save operation cancelled.")
 
-    except ValueError as e:
-        messagebox.showerror("ValueError", f"A value error has occurred: {e}")
-    except pytz.UnknownTimeZoneError as e:
-        messagebox.showerror("Timezone Error", f"Invalid Timezone: {e}")
-    except Exception as e:
-        print(f"Full Exception: {e}")  # Print the full exception information for debugging
-        messagebox.showerror("Error", f"Error generating Excel sheet: {str(e)}")
\ No newline at end of file
+def generate_availability_sheet(filepath, start_gmt_str, start_local_str, offset, time_block): #take filepath as a parameter
+    """Starts generating a sheet in the background and returns the running SheetGenerationJob."""
+    return SheetGenerationJob(filepath, start_gmt_str, start_local_str, offset, time_block).start()
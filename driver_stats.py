@@ -0,0 +1,331 @@
+import argparse
+import csv
+import io
+import mmap
+import os
+import sys
+import numpy as np
+import pandas as pd
+from instrumentation import span
+
+CHUNK_BYTES = 8 * 2**20  # each chunk ends on a line break, so this is approximate
+
+# Accepted header names for each column, compared case-insensitively
+DRIVER_HEADERS = ("driver name", "driver", "name")
+LAP_TIME_HEADERS = ("lap time", "laptime", "time")
+LAP_HEADERS = ("lap", "lap number", "lap #")
+STINT_HEADERS = ("stint", "stint number")
+
+CLEAN_LAP_FACTOR = 1.07  # laps slower than this times the driver's median (pit, out and incident laps) are left out
+
+LAP_TIME_PATTERN = r"^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d*)?)$"  # seconds, M:SS.sss or H:MM:SS.sss
+
+
+class LapData:
+    """Every lap from one or more lap files as compact parallel arrays."""
+
+    def __init__(self, driver_names, drivers, lap_times, laps, stints):
+        self.driver_names = driver_names  # driver code -> name
+        self.drivers = drivers  # int32 driver code per lap
+        self.lap_times = lap_times  # float32 seconds per lap
+        self.laps = laps  # int32 lap number per lap, -1 when the file has none
+        self.stints = stints  # int32 stint number per lap, -1 when the file has none
+
+    def __len__(self):
+        return len(self.lap_times)
+
+
+class DriverStats:
+    """Pace, consistency and stint statistics per driver, one array entry per driver in names order.
+
+    Times are seconds; NaN where a driver has no laps.
+    """
+
+    def __init__(self, names, laps, clean_laps, best, median, mean, std, stints, mean_stint_laps, longest_stint_laps):
+        self.names = names
+        self.laps = laps
+        self.clean_laps = clean_laps
+        self.best = best
+        self.median = median
+        self.mean = mean  # clean laps only
+        self.std = std  # clean laps only
+        self.stints = stints
+        self.mean_stint_laps = mean_stint_laps
+        self.longest_stint_laps = longest_stint_laps
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self):
+        return {name: i for i, name in enumerate(self.names)}
+
+    def for_roster(self, roster):
+        """Stats in roster driver order, joined on Driver Name. Drivers with no laps get zeros and NaN."""
+        index = self.index()
+        positions = np.array([index.get(name, -1) for name in roster.driver_names], dtype=np.int64)
+        found = positions >= 0
+
+        def take(values, missing):
+            result = np.full(len(positions), missing, dtype=values.dtype)
+            result[found] = values[positions[found]]
+            return result
+
+        return DriverStats(list(roster.driver_names), take(self.laps, 0), take(self.clean_laps, 0),
+                           take(self.best, np.nan), take(self.median, np.nan), take(self.mean, np.nan),
+                           take(self.std, np.nan), take(self.stints, 0), take(self.mean_stint_laps, np.nan),
+                           take(self.longest_stint_laps, 0))
+
+    def rows(self):
+        """Display rows: name, laps, best, median, mean, std dev, stints, average and longest stint."""
+        for i, name in enumerate(self.names):
+            yield [name, int(self.laps[i]), format_lap_time(self.best[i]), format_lap_time(self.median[i]),
+                   format_lap_time(self.mean[i]), "-" if np.isnan(self.std[i]) else f"{self.std[i]:.3f}",
+                   int(self.stints[i]), "-" if np.isnan(self.mean_stint_laps[i]) else f"{self.mean_stint_laps[i]:.1f}",
+                   int(self.longest_stint_laps[i])]
+
+    def to_dataframe(self):
+        return pd.DataFrame({
+            "Driver Name": self.names, "Laps": self.laps, "Clean Laps": self.clean_laps, "Best": self.best,
+            "Median": self.median, "Mean": self.mean, "Std Dev": self.std, "Stints": self.stints,
+            "Avg Stint Laps": self.mean_stint_laps, "Longest Stint": self.longest_stint_laps,
+        })
+
+
+STATS_COLUMNS = ["Driver", "Laps", "Best", "Median", "Mean", "Std Dev", "Stints", "Avg Stint Laps", "Longest Stint"]
+
+
+def format_lap_time(seconds):
+    if seconds is None or np.isnan(seconds):
+        return "-"
+    minutes, seconds = divmod(float(seconds), 60)
+    return f"{int(minutes)}:{seconds:06.3f}"
+
+
+def lap_seconds(values):
+    """Lap times as float seconds from a Series of seconds, M:SS.sss or H:MM:SS.sss. Unparseable gives NaN.
+
+    Lap times repeat a lot, so only the distinct strings are parsed.
+    """
+    codes, uniques = pd.factorize(values)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.strip().str.extract(LAP_TIME_PATTERN)
+    hours = pd.to_numeric(parts[0], errors="coerce").fillna(0)
+    minutes = pd.to_numeric(parts[1], errors="coerce").fillna(0)
+    seconds = pd.to_numeric(parts[2], errors="coerce")
+    parsed = np.append((hours * 3600 + minutes * 60 + seconds).to_numpy(dtype=np.float64), np.nan)
+    return parsed[codes]  # missing values have code -1, which picks the trailing NaN
+
+
+def _find_column(header, names, filepath, required=True):
+    lowered = [column.strip().lower() for column in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    if required:
+        raise ValueError(f"{filepath} has no {names[0].title()} column")
+    return None
+
+
+def iter_chunks(buffer, start, chunk_bytes=CHUNK_BYTES):
+    """(start, end) byte ranges of buffer from start on, each ending just after a line break."""
+    size = len(buffer)
+    while start < size:
+        end = min(start + chunk_bytes, size)
+        if end < size:
+            newline = buffer.find(b"\n", end)
+            end = size if newline == -1 else newline + 1
+        yield start, end
+        start = end
+
+
+def read_chunk(data, wanted, dtypes):
+    """One chunk of lap rows as a DataFrame of the wanted columns."""
+    try:
+        return pd.read_csv(io.BytesIO(data), header=None, usecols=list(wanted.values()), dtype=dtypes)
+    except ValueError as e:
+        if isinstance(e, pd.errors.EmptyDataError):
+            raise
+        # Text in a lap or stint column; read everything as text and let to_numeric drop it
+        return pd.read_csv(io.BytesIO(data), header=None, usecols=list(wanted.values()), dtype=str)
+
+
+def read_lap_file(filepath, chunk_bytes=CHUNK_BYTES, driver_codes=None):
+    """Parses a lap CSV through a memory map, one chunk at a time.
+
+    Only the driver, lap time, lap and stint columns are kept, as compact arrays, so memory tracks the
+    number of laps rather than the file size. driver_codes (name -> code) is shared between files.
+    """
+    driver_codes = {} if driver_codes is None else driver_codes
+    drivers, lap_times, laps, stints = [], [], [], []
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{filepath} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header_end = buffer.find(b"\n")
+            header_end = len(buffer) if header_end == -1 else header_end + 1
+            header = next(csv.reader([buffer[:header_end].decode("utf-8-sig")]), [])
+            columns = {"driver": _find_column(header, DRIVER_HEADERS, filepath),
+                       "time": _find_column(header, LAP_TIME_HEADERS, filepath),
+                       "lap": _find_column(header, LAP_HEADERS, filepath, required=False),
+                       "stint": _find_column(header, STINT_HEADERS, filepath, required=False)}
+            wanted = {key: index for key, index in columns.items() if index is not None}
+            # Let the C parser turn lap and stint numbers into floats; names and times stay text
+            dtypes = {index: (str if key in ("driver", "time") else np.float64) for key, index in wanted.items()}
+
+            for start, end in iter_chunks(buffer, header_end, chunk_bytes):
+                try:
+                    chunk = read_chunk(buffer[start:end], wanted, dtypes)
+                except pd.errors.EmptyDataError:
+                    continue
+                if chunk.empty:
+                    continue
+                times = lap_seconds(chunk[wanted["time"]])
+                names = chunk[wanted["driver"]].fillna("").astype(str).str.strip().to_numpy()
+                valid = np.isfinite(times) & (times > 0) & (names != "")  # no-time, invalid (-1) and unnamed laps
+                names = names[valid]
+
+                # Chunk-local codes mapped onto the running name -> code table
+                local_codes, uniques = pd.factorize(names)
+                mapping = np.array([driver_codes.setdefault(name, len(driver_codes)) for name in uniques],
+                                   dtype=np.int32)
+                drivers.append(mapping[local_codes] if len(uniques) else np.empty(0, dtype=np.int32))
+                lap_times.append(times[valid].astype(np.float32))
+                for key, target in (("lap", laps), ("stint", stints)):
+                    if key in wanted:
+                        values = pd.to_numeric(chunk[wanted[key]], errors="coerce").fillna(-1).to_numpy()
+                        target.append(values[valid].astype(np.int32))  # already floats unless the column had text
+                    else:
+                        target.append(np.full(int(valid.sum()), -1, dtype=np.int32))
+
+    names = [None] * len(driver_codes)
+    for name, code in driver_codes.items():
+        names[code] = name
+
+    def join(arrays, dtype):
+        return np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.empty(0, dtype=dtype)
+
+    return LapData(names, join(drivers, np.int32), join(lap_times, np.float32), join(laps, np.int32),
+                   join(stints, np.int32))
+
+
+def read_lap_files(filepaths, chunk_bytes=CHUNK_BYTES):
+    """Reads several lap files (one per session, say) into one LapData with shared driver codes."""
+    driver_codes = {}
+    parts = [read_lap_file(filepath, chunk_bytes, driver_codes) for filepath in filepaths]
+    names = [None] * len(driver_codes)
+    for name, code in driver_codes.items():
+        names[code] = name
+    if not parts:
+        return LapData(names, np.empty(0, np.int32), np.empty(0, np.float32), np.empty(0, np.int32),
+                       np.empty(0, np.int32))
+    # Stints are worked out per file, since lap numbers and stint numbers restart in every file, then offset
+    # to stay distinct
+    stints, offset = [], 0
+    for part in parts:
+        ids = stint_ids(part)
+        stints.append(ids + offset)
+        if len(ids):
+            offset += int(ids.max()) + 1
+    return LapData(names, np.concatenate([part.drivers for part in parts]),
+                   np.concatenate([part.lap_times for part in parts]), np.concatenate([part.laps for part in parts]),
+                   np.concatenate(stints).astype(np.int32))
+
+
+def stint_ids(lap_data):
+    """A stint id per lap: the stint column where every lap has one, otherwise each run of consecutive laps
+    by the same driver (in lap order) is a stint. Lap numbers restart in every file, so a LapData of several
+    files should come from read_lap_files, which does this per file."""
+    if len(lap_data) and (lap_data.stints >= 0).all():
+        return lap_data.stints.astype(np.int64)
+    order = np.argsort(lap_data.laps, kind="stable") if (lap_data.laps >= 0).all() else np.arange(len(lap_data))
+    drivers = lap_data.drivers[order]
+    change = np.empty(len(drivers), dtype=bool)
+    change[:1] = True
+    change[1:] = drivers[1:] != drivers[:-1]
+    ids = np.empty(len(drivers), dtype=np.int64)
+    ids[order] = np.cumsum(change) - 1
+    return ids
+
+
+def compute_driver_stats(lap_data):
+    """Aggregates a LapData into per-driver DriverStats with grouped numpy operations."""
+    num_drivers = len(lap_data.driver_names)
+    drivers = lap_data.drivers.astype(np.int64)
+    times = lap_data.lap_times.astype(np.float64)
+
+    laps = np.bincount(drivers, minlength=num_drivers)
+    best = np.full(num_drivers, np.nan)
+    np.fmin.at(best, drivers, times)
+
+    # Medians from one sort by (driver, time)
+    order = np.lexsort((times, drivers))
+    starts = np.concatenate(([0], np.cumsum(laps)[:-1]))
+    median = np.full(num_drivers, np.nan)
+    has_laps = laps > 0
+    sorted_times = times[order]
+    lower = starts + (laps - 1) // 2
+    upper = starts + laps // 2
+    median[has_laps] = (sorted_times[lower[has_laps]] + sorted_times[upper[has_laps]]) / 2
+
+    clean = times <= median[drivers] * CLEAN_LAP_FACTOR
+    clean_laps = np.bincount(drivers[clean], minlength=num_drivers)
+    total = np.bincount(drivers[clean], weights=times[clean], minlength=num_drivers)
+    total_sq = np.bincount(drivers[clean], weights=times[clean] ** 2, minlength=num_drivers)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(clean_laps > 0, total / clean_laps, np.nan)
+        variance = np.where(clean_laps > 1, (total_sq - clean_laps * mean ** 2) / (clean_laps - 1), np.nan)
+    std = np.sqrt(np.maximum(variance, 0), where=~np.isnan(variance), out=np.full(num_drivers, np.nan))
+
+    # Stints: lap count per stint, then per-driver count, mean and longest
+    stints = np.zeros(num_drivers, dtype=np.int64)
+    mean_stint_laps = np.full(num_drivers, np.nan)
+    longest_stint_laps = np.zeros(num_drivers, dtype=np.int64)
+    if len(lap_data):
+        ids = stint_ids(lap_data)
+        span_ids = int(ids.max()) + 1
+        # One code per (driver, stint) pair, so a stint number shared by two drivers counts for both
+        unique_pairs, pair_laps = np.unique(drivers * span_ids + ids, return_counts=True)
+        pair_drivers = unique_pairs // span_ids
+        stints = np.bincount(pair_drivers, minlength=num_drivers)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_stint_laps = np.where(stints > 0, np.bincount(pair_drivers, weights=pair_laps,
+                                                               minlength=num_drivers) / stints, np.nan)
+        np.maximum.at(longest_stint_laps, pair_drivers, pair_laps)
+
+    return DriverStats(list(lap_data.driver_names), laps, clean_laps, best, median, mean, std, stints,
+                       mean_stint_laps, longest_stint_laps)
+
+
+def driver_stats_from_files(filepaths, chunk_bytes=CHUNK_BYTES):
+    with span("lap parsing"):
+        lap_data = read_lap_files(filepaths, chunk_bytes)
+    with span("statistics"):
+        return compute_driver_stats(lap_data), lap_data
+
+
+def format_stats(stats):
+    rows = [STATS_COLUMNS] + [[str(value) for value in row] for row in stats.rows()]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(STATS_COLUMNS))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-driver pace, consistency and stint statistics from lap files.")
+    parser.add_argument("lap_files", nargs="+", help="CSV lap exports with Driver Name and Lap Time columns")
+    parser.add_argument("--roster", help="roster CSV; list its drivers in roster order")
+    args = parser.parse_args(argv)
+
+    try:
+        stats, lap_data = driver_stats_from_files(args.lap_files)
+        if args.roster:
+            from roster import read_roster
+            stats = stats.for_roster(read_roster(args.roster))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(format_stats(stats))
+    print(f"{len(lap_data)} laps")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
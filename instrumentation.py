@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+TIMINGS_LOG = os.environ.get("SIMCALC_TIMINGS_LOG") or os.path.join(os.path.expanduser("~"), ".simracingcalc",
+                                                                       "timings.jsonl")
+TIMINGS_LOG_MAX_BYTES = 1024 * 1024  # then the log moves to timings.jsonl.1, so at most two of these stay on disk
+
+_local = threading.local()
+_last_runs = {}  # run name -> RunTimings
+_last_runs_lock = threading.Lock()
+
+
+class RunTimings:
+    """Phase timings for one run of something (a sheet generation, a merge, ...)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = datetime.now(timezone.utc)
+        self.spans = {}  # span name -> [seconds, count], in the order spans first ran
+        self.total_seconds = None
+
+    def add(self, name, seconds):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def to_dict(self):
+        return {
+            "run": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_seconds": self.total_seconds,
+            "phase_seconds": self.phase_seconds,
+            "spans": [{"name": name, "seconds": seconds, "count": count}
+                      for name, (seconds, count) in self.spans.items()],
+        }
+
+    @property
+    def phase_seconds(self):
+        """Time spent inside spans, which leaves out waiting on dialogs."""
+        return sum(seconds for seconds, count in self.spans.values())
+
+    def lines(self):
+        """Human readable lines for the UI."""
+        lines = [f"{name}: {seconds * 1000:.0f} ms" for name, (seconds, count) in self.spans.items()]
+        lines.append(f"total: {self.phase_seconds * 1000:.0f} ms")
+        return lines
+
+
+@contextmanager
+def run(name, log_path=None):
+    """Collects the spans recorded on this thread into a RunTimings, saved as the last run and logged as JSON."""
+    timings = RunTimings(name)
+    previous = getattr(_local, "run", None)
+    _local.run = timings
+    began = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings.total_seconds = time.perf_counter() - began
+        _local.run = previous
+        with _last_runs_lock:
+            _last_runs[name] = timings
+        write_json_log(timings, log_path or TIMINGS_LOG)
+
+
+@contextmanager
+def span(name):
+    """Times a phase of the current run. Costs one attribute lookup when no run is active."""
+    timings = getattr(_local, "run", None)
+    if timings is None:
+        yield
+        return
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - began)
+
+
+def last_run(name):
+    """The most recent RunTimings for a run name, or None."""
+    with _last_runs_lock:
+        return _last_runs.get(name)
+
+
+def write_json_log(timings, log_path, max_bytes=TIMINGS_LOG_MAX_BYTES):
+    """Appends a run to the JSON lines timing log, first rotating it to log_path.1 once it reaches max_bytes.
+    Logging problems never break the run itself."""
+    try:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        if os.path.exists(log_path) and os.path.getsize(log_path) >= max_bytes:
+            os.replace(log_path, log_path + ".1")
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(timings.to_dict()) + "\n")
+    except OSError as e:
+        logger.warning("Could not write timing log %s: %s", log_path, e)
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pytz
+from availability_grid import SLEEP
+
+logger = logging.getLogger(__name__)
+
+STINT_CHANGE = "Stint change"
+WAKE_UP = "Wake up"
+COVERAGE_GAP = "Coverage gap"
+
+CHANGE_LEAD_MINUTES = 10  # warn the next driver this long before their stint
+WAKE_LEAD_MINUTES = 60  # and this long if they are asleep beforehand
+GAP_LEAD_MINUTES = 30
+MAX_SLEEP_SECONDS = 60  # re-read the wall clock at least this often, in case the computer was suspended
+
+
+def utc_now():
+    return datetime.now(pytz.utc)
+
+
+class RaceClock:
+    """Elapsed race time and sim time from the wall clock, given the green flag time."""
+
+    def __init__(self, green_flag, race_length, sim_start=None, now=utc_now):
+        self.green_flag = green_flag  # aware UTC datetime
+        self.race_length = race_length
+        self.sim_start = sim_start  # sim time of day at the green flag, HH:MM
+        self.now = now
+
+    @property
+    def finish(self):
+        return self.green_flag + self.race_length
+
+    def elapsed(self, now=None):
+        """Time since the green flag, negative before it."""
+        return (now or self.now()) - self.green_flag
+
+    def at(self, minutes):
+        """Wall clock time (UTC) a number of race minutes after the green flag."""
+        return self.green_flag + timedelta(minutes=float(minutes))
+
+    def block(self, time_block, now=None):
+        return int(self.elapsed(now).total_seconds() // 60 // time_block)
+
+    def sim_time(self, now=None):
+        if not self.sim_start:
+            return None
+        hours, minutes = map(int, self.sim_start.split(":"))
+        sim_minutes = (hours * 60 + minutes + self.elapsed(now).total_seconds() // 60) % (24 * 60)
+        return f"{int(sim_minutes // 60):02d}:{int(sim_minutes % 60):02d}"
+
+
+def format_race_time(delta):
+    """H:MM of a timedelta, with a minus sign before the green flag."""
+    minutes = int(delta.total_seconds() // 60)
+    sign = "-" if minutes < 0 else ""
+    hours, minutes = divmod(abs(minutes), 60)
+    return f"{sign}{hours}:{minutes:02d}"
+
+
+class Alert:
+    """Something the crew chief needs to know at a given wall clock time."""
+    __slots__ = ("when", "kind", "message", "stint_index")
+
+    def __init__(self, when, kind, message, stint_index=None):
+        self.when = when
+        self.kind = kind
+        self.message = message
+        self.stint_index = stint_index
+
+    def __repr__(self):
+        return f"Alert({self.when:%H:%M}, {self.kind}: {self.message})"
+
+
+def build_alerts(schedule, states, clock, time_block, change_lead=CHANGE_LEAD_MINUTES, wake_lead=WAKE_LEAD_MINUTES,
+                 gap_lead=GAP_LEAD_MINUTES):
+    """Alerts for every driver change, sleeping driver and unfilled stint of a RaceSchedule, sorted by time."""
+    states = np.asarray(states)
+    alerts = []
+    previous = None
+    for stint in schedule.stints:
+        start_minutes = stint.start_block * time_block
+        if stint.driver < 0:
+            end_minutes = stint.end_block * time_block
+            alerts.append(Alert(clock.at(start_minutes - gap_lead), COVERAGE_GAP,
+                                f"Nobody is planned for stint {stint.index + 1} "
+                                f"({format_race_time(timedelta(minutes=start_minutes))}-"
+                                f"{format_race_time(timedelta(minutes=end_minutes))})", stint.index))
+        elif previous is None or stint.driver != previous.driver:
+            handover = f" from {previous.driver_name}" if previous is not None and previous.driver_name else ""
+            alerts.append(Alert(clock.at(start_minutes - change_lead), STINT_CHANGE,
+                                f"{stint.driver_name} takes stint {stint.index + 1}{handover} in {change_lead} minutes",
+                                stint.index))
+            # Asleep at any point in the wake_lead minutes before their stint
+            wake_blocks = -(-wake_lead // time_block)
+            before = states[stint.driver, max(0, stint.start_block - wake_blocks):stint.start_block]
+            if (before == SLEEP).any():
+                alerts.append(Alert(clock.at(start_minutes - wake_lead), WAKE_UP,
+                                    f"Wake {stint.driver_name} up for stint {stint.index + 1} "
+                                    f"in {wake_lead} minutes", stint.index))
+        previous = stint
+    alerts.sort(key=lambda alert: alert.when)
+    return alerts
+
+
+class LiveRaceMonitor:
+    """Runs the race clock and alert timers on an asyncio loop in a background thread.
+
+    The loop sleeps until the next alert or the next race minute, whichever comes first, so nothing polls.
+    Clock ticks and alerts are collected into one batch per wake-up; notify is called (from the loop
+    thread) only when a new batch is waiting, and the UI takes it with drain().
+    """
+
+    def __init__(self, clock, alerts=(), notify=None, tick_minutes=1):
+        self.clock = clock
+        self.notify = notify
+        self.tick_minutes = tick_minutes
+        self._alerts = list(alerts)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._changed = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stopping.clear()
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._changed = asyncio.Event()
+            self._loop.call_soon(ready.set)
+            try:
+                self._loop.run_until_complete(self._run())
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="race-clock", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self, wait=True):
+        """Stops the clock; nothing is published or notified after this returns. From the UI thread pass
+        wait=False: the clock thread may be blocked in notify waiting on that thread, so joining could deadlock."""
+        self._stopping.set()
+        if not self.running:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._cancel)
+        except RuntimeError:
+            return  # the loop finished and closed in the meantime
+        if wait:
+            self._thread.join(timeout=5)
+
+    def _cancel(self):
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+
+    def set_alerts(self, alerts):
+        """Replaces the alerts, e.g. after a re-plan. Safe to call from any thread."""
+        alerts = list(alerts)
+        if not self.running:
+            self._alerts = alerts
+            return
+
+        def replace():
+            self._alerts = alerts
+            self._changed.set()
+        self._loop.call_soon_threadsafe(replace)
+
+    def drain(self):
+        """Takes every update since the last drain: ("tick", race elapsed, sim time) and ("alert", Alert) tuples."""
+        with self._lock:
+            updates, self._pending = self._pending, []
+        return updates
+
+    def _publish(self, updates):
+        if self._stopping.is_set():
+            return
+        with self._lock:
+            waiting = bool(self._pending)
+            self._pending.extend(updates)
+        if not waiting and self.notify is not None and not self._stopping.is_set():  # else a batch is waiting
+            try:
+                self.notify()
+            except Exception:
+                logger.exception("Race clock notify failed")
+
+    def _next_tick(self, now):
+        """Wall clock time of the next whole tick of race time."""
+        step = timedelta(minutes=self.tick_minutes)
+        ticks = self.clock.elapsed(now) // step + 1
+        return self.clock.green_flag + ticks * step
+
+    async def _run(self):
+        now = self.clock.now()
+        # Alerts that are already in the past when the clock starts aren't worth raising
+        next_alert = sum(1 for alert in self._alerts if alert.when < now)
+        alerts = self._alerts
+        self._publish([("tick", self.clock.elapsed(now), self.clock.sim_time(now))])
+        next_tick = self._next_tick(now)
+
+        while now < self.clock.finish + timedelta(minutes=self.tick_minutes) and not self._stopping.is_set():
+            if self._alerts is not alerts:  # replaced after a re-plan
+                alerts = self._alerts
+                next_alert = sum(1 for alert in alerts if alert.when < now)
+            wake = next_tick
+            if next_alert < len(alerts):
+                wake = min(wake, alerts[next_alert].when)
+            timeout = min(max((wake - now).total_seconds(), 0), MAX_SLEEP_SECONDS)
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            now = self.clock.now()
+            updates = []
+            while alerts is self._alerts and next_alert < len(alerts) and alerts[next_alert].when <= now:
+                updates.append(("alert", alerts[next_alert]))
+                next_alert += 1
+            if now >= next_tick:
+                updates.append(("tick", self.clock.elapsed(now), self.clock.sim_time(now)))
+                next_tick = self._next_tick(now)
+            if updates:
+                self._publish(updates)
@@ -1,8 +1,24 @@
+import logging
+import os
+import sys
+from startup import StartupTimer
+
+startup = StartupTimer()
+
 import tkinter as tk
 from tkinter import ttk
 from ttkthemes import ThemedTk
-from roster_window import open_team_roster
-import driver_avail
+
+startup.mark("launcher imports")
+
+# Feature modules pull in pandas/openpyxl/pytz, so they are only imported when their window opens
+FEATURE_MODULES = ["data_handling", "roster_window", "driver_avail", "schedule_window", "stats_window"]
+
+logging.basicConfig(level=os.environ.get("SIMCALC_LOG_LEVEL", "WARNING").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+show_startup_report = "--startup-report" in sys.argv or os.environ.get("SIMCALC_STARTUP_REPORT") == "1"
+warm_up_enabled = "--no-warm-up" not in sys.argv and os.environ.get("SIMCALC_WARM_UP", "1") != "0"
 
 class AppButton:
     def __init__(self, master, text, label_text, command=None):
@@ -55,10 +71,10 @@ for row in range(num_rows+2):
     root.rowconfigure(row, weight=1)
 
 button_data = [
-    {"text": "Team Roster", 'label': 'Opens the team roster window', 'command': lambda: open_team_roster(root)},
-    {"text": "Driver Availability", 'label': 'Opens the driver availability window', 'command': lambda: driver_avail.open_availability_window(root)},
-    {"text": "Driver Statistics", 'label': 'Opens the driver statistics window'},
-    {'text': 'Calculate Race Schedule', 'label': 'Calculate Race Schedule'},
+    {"text": "Team Roster", 'label': 'Opens the team roster window', 'command': lambda: startup.import_module('roster_window').open_team_roster(root)},
+    {"text": "Driver Availability", 'label': 'Opens the driver availability window', 'command': lambda: startup.import_module('driver_avail').open_availability_window(root)},
+    {"text": "Driver Statistics", 'label': 'Opens the driver statistics window', 'command': lambda: startup.import_module('stats_window').open_stats_window(root)},
+    {'text': 'Calculate Race Schedule', 'label': 'Calculate Race Schedule', 'command': lambda: startup.import_module('schedule_window').open_schedule_window(root)},
 ]
 
 buttons = []
@@ -70,5 +86,21 @@ for data in button_data:
     buttons.append(button)
     row_num += 1
 
+startup.mark("main window built")
+
+def on_first_paint(event=None):
+    if startup.first_paint is not None:
+        return
+    startup.mark_first_paint()
+    if show_startup_report:
+        print(startup.report(), file=sys.stderr)
+    if warm_up_enabled:
+        startup.warm_up(FEATURE_MODULES)
+
+# <Map> fires when the window is shown; the idle callback runs once Tk has drawn it
+root.bind("<Map>", lambda event: root.after_idle(on_first_paint), add="+")
+
 if __name__ == '__main__':
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    if show_startup_report:
+        print(startup.report(), file=sys.stderr)
\ No newline at end of file
@@ -0,0 +1,340 @@
+import numpy as np
+from availability_grid import AVAILABILITY_OPTIONS, SLEEP, BLOCKED
+
+# Cost of a driver covering one block in each availability state (Available, Monitor, Tentative, Sleep, Blocked).
+# Sleep and Blocked can never be driven.
+STATE_COSTS = np.array([0.0, 1.0, 3.0, np.inf, np.inf])
+UNFILLED_COST = 1e6  # per stint, so leaving a stint empty is always the last resort
+IRATING_TIE_BREAK = 0.01  # prefer the quicker driver when costs are otherwise equal
+MAX_CONSECUTIVE = 3  # triple stint
+
+
+class Stint:
+    """One stint of the plan. driver is an index into the roster, or -1 if nobody could take it."""
+    __slots__ = ("index", "start_block", "end_block", "driver", "driver_name", "cost")
+
+    def __init__(self, index, start_block, end_block, driver, driver_name, cost):
+        self.index = index
+        self.start_block = start_block
+        self.end_block = end_block  # exclusive
+        self.driver = driver
+        self.driver_name = driver_name
+        self.cost = cost
+
+    def __repr__(self):
+        return f"Stint({self.index}, blocks {self.start_block}-{self.end_block}, {self.driver_name or 'UNFILLED'})"
+
+
+class ScheduleIssue:
+    """Why a stint couldn't be filled."""
+    __slots__ = ("stint_index", "start_block", "end_block", "reasons")
+
+    def __init__(self, stint_index, start_block, end_block, reasons):
+        self.stint_index = stint_index
+        self.start_block = start_block
+        self.end_block = end_block
+        self.reasons = reasons
+
+    def __repr__(self):
+        return f"ScheduleIssue(stint {self.stint_index}: {'; '.join(self.reasons)})"
+
+
+class RaceSchedule:
+    def __init__(self, stints, issues, total_cost):
+        self.stints = stints
+        self.issues = issues
+        self.total_cost = total_cost
+
+    @property
+    def complete(self):
+        return not self.issues
+
+    def driver_for_block(self, block):
+        for stint in self.stints:
+            if stint.start_block <= block < stint.end_block:
+                return stint.driver
+        return -1
+
+
+def stint_starts(num_blocks, stint_blocks):
+    """First block of every stint when the race is cut into stints of stint_blocks blocks."""
+    if stint_blocks <= 0:
+        raise ValueError("Stint length must be at least one time block.")
+    return np.arange(0, num_blocks, stint_blocks)
+
+
+def block_costs(states):
+    """[driver, block] cost of each driver covering each block."""
+    return STATE_COSTS[np.asarray(states, dtype=np.intp)]
+
+
+def stint_costs(roster, states, starts):
+    """[stint, driver] cost of each driver taking each whole stint, including start/finish rules.
+
+    The last stint runs to the end of states. Only the blocks from starts[0] on are costed, and the Start
+    rule only applies when the first stint is the start of the race.
+    """
+    states = np.asarray(states)
+    first = int(starts[0]) if len(starts) else 0
+    costs = np.add.reduceat(block_costs(states[:, first:]), np.asarray(starts) - first, axis=1).T
+
+    iratings = np.array([driver.irating for driver in roster.drivers], dtype=float)
+    if len(iratings) and iratings.max() > 0:
+        costs = costs + IRATING_TIE_BREAK * (1 - iratings / iratings.max())
+
+    # Start/Finish flags only restrict anything if someone on the roster has them ticked
+    starters = np.array([driver.start for driver in roster.drivers], dtype=bool)
+    finishers = np.array([driver.finish for driver in roster.drivers], dtype=bool)
+    if starters.any() and first == 0:
+        costs[0, ~starters] = np.inf
+    if finishers.any():
+        costs[-1, ~finishers] = np.inf
+    return costs
+
+
+def solve_stints(costs, max_consecutive, initial=None):
+    """Dynamic program over stints. State is (driver, how many stints in a row they have driven).
+
+    costs is [stint, driver], max_consecutive is the per-driver stint limit. initial optionally fixes the state
+    before the first stint as (driver, run_length), driver -1 meaning nobody. Returns the driver per stint
+    (-1 for unfilled) and the total cost. Runs in O(stints * drivers).
+    """
+    num_stints, num_drivers = costs.shape
+    K = MAX_CONSECUTIVE
+    allowed = np.arange(K)[None, :] < np.asarray(max_consecutive)[:, None]  # [driver, run length - 1]
+    drivers = np.arange(num_drivers)
+
+    value = np.full((num_stints, num_drivers, K), np.inf)
+    unfilled = np.zeros(num_stints)
+    prev_driver = np.full((num_stints, num_drivers), -1)  # who drove before a driver's run started (-1 = unfilled)
+    prev_run = np.zeros((num_stints, num_drivers), dtype=np.intp)
+    prev_of_unfilled = np.full(num_stints, -1)  # flattened (driver * K + run) before an unfilled stint, or -1
+
+    if initial is None:
+        previous = np.full((num_drivers, K), np.inf)
+        previous_unfilled = 0.0
+    else:
+        previous = np.full((num_drivers, K), np.inf)
+        previous_unfilled = np.inf
+        initial_driver, initial_run = initial
+        if initial_driver < 0:
+            previous_unfilled = 0.0
+        else:
+            previous[initial_driver, min(initial_run, K) - 1] = 0.0
+
+    for s in range(num_stints):
+        best_per_driver = previous.min(axis=1)
+        best_run = previous.argmin(axis=1)
+
+        # Cheapest previous state belonging to some *other* driver, via the best and second best drivers
+        if num_drivers:
+            first = int(best_per_driver.argmin())
+            others = best_per_driver.copy()
+            others[first] = np.inf
+            second = int(others.argmin()) if num_drivers > 1 else first
+            other_best = np.where(drivers == first, others[second], best_per_driver[first])
+            other_driver = np.where(drivers == first, second, first)
+        else:
+            other_best = np.zeros(0)
+            other_driver = np.zeros(0, dtype=np.intp)
+
+        if s == 0 and initial is None:
+            value[s, :, 0] = costs[s]
+        else:
+            from_unfilled = previous_unfilled <= other_best
+            value[s, :, 0] = costs[s] + np.minimum(other_best, previous_unfilled)
+            prev_driver[s] = np.where(from_unfilled, -1, other_driver)
+            prev_run[s] = np.where(from_unfilled, 0, best_run[other_driver])
+        value[s, :, 1:] = costs[s][:, None] + previous[:, :-1]
+        value[s][~allowed] = np.inf
+
+        best_previous = previous.min() if num_drivers else np.inf
+        if previous_unfilled <= best_previous:
+            unfilled[s] = previous_unfilled + UNFILLED_COST
+        else:
+            unfilled[s] = best_previous + UNFILLED_COST
+            prev_of_unfilled[s] = int(previous.argmin())
+
+        previous = value[s]
+        previous_unfilled = unfilled[s]
+
+    # Walk the back pointers from the cheapest final state
+    plan = np.full(num_stints, -1)
+    if num_stints == 0:
+        return plan, 0.0
+    if num_drivers and previous.min() < previous_unfilled:
+        total = float(previous.min())
+        driver, run = divmod(int(previous.argmin()), K)
+    else:
+        total = float(previous_unfilled)
+        driver, run = -1, 0
+    for s in range(num_stints - 1, -1, -1):
+        plan[s] = driver
+        if driver < 0:
+            flat = prev_of_unfilled[s]
+            driver, run = (-1, 0) if flat < 0 else divmod(int(flat), K)
+        elif run > 0:
+            run -= 1
+        else:
+            driver, run = int(prev_driver[s, driver]), int(prev_run[s, driver])
+    return plan, total
+
+
+def explain_unfilled(roster, states, costs, stint_index, start_block, end_block):
+    """Lists the constraints that left a stint without a driver."""
+    reasons = []
+    stint_states = np.asarray(states)[:, start_block:end_block]
+    drivable = np.isfinite(STATE_COSTS[stint_states])
+    for offset in np.flatnonzero(~drivable.any(axis=0)):
+        column = stint_states[:, offset]
+        counts = ", ".join(f"{int((column == code).sum())} {AVAILABILITY_OPTIONS[code]}"
+                           for code in (SLEEP, BLOCKED) if (column == code).any())
+        reasons.append(f"Block {start_block + offset}: no driver can drive ({counts})")
+
+    whole_stint = drivable.all(axis=1)
+    if drivable.any(axis=0).all() and not whole_stint.any():
+        reasons.append("Drivers are free at every block, but nobody is free for the whole stint")
+
+    if whole_stint.any() and not np.isfinite(costs[stint_index]).any():
+        if stint_index == 0:
+            reasons.append("Only drivers marked Start can take the first stint, and none of them is free")
+        else:
+            reasons.append("Only drivers marked Finish can take the last stint, and none of them is free")
+    elif np.isfinite(costs[stint_index]).any():
+        names = [roster.drivers[d].name for d in np.flatnonzero(np.isfinite(costs[stint_index]))]
+        reasons.append(f"Free drivers ({', '.join(names)}) would exceed their Back to Back/Triple Stint limit")
+    return reasons
+
+
+def plan_race_schedule(roster, states, stint_blocks):
+    """Assigns one driver to every stint of the race.
+
+    states is a [driver, block] array of availability codes in roster order, stint_blocks the stint
+    length in time blocks. Stints nobody can take are left unfilled and explained in the issues.
+    """
+    return RaceScheduler(roster, states, stint_blocks).schedule
+
+
+class RaceScheduler:
+    """A race schedule that can be re-planned live as things change.
+
+    Keeps the availability states, the stint costs and the plan, and on every change re-solves only the
+    stints that haven't started yet, continuing from whoever is in the car. Stints that started before
+    now_block stay as they are.
+    """
+
+    def __init__(self, roster, states, stint_blocks):
+        states = np.array(states, dtype=np.uint8)  # a copy, since changes are written into it
+        if states.shape[0] != len(roster.drivers):
+            raise ValueError("Availability must have one row per roster driver.")
+        if stint_blocks <= 0:
+            raise ValueError("Stint length must be at least one time block.")
+        self.roster = roster
+        self.states = states
+        self.stint_blocks = stint_blocks
+        self.max_consecutive = [driver.max_consecutive_stints for driver in roster.drivers]
+        self.now_block = 0
+        self.stints = []
+        self.issues = []
+        self.costs = np.zeros((0, len(roster.drivers)))
+        self.schedule = self._replan(0, 0)
+
+    @property
+    def num_blocks(self):
+        return self.states.shape[1]
+
+    def current_stint(self):
+        """Index of the stint in the car at now_block, or None before the start and after the flag."""
+        for stint in self.stints:
+            if stint.start_block <= self.now_block < stint.end_block:
+                return stint.index
+        return None
+
+    def _first_open_stint(self):
+        """The first stint that hasn't started yet, so may still be changed."""
+        for stint in self.stints:
+            if stint.start_block >= self.now_block:
+                return stint.index
+        return len(self.stints)
+
+    def set_now(self, block):
+        """Moves the race clock to block. Stints started before it are fixed from now on."""
+        self.now_block = max(0, min(int(block), self.num_blocks))
+        return self.schedule
+
+    def set_state(self, driver, start_block, state, end_block=None):
+        """Changes a driver's availability from start_block up to end_block (default just that block) and
+        re-plans. If the driver in the car can no longer drive the rest of their stint, it ends now."""
+        end_block = start_block + 1 if end_block is None else end_block
+        start_block = max(0, start_block)
+        end_block = min(end_block, self.num_blocks)
+        if start_block >= end_block:
+            return self.schedule
+        self.states[driver, start_block:end_block] = state
+
+        current = self.current_stint()
+        if current is not None:
+            stint = self.stints[current]
+            in_car = stint.start_block < self.now_block  # a stint starting right now can still be given away
+            if in_car and not np.isfinite(block_costs(self.states[stint.driver, self.now_block:stint.end_block])).all():
+                self._end_stint(current, self.now_block)
+                return self._replan(current + 1, self.now_block)
+        open_stint = self._first_open_stint()
+        if open_stint == len(self.stints):
+            return self.schedule
+        return self._replan(open_stint, self.stints[open_stint].start_block)
+
+    def overrun(self, extra_blocks, stint_index=None):
+        """The stint (default the one in the car) runs extra_blocks longer, or shorter if negative. Later stints
+        are cut again from its new end and re-planned."""
+        stint_index = self.current_stint() if stint_index is None else stint_index
+        if stint_index is None:
+            raise ValueError("No stint is being driven at the current race time.")
+        stint = self.stints[stint_index]
+        end_block = min(max(stint.end_block + extra_blocks, stint.start_block + 1), self.num_blocks)
+        if end_block == stint.end_block:
+            return self.schedule
+        self._end_stint(stint_index, end_block)
+        return self._replan(stint_index + 1, end_block)
+
+    def _end_stint(self, stint_index, end_block):
+        # A new Stint rather than changing the old one, which earlier schedules still hold
+        stint = self.stints[stint_index]
+        self.stints[stint_index] = Stint(stint.index, stint.start_block, end_block, stint.driver, stint.driver_name,
+                                         stint.cost)
+
+    def _replan(self, first_stint, first_block):
+        """Keeps stints before first_stint and plans the race again from first_block."""
+        fixed = self.stints[:first_stint]
+        starts = first_block + stint_starts(self.num_blocks - first_block, self.stint_blocks) \
+            if first_block < self.num_blocks else np.zeros(0, dtype=np.intp)
+        ends = np.append(starts[1:], self.num_blocks)
+        costs = stint_costs(self.roster, self.states, starts) if len(starts) \
+            else np.zeros((0, len(self.roster.drivers)))
+
+        initial = None
+        if fixed:
+            driver, run = fixed[-1].driver, 0
+            for stint in reversed(fixed):
+                if stint.driver != driver:
+                    break
+                run += 1
+            initial = (driver, run if driver >= 0 else 0)
+        plan, total = solve_stints(costs, self.max_consecutive, initial)
+
+        self.costs = np.vstack([self.costs[:first_stint], costs])
+        self.issues = [issue for issue in self.issues if issue.stint_index < first_stint]
+        self.stints = list(fixed)
+        for offset, (start_block, end_block, driver) in enumerate(zip(starts, ends, plan)):
+            index, driver = first_stint + offset, int(driver)
+            if driver >= 0:
+                self.stints.append(Stint(index, int(start_block), int(end_block), driver,
+                                         self.roster.drivers[driver].name, float(costs[offset, driver])))
+            else:
+                self.stints.append(Stint(index, int(start_block), int(end_block), -1, None, UNFILLED_COST))
+                self.issues.append(ScheduleIssue(index, int(start_block), int(end_block),
+                                                 explain_unfilled(self.roster, self.states, self.costs, index,
+                                                                  start_block, end_block)))
+        total += sum(stint.cost for stint in fixed)
+        self.schedule = RaceSchedule(list(self.stints), list(self.issues), total)
+        return self.schedule
@@ -0,0 +1,252 @@
+import csv
+import os
+from collections import OrderedDict
+from datetime import timedelta
+import pytz
+from instrumentation import span
+from timezones import resolve_timezone
+
+EVENT_COLUMNS = ("Event Name", "Team Name", "Track", "Car", "Race Length")
+DRIVER_COLUMNS = ("iRating", "Driver Name", "Back to Back Stints", "Triple Stint", "Timezone", "Start", "Finish")
+
+ROSTER_CACHE_SIZE = 16
+
+TRUE_VALUES = {"true", "1", "yes", "y", "x"}
+FALSE_VALUES = {"false", "0", "no", "n", ""}
+
+_roster_cache = OrderedDict()  # absolute path -> [(mtime_ns, size), (line, row) pairs, Roster or None]
+
+
+class RosterError(ValueError):
+    """Raised when a roster file can't be turned into drivers."""
+
+
+def parse_flag(value):
+    """Turns a CSV/Treeview checkbox value ("True", "1", True, ...) into a bool."""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Expected True or False, got {value!r}")
+
+
+def _format_flag(value):
+    return "True" if value else "False"
+
+
+class Driver:
+    """One roster entry with typed fields."""
+    __slots__ = ("irating", "name", "back_to_back", "triple_stint", "timezone", "tz", "start", "finish")
+
+    def __init__(self, irating, name, back_to_back=False, triple_stint=False, timezone="UTC", start=False, finish=False):
+        tz = resolve_timezone(timezone)
+        object.__setattr__(self, "irating", int(irating))
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "back_to_back", bool(back_to_back))
+        object.__setattr__(self, "triple_stint", bool(triple_stint))
+        object.__setattr__(self, "timezone", tz.zone)  # always the IANA name, even if an abbreviation was given
+        object.__setattr__(self, "tz", tz)
+        object.__setattr__(self, "start", bool(start))
+        object.__setattr__(self, "finish", bool(finish))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Driver is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Driver):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __hash__(self):
+        return hash(tuple(self.to_row()))
+
+    def __repr__(self):
+        return f"Driver({self.name!r}, iRating={self.irating}, timezone={self.timezone!r})"
+
+    @property
+    def max_consecutive_stints(self):
+        """How many stints in a row this driver has agreed to."""
+        if self.triple_stint:
+            return 3
+        if self.back_to_back:
+            return 2
+        return 1
+
+    def to_row(self):
+        """The driver as a row of strings in DRIVER_COLUMNS order, as saved to CSV."""
+        return [str(self.irating), self.name, _format_flag(self.back_to_back), _format_flag(self.triple_stint),
+                self.timezone, _format_flag(self.start), _format_flag(self.finish)]
+
+
+class Roster:
+    """Parsed contents of a roster CSV. Immutable so one parse can be shared safely."""
+    __slots__ = ("event_header", "event_values", "drivers")
+
+    def __init__(self, event_header, event_values, drivers):
+        object.__setattr__(self, "event_header", tuple(event_header))
+        object.__setattr__(self, "event_values", tuple(event_values))
+        object.__setattr__(self, "drivers", tuple(drivers))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Roster is immutable")
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def __iter__(self):
+        return iter(self.drivers)
+
+    def __repr__(self):
+        return f"Roster({self.event.get('Event Name', '')!r}, {len(self.drivers)} drivers)"
+
+    @property
+    def event(self):
+        """Event data as a dict, missing values filled with empty strings."""
+        event_data = {}
+        for i, name in enumerate(self.event_header):
+            event_data[name] = self.event_values[i] if i < len(self.event_values) else ""
+        return event_data
+
+    @property
+    def race_length(self):
+        return self.event.get("Race Length")
+
+    @property
+    def driver_names(self):
+        return [driver.name for driver in self.drivers]
+
+    @property
+    def driver_timezones(self):
+        return [driver.timezone for driver in self.drivers]
+
+    def to_rows(self):
+        return [driver.to_row() for driver in self.drivers]
+
+    def to_dataframe(self):
+        """Opt-in pandas view of the drivers, with typed columns."""
+        import pandas as pd
+        return pd.DataFrame({
+            "iRating": [driver.irating for driver in self.drivers],
+            "Driver Name": [driver.name for driver in self.drivers],
+            "Back to Back Stints": [driver.back_to_back for driver in self.drivers],
+            "Triple Stint": [driver.triple_stint for driver in self.drivers],
+            "Timezone": [driver.timezone for driver in self.drivers],
+            "Start": [driver.start for driver in self.drivers],
+            "Finish": [driver.finish for driver in self.drivers],
+        }, columns=list(DRIVER_COLUMNS))
+
+
+def driver_from_row(row, driver_header=DRIVER_COLUMNS):
+    """Builds a Driver from one row of strings laid out as driver_header."""
+    values = dict(zip(driver_header, row))
+    name = values.get("Driver Name", "").strip()
+    try:
+        irating = int(str(values.get("iRating", "")).strip())
+    except ValueError:
+        raise RosterError(f"iRating must be a number for driver {name}")
+    try:
+        return Driver(irating, name,
+                      back_to_back=parse_flag(values.get("Back to Back Stints", False)),
+                      triple_stint=parse_flag(values.get("Triple Stint", False)),
+                      timezone=str(values.get("Timezone", "UTC")),
+                      start=parse_flag(values.get("Start", False)),
+                      finish=parse_flag(values.get("Finish", False)))
+    except pytz.UnknownTimeZoneError as e:
+        raise RosterError(f"Unknown timezone: {e} for driver {name}")
+    except ValueError as e:
+        raise RosterError(f"{e} for driver {name}")
+
+
+def is_blank_row(row):
+    """Blank rows (the spacer before the drivers, stray empty lines) are skipped wherever a roster is read."""
+    return not any(str(cell).strip() for cell in row)
+
+
+def parse_roster_rows(rows):
+    """Builds a Roster from the rows of a roster CSV (blank rows are skipped)."""
+    return roster_from_numbered_rows([(line, row) for line, row in enumerate(rows, start=1) if not is_blank_row(row)])
+
+
+def roster_from_numbered_rows(numbered_rows):
+    """Builds a Roster from (file line, row) pairs with the blank rows already dropped."""
+    rows = [tuple(row) for line, row in numbered_rows]
+    event_header = rows[0] if len(rows) > 0 else ()
+    event_values = rows[1] if len(rows) > 1 else ()
+    driver_header = rows[2] if len(rows) > 2 else DRIVER_COLUMNS
+    drivers = []
+    for line, row in numbered_rows[3:]:
+        try:
+            drivers.append(driver_from_row(row, driver_header))
+        except RosterError as e:
+            raise RosterError(f"Row {line}: {e}")
+    return Roster(event_header, event_values, drivers)
+
+
+def _cached_roster_file(filepath):
+    """The cache entry [stamp, numbered rows, Roster or None] for a roster CSV, reading the file if it changed."""
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _roster_cache.get(filepath)
+    if cached is not None and cached[0] == stamp:
+        _roster_cache.move_to_end(filepath)
+        return cached
+
+    with span("roster read"), open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        numbered_rows = tuple((reader.line_num, tuple(row)) for row in reader if not is_blank_row(row))
+
+    cached = [stamp, numbered_rows, None]
+    _roster_cache[filepath] = cached
+    _roster_cache.move_to_end(filepath)
+    while len(_roster_cache) > ROSTER_CACHE_SIZE:
+        _roster_cache.popitem(last=False)  # drop the least recently used roster
+    return cached
+
+
+def read_roster_rows(filepath):
+    """The non-blank rows of a roster CSV as (file line, row) pairs, from the same cache as read_roster."""
+    return _cached_roster_file(filepath)[1]
+
+
+def read_roster(filepath):
+    """Parses a roster CSV once and returns the shared Roster.
+
+    Results are memoized by path and the file's mtime/size, so the roster window, the availability
+    dialog and sheet generation all reuse one parse until the file changes on disk. Validation reads
+    the same cached rows, so checking a file before loading it doesn't read it twice.
+    """
+    cached = _cached_roster_file(filepath)
+    if cached[2] is None:
+        cached[2] = roster_from_numbered_rows(cached[1])
+    return cached[2]
+
+
+def write_roster(roster, filepath):
+    """Writes a Roster out in the roster CSV layout read_roster expects."""
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(roster.event_header or EVENT_COLUMNS)
+        writer.writerow(roster.event_values)
+        writer.writerow([])  # Blank row for spacing
+        writer.writerow(DRIVER_COLUMNS)
+        writer.writerows(roster.to_rows())
+    return filepath
+
+
+def clear_roster_cache():
+    _roster_cache.clear()
+
+
+def parse_race_length(race_length_str):
+    """Parses a Race Length of HH:MM or D:HH:MM into a timedelta."""
+    race_length_parts = list(map(int, race_length_str.split(':')))
+    if len(race_length_parts) == 2:
+        return timedelta(hours=race_length_parts[0], minutes=race_length_parts[1])
+    elif len(race_length_parts) == 3:
+        return timedelta(days=race_length_parts[0], hours=race_length_parts[1], minutes=race_length_parts[2])
+    raise ValueError("Invalid race length format. Use HH:MM or D:HH:MM")
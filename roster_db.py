@@ -0,0 +1,189 @@
+import os
+import sqlite3
+from roster import Driver, Roster, RosterError, EVENT_COLUMNS, read_roster, write_roster
+
+ROSTER_DB = os.environ.get("SIMCALC_ROSTER_DB") or os.path.join(os.path.expanduser("~"), ".simracingcalc", "rosters.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drivers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    irating INTEGER NOT NULL,
+    back_to_back INTEGER NOT NULL,
+    triple_stint INTEGER NOT NULL,
+    timezone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drivers_timezone ON drivers (timezone);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    team TEXT NOT NULL DEFAULT '',
+    track TEXT NOT NULL DEFAULT '',
+    car TEXT NOT NULL DEFAULT '',
+    race_length TEXT NOT NULL DEFAULT ''
+);
+
+-- An event roster is a list of references to drivers; who starts and finishes is per event
+CREATE TABLE IF NOT EXISTS event_drivers (
+    event_id INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+    driver_id INTEGER NOT NULL REFERENCES drivers (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    start INTEGER NOT NULL DEFAULT 0,
+    finish INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, driver_id)
+);
+CREATE INDEX IF NOT EXISTS event_drivers_driver ON event_drivers (driver_id);
+"""
+
+EVENT_FIELDS = ("name", "team", "track", "car", "race_length")  # EVENT_COLUMNS order
+
+
+class RosterStore:
+    """SQLite store holding every driver once and event rosters as references to them.
+
+    Single drivers can be upserted or removed without touching the rest, and drivers are indexed by
+    name and timezone. Rosters go in and out as Roster objects or roster CSVs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or ROSTER_DB
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Drivers
+
+    def upsert_driver(self, driver):
+        """Inserts or updates one driver by name and returns its id."""
+        with self.connection:
+            return self._upsert_driver(driver)
+
+    def _upsert_driver(self, driver):
+        return self.connection.execute(
+            "INSERT INTO drivers (name, irating, back_to_back, triple_stint, timezone) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET irating = excluded.irating, back_to_back = excluded.back_to_back, "
+            "triple_stint = excluded.triple_stint, timezone = excluded.timezone RETURNING id",
+            (driver.name, driver.irating, driver.back_to_back, driver.triple_stint, driver.timezone)).fetchone()[0]
+
+    def delete_driver(self, name):
+        """Removes a driver, and with it from every event roster. Returns True if there was one."""
+        with self.connection:
+            return self.connection.execute("DELETE FROM drivers WHERE name = ?", (name,)).rowcount > 0
+
+    def get_driver(self, name):
+        row = self.connection.execute(
+            "SELECT irating, name, back_to_back, triple_stint, timezone FROM drivers WHERE name = ?",
+            (name,)).fetchone()
+        return _driver(row) if row else None
+
+    def drivers(self, timezone=None):
+        """Every driver by name, or only those in one IANA timezone."""
+        query = "SELECT irating, name, back_to_back, triple_stint, timezone FROM drivers"
+        if timezone is None:
+            rows = self.connection.execute(query + " ORDER BY name")
+        else:
+            rows = self.connection.execute(query + " WHERE timezone = ? ORDER BY name", (timezone,))
+        return [_driver(row) for row in rows]
+
+    # Events
+
+    def event_names(self):
+        return [row[0] for row in self.connection.execute("SELECT name FROM events ORDER BY name")]
+
+    def upsert_event(self, event_values):
+        """Inserts or updates an event from its values in EVENT_COLUMNS order and returns its id."""
+        with self.connection:
+            return self._upsert_event(event_values)
+
+    def _upsert_event(self, event_values):
+        values = [str(value).strip() for value in event_values][:len(EVENT_FIELDS)]
+        values += [""] * (len(EVENT_FIELDS) - len(values))
+        if not values[0]:
+            raise RosterError("An event needs an Event Name to be stored.")
+        return self.connection.execute(
+            "INSERT INTO events (name, team, track, car, race_length) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET team = excluded.team, track = excluded.track, car = excluded.car, "
+            "race_length = excluded.race_length RETURNING id", values).fetchone()[0]
+
+    def _event_id(self, event_name):
+        row = self.connection.execute("SELECT id FROM events WHERE name = ?", (event_name,)).fetchone()
+        if row is None:
+            raise KeyError(event_name)
+        return row[0]
+
+    def delete_event(self, event_name):
+        with self.connection:
+            return self.connection.execute("DELETE FROM events WHERE name = ?", (event_name,)).rowcount > 0
+
+    def put_event_driver(self, event_name, driver):
+        """Upserts one driver and their place on an event roster; new drivers go on the end."""
+        with self.connection:
+            event_id = self._event_id(event_name)
+            driver_id = self._upsert_driver(driver)
+            self.connection.execute(
+                "INSERT INTO event_drivers (event_id, driver_id, position, start, finish) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM event_drivers WHERE event_id = ?), ?, ?) "
+                "ON CONFLICT (event_id, driver_id) DO UPDATE SET start = excluded.start, finish = excluded.finish",
+                (event_id, driver_id, event_id, driver.start, driver.finish))
+
+    def remove_event_driver(self, event_name, driver_name):
+        """Takes a driver off an event roster, keeping them in the store."""
+        with self.connection:
+            return self.connection.execute(
+                "DELETE FROM event_drivers WHERE event_id = ? AND driver_id = (SELECT id FROM drivers WHERE name = ?)",
+                (self._event_id(event_name), driver_name)).rowcount > 0
+
+    def save_roster(self, roster):
+        """Stores a whole Roster as its event, replacing that event's driver list."""
+        with self.connection:
+            event_id = self._upsert_event(roster.event_values)
+            self.connection.execute("DELETE FROM event_drivers WHERE event_id = ?", (event_id,))
+            for position, driver in enumerate(roster.drivers):
+                driver_id = self._upsert_driver(driver)
+                self.connection.execute(
+                    "INSERT INTO event_drivers (event_id, driver_id, position, start, finish) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (event_id, driver_id) DO UPDATE SET start = excluded.start, finish = excluded.finish",
+                    (event_id, driver_id, position, driver.start, driver.finish))
+            return event_id
+
+    def load_roster(self, event_name):
+        """The Roster for a stored event. Raises KeyError for an unknown event."""
+        row = self.connection.execute("SELECT id, name, team, track, car, race_length FROM events WHERE name = ?",
+                                      (event_name,)).fetchone()
+        if row is None:
+            raise KeyError(event_name)
+        rows = self.connection.execute(
+            "SELECT d.irating, d.name, d.back_to_back, d.triple_stint, d.timezone, e.start, e.finish "
+            "FROM event_drivers e JOIN drivers d ON d.id = e.driver_id WHERE e.event_id = ? ORDER BY e.position",
+            (row[0],))
+        drivers = [Driver(irating, name, back_to_back, triple_stint, timezone, start, finish)
+                   for irating, name, back_to_back, triple_stint, timezone, start, finish in rows]
+        return Roster(EVENT_COLUMNS, row[1:], drivers)
+
+    # CSV compatibility
+
+    def import_csv(self, filepath):
+        """Stores a roster CSV and returns its event name."""
+        roster = read_roster(filepath)
+        self.save_roster(roster)
+        return roster.event.get("Event Name", "").strip()
+
+    def export_csv(self, event_name, filepath):
+        return write_roster(self.load_roster(event_name), filepath)
+
+
+def _driver(row):
+    irating, name, back_to_back, triple_stint, timezone = row
+    return Driver(irating, name, back_to_back, triple_stint, timezone)
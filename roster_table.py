@@ -0,0 +1,136 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class RosterTable:
+    """Driver table that keeps every row in Python and only shows a page of them in a Treeview.
+
+    The Treeview holds a fixed pool of `height` items whose values are swapped as the table scrolls, so
+    loading thousands of drivers is a list assignment and scrolling costs one page of updates. Rows are
+    addressed by ids that stay valid until the row is deleted.
+    """
+
+    def __init__(self, master, columns, height=10):
+        self.frame = ttk.Frame(master)
+        self.columns = list(columns)
+        self.height = height
+        self.tree = ttk.Treeview(self.frame, columns=self.columns, show="headings", height=height)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+
+        self._ids = []  # row ids in display order
+        self._values = {}  # row id -> tuple of values
+        self._next_id = 0
+        self._offset = 0  # index of the first visible row
+
+        # The pooled items, named by their position on the page
+        for slot in range(height):
+            self.tree.insert("", tk.END, iid=str(slot), values=())
+        self._attached = height
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+        self.refresh()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def __len__(self):
+        return len(self._ids)
+
+    # Rows
+
+    def insert(self, values):
+        """Adds a row at the end and returns its id."""
+        row_id = self._next_id
+        self._next_id += 1
+        self._ids.append(row_id)
+        self._values[row_id] = tuple(values)
+        self._offset = max(0, len(self._ids) - self.height)  # keep the new row in view
+        self.refresh()
+        return row_id
+
+    def load(self, rows):
+        """Replaces every row in one go. Returns the new row ids."""
+        rows = [tuple(values) for values in rows]
+        row_ids = list(range(self._next_id, self._next_id + len(rows)))
+        self._next_id += len(rows)
+        self._ids = row_ids
+        self._values = dict(zip(row_ids, rows))
+        self._offset = 0
+        self.refresh()
+        return list(row_ids)
+
+    def clear(self):
+        self.load([])
+
+    def delete(self, row_id):
+        self._ids.remove(row_id)
+        del self._values[row_id]
+        self._offset = max(0, min(self._offset, len(self._ids) - self.height))
+        self.refresh()
+
+    def values(self, row_id):
+        return self._values[row_id]
+
+    def row_ids(self):
+        return list(self._ids)
+
+    def rows(self):
+        """Every row's values in display order."""
+        return [self._values[row_id] for row_id in self._ids]
+
+    def index(self, row_id):
+        return self._ids.index(row_id)
+
+    def row_at(self, y):
+        """The id of the row shown at window y coordinate y, or None."""
+        slot = self.tree.identify_row(y)
+        if not slot:
+            return None
+        index = self._offset + int(slot)
+        return self._ids[index] if index < len(self._ids) else None
+
+    # Paging
+
+    def refresh(self):
+        """Copies the visible page of rows into the pooled Treeview items."""
+        visible = max(0, min(self.height, len(self._ids) - self._offset))
+        for slot in range(visible):
+            self.tree.item(str(slot), values=self._values[self._ids[self._offset + slot]])
+        # Hide unused items so a short roster doesn't show blank rows
+        if visible < self._attached:
+            self.tree.detach(*[str(slot) for slot in range(visible, self._attached)])
+        for slot in range(self._attached, visible):
+            self.tree.move(str(slot), "", slot)
+        self._attached = visible
+
+        total = len(self._ids)
+        if total:
+            self.scrollbar.set(self._offset / total, (self._offset + visible) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self._ids) - self.height))
+        if offset != self._offset:
+            self._offset = offset
+            self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", count, "units"/"pages")."""
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self._ids))
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self.scroll_to(self._offset + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self._offset - 3)
+        else:
+            self.scroll_to(self._offset + 3)
+        return "break"
@@ -0,0 +1,187 @@
+import argparse
+import re
+import sys
+from collections import Counter
+import pytz
+from roster import DRIVER_COLUMNS, TRUE_VALUES, FALSE_VALUES, read_roster_rows
+from timezones import resolve_timezone
+
+REQUIRED_DRIVER_COLUMNS = ("iRating", "Driver Name", "Timezone")
+FLAG_COLUMNS = ("Back to Back Stints", "Triple Stint", "Start", "Finish")
+RACE_LENGTH_PATTERN = re.compile(r"(?:(\d+):)?(\d+):(\d+)")  # HH:MM or D:HH:MM
+
+
+class RosterProblem:
+    """One thing wrong with a roster, located by file line (or table row) and column."""
+    __slots__ = ("line", "column", "value", "message")
+
+    def __init__(self, line, column, value, message):
+        self.line = line
+        self.column = column
+        self.value = value
+        self.message = message
+
+    def __repr__(self):
+        return f"RosterProblem(line {self.line}, {self.column}: {self.message})"
+
+    def __str__(self):
+        if self.line is None:
+            return f"{self.column}: {self.message}"
+        return f"Line {self.line}, {self.column}: {self.message}"
+
+
+def race_length_problem(value):
+    """Why a Race Length is invalid, or None if parse_race_length will accept it."""
+    match = RACE_LENGTH_PATTERN.fullmatch(str(value).strip())
+    if not match:
+        return "Race Length must be HH:MM or D:HH:MM"
+    days, hours, minutes = match.groups()
+    if int(minutes) >= 60:
+        return "Race Length minutes must be under 60"
+    if days is not None and int(hours) >= 24:
+        return "Race Length hours must be under 24 when days are given"
+    if int(days or 0) == int(hours) == int(minutes) == 0:
+        return "Race Length must be longer than zero"
+    return None
+
+
+def validate_event(event_header, event_values, line=2):
+    """Checks the event row: a Race Length has to be there and be parseable."""
+    event = dict(zip(event_header, event_values))
+    if "Race Length" not in event_header:
+        return [RosterProblem(None if line is None else line - 1, "Race Length", "",
+                              "Event header has no Race Length column")]
+    message = race_length_problem(event.get("Race Length", ""))
+    if message:
+        return [RosterProblem(line, "Race Length", event.get("Race Length", ""), message)]
+    return []
+
+
+def _known_timezone(name):
+    try:
+        resolve_timezone(name)
+        return True
+    except (pytz.UnknownTimeZoneError, AttributeError, ValueError):
+        return False
+
+
+def validate_drivers(rows, driver_header=DRIVER_COLUMNS, lines=None, existing_names=()):
+    """Checks every driver row, column by column, and returns a problem for each bad cell.
+
+    rows are sequences laid out as driver_header. lines gives each row's line number for the report
+    (default 1, 2, ...). existing_names are names already on the roster, for duplicate checks when adding.
+    """
+    driver_header = [str(name).strip() for name in driver_header]
+    lines = list(range(1, len(rows) + 1)) if lines is None else list(lines)
+    problems = []
+
+    def report(bad, column, message):
+        for line, value, is_bad in zip(lines, columns[column], bad):
+            if is_bad:
+                problems.append(RosterProblem(int(line), column, value,
+                                              message(value) if callable(message) else message))
+
+    missing = [name for name in REQUIRED_DRIVER_COLUMNS if name not in driver_header]
+    for name in missing:
+        problems.append(RosterProblem(int(lines[0]) - 1 if lines else 0, name, "",
+                                      f"Driver header has no {name} column"))
+    if not len(rows):
+        return problems
+
+    columns = {}
+    for i, name in enumerate(driver_header):
+        columns[name] = [str(row[i]).strip() if i < len(row) else "" for row in rows]
+
+    if "iRating" in columns:
+        report([not re.fullmatch(r"\d+", value) for value in columns["iRating"]], "iRating",
+               "iRating must be a whole number")
+
+    if "Driver Name" in columns:
+        names = columns["Driver Name"]
+        report([name == "" for name in names], "Driver Name", "Driver Name is empty")
+        counts = Counter(name.casefold() for name in names)
+        existing = {str(name).strip().casefold() for name in existing_names}
+        report([name != "" and (counts[name.casefold()] > 1 or name.casefold() in existing) for name in names],
+               "Driver Name", lambda name: f"Duplicate driver name {name}")
+
+    if "Timezone" in columns:
+        known = {zone: _known_timezone(zone) for zone in set(columns["Timezone"])}  # each distinct zone once
+        report([not known[zone] for zone in columns["Timezone"]], "Timezone", lambda zone: f"Unknown timezone {zone}")
+
+    flags = {}
+    for name in FLAG_COLUMNS:
+        if name not in columns:
+            continue
+        lowered = [value.lower() for value in columns[name]]
+        report([value not in TRUE_VALUES | FALSE_VALUES for value in lowered], name, f"{name} must be True or False")
+        flags[name] = [value in TRUE_VALUES for value in lowered]
+
+    if "Triple Stint" in flags and "Back to Back Stints" in flags:
+        report([triple and not back_to_back for triple, back_to_back in zip(flags["Triple Stint"],
+                                                                            flags["Back to Back Stints"])],
+               "Triple Stint", "Drivers cannot agree to a Triple Stint without agreeing to Back to Back Stints.")
+
+    column_order = {name: i for i, name in enumerate(driver_header)}
+    problems.sort(key=lambda problem: (problem.line, column_order.get(problem.column, -1)))
+    return problems
+
+
+def validate_roster_rows(numbered_rows):
+    """Validates a whole roster given as (line number, row) pairs, blank rows already dropped."""
+    numbered_rows = list(numbered_rows)
+    if len(numbered_rows) < 2:
+        return [RosterProblem(1, "Event Name", "", "Roster file must contain event and driver data.")]
+    (_, event_header), (event_line, event_values) = numbered_rows[0], numbered_rows[1]
+    problems = validate_event([str(name).strip() for name in event_header], event_values, event_line)
+    if len(numbered_rows) < 3:
+        problems.append(RosterProblem(event_line + 1, "Driver Name", "", "Roster has no drivers"))
+        return problems
+    driver_header = numbered_rows[2][1]
+    driver_rows = numbered_rows[3:]
+    if not driver_rows:
+        problems.append(RosterProblem(numbered_rows[2][0] + 1, "Driver Name", "", "Roster has no drivers"))
+    problems += validate_drivers([row for line, row in driver_rows], driver_header,
+                                 lines=[line for line, row in driver_rows])
+    return problems
+
+
+def validate_roster_file(filepath):
+    """Every problem in a roster CSV, with the file line each one is on.
+
+    Reads the rows through read_roster's cache, so the roster loaded afterwards is parsed from the same read.
+    """
+    return validate_roster_rows(read_roster_rows(filepath))
+
+
+def format_problems(problems, limit=None):
+    """The problems as report lines, cut to limit with a count of the rest."""
+    lines = [str(problem) for problem in problems[:limit]]
+    if limit is not None and len(problems) > limit:
+        lines.append(f"... and {len(problems) - limit} more")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check roster CSVs and list every problem found.")
+    parser.add_argument("rosters", nargs="+", help="roster CSV files")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for filepath in args.rosters:
+        try:
+            problems = validate_roster_file(filepath)
+        except OSError as e:
+            print(f"{filepath}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        if problems:
+            failed = True
+            print(f"{filepath}: {len(problems)} problems")
+            print(format_problems(problems))
+        else:
+            print(f"{filepath}: OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,62 @@
+import sqlite3
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import data_handling as dh
-import pytz
-
-timezone_mapping = {
-    # North America
-    "EST": "America/New_York",
-    "CST": "America/Chicago",
-    "MST": "America/Denver",
-    "PST": "America/Los_Angeles",
-    "AKST": "America/Anchorage",  # Alaska Standard Time
-    "HST": "Pacific/Honolulu",    # Hawaii Standard Time
-    "EDT": "America/New_York",  #Eastern Daylight Time
-    "CDT": "America/Chicago",  #Central Daylight Time
-    "MDT": "America/Denver",  #Mountain Daylight Time
-    "PDT": "America/Los_Angeles",  #Pacific Daylight Time
-    "ADT": "America/Halifax", #Atlantic Daylight Time
-    "NST": "America/St_Johns", #Newfoundland Standard Time
-    "AST": "America/Puerto_Rico", #Atlantic Standard Time
-
-    # Europe
-    "GMT": "UTC",  # Use UTC for GMT
-    "BST": "Europe/London",
-    "CET": "Europe/Berlin",
-    "CEST": "Europe/Berlin",
-    "EET": "Europe/Athens",
-    "EEST": "Europe/Athens",
-    "WET": "Europe/Lisbon",
-    "WEST": "Europe/Lisbon",
-
-    # Australia
-    "AEST": "Australia/Sydney",
-    "AEDT": "Australia/Sydney",
-    "ACST": "Australia/Adelaide",
-    "ACDT": "Australia/Adelaide",
-    "AWST": "Australia/Perth",
-
-    # Asia
-    "JST": "Asia/Tokyo",
-    "IST": "Asia/Kolkata",  # India Standard Time
-    "ChST": "Asia/Shanghai", #China Standard Time
-    "KST": "Asia/Seoul", #Korea Standard Time
-
-    # Other
-    "MSK": "Europe/Moscow",
-    "UTC": "UTC",
-    "Z": "UTC", #Zulu Time
-}
+from timezones import timezone_mapping, timezone_label
+from roster import Roster, RosterError, EVENT_COLUMNS, driver_from_row
+from roster_db import RosterStore
+from roster_table import RosterTable
+from roster_validation import validate_drivers, validate_roster_file
+
+FLAG_COLUMNS = ("Back to Back Stints", "Triple Stint", "Start", "Finish")
+
+
+class DriverEntryRow:
+    """The row of inputs under the driver table. Its widgets are built once and only their values are reset."""
+
+    def __init__(self, master, column_names):
+        self.column_names = list(column_names)
+        self.timezone_keys = list(timezone_mapping.keys())
+        self.widgets = []
+        self.vars = {}  # column name -> BooleanVar/StringVar for checkboxes and the timezone box
+        for col_num, col_name in enumerate(self.column_names):
+            if col_name in FLAG_COLUMNS:
+                var = tk.BooleanVar(value=False)
+                widget = ttk.Checkbutton(master, variable=var)
+                self.vars[col_name] = var
+            elif col_name == "Timezone":
+                var = tk.StringVar(value=self.timezone_keys[0])  # default to the first key in the dict
+                widget = ttk.Combobox(master, textvariable=var, values=self.timezone_keys)
+                self.vars[col_name] = var
+            else:
+                widget = ttk.Entry(master)
+            widget.grid(row=0, column=col_num, padx=5, pady=2, sticky="ew")
+            self.widgets.append(widget)
+
+    def timezone(self):
+        return self.vars["Timezone"].get() if "Timezone" in self.vars else "UTC"
+
+    def read(self):
+        """The entered driver as a table row, unvalidated."""
+        values = []
+        for col_name, widget in zip(self.column_names, self.widgets):
+            if col_name in FLAG_COLUMNS:
+                values.append(self.vars[col_name].get())
+            elif col_name == "Timezone":
+                timezone_str = self.timezone()
+                values.append(timezone_mapping.get(timezone_str, timezone_str))
+            else:
+                values.append(widget.get())
+        return values
+
+    def reset(self):
+        """Clears the inputs back to their defaults, keeping the same widgets."""
+        for col_name, widget in zip(self.column_names, self.widgets):
+            if col_name in self.vars:
+                self.vars[col_name].set(False if col_name in FLAG_COLUMNS else self.timezone_keys[0])
+            else:
+                widget.delete(0, tk.END)
+
 
 def open_team_roster(master):
     def center_window(window, width, height):
@@ -59,149 +69,22 @@ def open_team_roster(master):
         window.geometry(f"{width}x{height}+{x}+{y}")
 
     def add_driver():
-        nonlocal driver_row_counter
-        try:
-            if not driver_entries:
-                driver_entries.append([])
-                driver_row_counter = 1
-                create_entry_row()
-
-            new_driver_data = []
-            current_row_entries = driver_entries[driver_row_counter - 1]
-
-            back_to_back = False
-            triple_stint = False
-            start_check = False
-            finish_check = False
-
-            for i, col_name in enumerate(column_names):
-                try:
-                    entry = current_row_entries[i]
-                except IndexError:
-                    raise ValueError(f"Error accessing entry at index {i}")
-
-                if col_name == "Back to Back Stints":
-                    if hasattr(entry, 'var'):
-                        back_to_back = entry.var.get()
-                        new_driver_data.append(back_to_back)
-                    else:
-                        new_driver_data.append(False)
-                elif col_name == "Triple Stint":
-                    if hasattr(entry, 'var'):
-                        triple_stint = entry.var.get()
-                        new_driver_data.append(triple_stint)
-                    else:
-                        new_driver_data.append(False)
-                elif col_name == "Start":  # handle start check box
-                    if hasattr(entry, 'var'):
-                        start_check = entry.var.get()
-                        new_driver_data.append(start_check)
-                    else:
-                        new_driver_data.append(False)
-                elif col_name == "Finish":  # handle finish check box
-                    if hasattr(entry, 'var'):
-                        finish_check = entry.var.get()
-                        new_driver_data.append(finish_check)
-                    else:
-                        new_driver_data.append(False)
-                elif col_name == "Timezone":
-                    if hasattr(entry, 'get'):
-                        timezone_str = entry.get()
-                        if timezone_str in timezone_mapping:
-                            new_driver_data.append(timezone_mapping[timezone_str])
-                        else:
-                            messagebox.showerror("Unknown Timezone", f"Unknown timezone: {timezone_str}")
-                            return
-                    else:
-                        new_driver_data.append("UTC")
-                else:
-                    if hasattr(entry, 'get'):
-                        try:
-                            value = entry.get()
-                            if col_name == "iRating":
-                                int(value)
-                            new_driver_data.append(value)
-                        except ValueError:
-                            raise ValueError(f"{col_name} must be a number or valid input")
-                    else:
-                        new_driver_data.append("")
-
-            if triple_stint and not back_to_back:
-                raise ValueError("Drivers cannot agree to a Triple Stint without agreeing to Back to Back Stints.")
-
-            tree.insert("", tk.END, values=new_driver_data)
-
-            # Clear input fields (Corrected and Simplified)
-            for entry in driver_entries[driver_row_counter - 1]:
-                if isinstance(entry, ttk.Entry):
-                    entry.delete(0, tk.END)
-                elif isinstance(entry, ttk.Combobox):
-                    entry.current(0)  # set the combobox back to the first value
-                elif isinstance(entry, ttk.Checkbutton):
-                    entry.var.set(False)
-
-            # Row creation and destruction (Corrected)
-            if driver_row_counter == len(driver_entries):
-                driver_entries.append([])
-                driver_row_counter += 1
-                create_entry_row()
-            else:
-                old_row = driver_entries[driver_row_counter - 1]
-                driver_entries[driver_row_counter - 1] = []
-                for widget in old_row:
-                    widget.grid_forget()
-                    widget.destroy()
-                for col_num, col_name in enumerate(column_names):
-                    if col_name in ["Back to Back Stints", "Triple Stint", "Start", "Finish"]:
-                        var = tk.BooleanVar(value=False)
-                        entry = ttk.Checkbutton(entry_frame, variable=var)
-                        entry.var = var
-                    elif col_name == "Timezone":
-                        var = tk.StringVar(value=list(timezone_mapping.keys())[
-                            0])  # set the default value to the first key in the dict
-                        entry = ttk.Combobox(entry_frame, textvariable=var, values=list(timezone_mapping.keys()))
-                        entry.var = var
-                    else:
-                        entry = ttk.Entry(entry_frame)
-                    driver_entries[driver_row_counter - 1].append(entry)
-                    entry.grid(row=driver_row_counter - 1, column=col_num, padx=5, pady=2, sticky="ew")
-
-            if driver_row_counter > 1:
-                old_row_index = driver_row_counter - 2
-                for widget in driver_entries[old_row_index]:
-                    widget.grid_forget()
-                    widget.destroy()
-                driver_entries.pop(old_row_index)
-                driver_row_counter -= 1
-
-        except ValueError as e:
-            messagebox.showerror("Invalid Input", str(e))
+        new_driver_data = entry_row.read()
+        # Every problem with the new driver at once, including a name already in the table
+        problems = validate_drivers([new_driver_data], column_names,
+                                    existing_names=[row[1] for row in table.rows()])
+        if problems:
+            messagebox.showerror("Invalid Input", "\n".join(problem.message for problem in problems))
             return
 
-    def create_entry_row():
-        nonlocal driver_row_counter
-        for col_num, col_name in enumerate(column_names):
-            var = None
-            entry = None
-            if col_name in ["Back to Back Stints", "Triple Stint", "Start", "Finish"]:
-                var = tk.BooleanVar(value=False)
-                entry = ttk.Checkbutton(entry_frame, variable=var)
-                entry.var = var
-            elif col_name == "Timezone":
-                var = tk.StringVar(value=list(timezone_mapping.keys())[0]) #set the default value to the first key in the dict
-                entry = ttk.Combobox(entry_frame, textvariable=var, values=list(timezone_mapping.keys()))
-                entry.var = var
-            else:
-                entry = ttk.Entry(entry_frame)
-            driver_entries[driver_row_counter - 1].append(entry)
-            if entry:
-                entry.grid(row=0, column=col_num, padx=5, pady=2, sticky="ew")
+        item = table.insert(new_driver_data)
+        mark_dirty(item)
+        entry_row.reset()
+        entry_row.widgets[0].focus_set()  # ready for the next driver
 
     def save_roster():
         event_data = [entry.get() for entry in event_entries]
-        roster_data = []
-        for item in tree.get_children():
-            roster_data.append(tree.item(item)['values'])
+        roster_data = table.rows()
 
         filename = filedialog.asksaveasfilename(defaultextension=".csv",
                                                 filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
@@ -216,28 +99,10 @@ def open_team_roster(master):
             messagebox.showinfo("Save Cancelled", "Save was cancelled")
     def delete_driver(event):
         try:
-            item = tree.identify_row(event.y)
-            if item:
-                index = tree.index(item)
-                tree.delete(item)
-
-                if driver_entries and index < len(driver_entries):
-                    for widget in driver_entries[index]:
-                        if isinstance(widget, (ttk.Entry, ttk.Combobox, ttk.Checkbutton)):
-                            widget.grid_forget()
-                            widget.destroy()
-                    driver_entries.pop(index)
-
-                    nonlocal driver_row_counter
-                    if driver_row_counter > 1:
-                        driver_row_counter -= 1
-                        driver_entries.pop() #Call regrid function
-
-                if not driver_entries:
-                    driver_entries.append([])
-                    driver_row_counter = 1
-                    create_entry_row()
-
+            item = table.row_at(event.y)
+            if item is not None:
+                mark_removed(item)
+                table.delete(item)
         except IndexError:
             pass
         except Exception as e:
@@ -249,71 +114,121 @@ def open_team_roster(master):
                                               title="Load Roster")
         if filename:
             try:
-                event_data, roster_data = dh.load_roster_data(filename)
-
-                # Clear existing data in the Treeview
-                tree.delete(*tree.get_children())
-
-                # Clear existing entry widgets and list
-                for row in driver_entries:
-                    for widget in row:
-                        widget.grid_forget()
-                        widget.destroy()
-                driver_entries.clear()
-
-                nonlocal driver_row_counter
-                driver_row_counter = 1
-                driver_entries.append([])
-
-                # Recreate entry row with correct Timezone options
-                for col_num, col_name in enumerate(column_names):
-                    var = None
-                    entry = None
-                    if col_name in ["Back to Back Stints", "Triple Stint", "Start", "Finish"]:
-                        var = tk.BooleanVar()
-                        entry = ttk.Checkbutton(entry_frame, variable=var)
-                        entry.var = var
-                    elif col_name == "Timezone":
-                        var = tk.StringVar(value=list(timezone_mapping.keys())[0]) #set the default value to the first key in the dict
-                        entry = ttk.Combobox(entry_frame, textvariable=var, values=list(timezone_mapping.keys())) # Use timezone_mapping keys
-                        entry.var = var
-                    else:
-                        entry = ttk.Entry(entry_frame)
-                    driver_entries[-1].append(entry)
-                    if entry:
-                        entry.grid(row=0, column=col_num, padx=5, pady=2, sticky="ew")
-
-                # Populate Event Info (same as before)
-                for i, entry in enumerate(event_entries):
-                    entry.delete(0, tk.END)
-                    if i < len(event_data):
-                        entry.insert(0, event_data[i])
-
-                # Populate Driver Table (Corrected Timezone Handling)
-                for row_data in roster_data:
-                    new_row = []
-                    for i, value in enumerate(row_data):
-                        if column_names[i] == "Timezone":
-                            # Check if the loaded timezone is a valid key in timezone_mapping
-                            if value in timezone_mapping.values():
-                                # Find the key corresponding to the value
-                                key = list(timezone_mapping.keys())[list(timezone_mapping.values()).index(value)]
-                                new_row.append(key)
-                            else:
-                                new_row.append("UTC")  # Default to UTC if not found
-                        else:
-                            new_row.append(value)
-                    tree.insert("", tk.END, values=new_row)
-
+                problems = validate_roster_file(filename)
+                if problems:
+                    dh.show_roster_problems(roster_window, problems, "Error Loading Roster")
+                    return
+                show_roster(dh.read_roster(filename))
+                reset_store_tracking(None)  # a CSV roster goes to the store in full the first time
             except FileNotFoundError:
                 messagebox.showerror("Error Loading Roster", "File not found.")
             except IndexError:
                 messagebox.showerror("Error Loading Roster", "The selected file is not in the correct format.")
+            except RosterError as e:
+                messagebox.showerror("Error Loading Roster", f"The selected file is not a valid roster: {e}")
             except Exception as e:
                 messagebox.showerror("Error Loading Roster", f"An error occurred while loading the roster: {e}")
         else:
             messagebox.showinfo("Load Cancelled", "Load was cancelled")
 
+    def show_roster(roster):
+        event_data = roster.event_values
+
+        entry_row.reset()
+
+        # Populate Event Info (same as before)
+        for i, entry in enumerate(event_entries):
+            entry.delete(0, tk.END)
+            if i < len(event_data):
+                entry.insert(0, event_data[i])
+
+        # Populate Driver Table in one go, with each zone shown by its abbreviation
+        table.load([driver.irating, driver.name, driver.back_to_back, driver.triple_stint,
+                    timezone_label(driver.timezone), driver.start, driver.finish] for driver in roster.drivers)
+
+    # Roster store: only drivers added or removed since the last load/save are written
+    def reset_store_tracking(event_name):
+        nonlocal store_event
+        store_event = event_name
+        dirty_items.clear()
+        removed_drivers.clear()
+
+    def mark_dirty(item):
+        dirty_items.add(item)
+        removed_drivers.discard(tree_driver_name(item))
+
+    def mark_removed(item):
+        dirty_items.discard(item)
+        removed_drivers.add(tree_driver_name(item))
+
+    def tree_driver_name(item):
+        return str(table.values(item)[1]).strip()
+
+    def tree_driver(item):
+        return driver_from_row([str(value) for value in table.values(item)], column_names)
+
+    def save_to_store():
+        event_data = [entry.get() for entry in event_entries]
+        event_name = event_data[0].strip()
+        try:
+            with RosterStore() as store:
+                if store_event is None or event_name != store_event:
+                    drivers = [tree_driver(item) for item in table.row_ids()]
+                    store.save_roster(Roster(EVENT_COLUMNS, event_data, drivers))
+                    changes = len(drivers)
+                else:
+                    store.upsert_event(event_data)
+                    for item in dirty_items:
+                        store.put_event_driver(event_name, tree_driver(item))
+                    for driver_name in removed_drivers:
+                        store.remove_event_driver(event_name, driver_name)
+                    changes = len(dirty_items) + len(removed_drivers)
+        except RosterError as e:
+            messagebox.showerror("Error Saving Roster", str(e))
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Error Saving Roster", f"Could not write the roster store: {e}")
+            return
+        reset_store_tracking(event_name)
+        messagebox.showinfo("Roster Saved", f"Saved {event_name} to the roster store ({changes} driver changes).")
+
+    def load_from_store():
+        try:
+            with RosterStore() as store:
+                event_names = store.event_names()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error Loading Roster", f"Could not open the roster store: {e}")
+            return
+        if not event_names:
+            messagebox.showinfo("Roster Store", "No rosters have been saved to the store yet.")
+            return
+
+        picker = tk.Toplevel(roster_window)
+        picker.title("Load from Store")
+        picker.configure(bg='#3d3d3d')
+        picker.transient(roster_window)
+        event_list = tk.Listbox(picker, height=min(len(event_names), 15), width=40)
+        for event_name in event_names:
+            event_list.insert(tk.END, event_name)
+        event_list.selection_set(0)
+        event_list.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+
+        def load_selected(event=None):
+            selection = event_list.curselection()
+            if not selection:
+                return
+            event_name = event_names[selection[0]]
+            picker.destroy()
+            try:
+                with RosterStore() as store:
+                    show_roster(store.load_roster(event_name))
+                reset_store_tracking(event_name)
+            except (KeyError, sqlite3.Error, RosterError) as e:
+                messagebox.showerror("Error Loading Roster", f"Could not load {event_name} from the store: {e}")
+
+        event_list.bind("<Double-Button-1>", load_selected)
+        ttk.Button(picker, text="Load", command=load_selected).grid(row=1, column=0, sticky="ew", padx=10, pady=(0, 10))
+
 
     icon = tk.PhotoImage(file='racing_flag_PNG.png')
     roster_window = tk.Toplevel(master)
@@ -321,7 +236,7 @@ def open_team_roster(master):
     roster_window.iconphoto(False, icon)
     roster_window.resizable(False, False)
     roster_window.configure(bg='#3d3d3d')
-    center_window(roster_window, 650, 630)
+    center_window(roster_window, 650, 680)
 
     # Static Event Info
     event_frame = ttk.LabelFrame(roster_window, text="Event Information")
@@ -349,7 +264,9 @@ def open_team_roster(master):
     entry_frame = ttk.Frame(driver_frame)
     entry_frame.grid(row=2, column=0, columnspan=len(column_names), sticky="nsew")
 
-    tree = ttk.Treeview(driver_frame, columns=column_names, show="headings")
+    # Only a page of drivers is ever in the Treeview, so league-sized rosters load instantly
+    table = RosterTable(driver_frame, column_names, height=10)
+    tree = table.tree
 
     # Configure column widths
     tree.column("iRating", width=50)  # Reduced width
@@ -363,14 +280,14 @@ def open_team_roster(master):
     for col in column_names:
         tree.heading(col, text=col)
 
-    tree.grid(row=0, column=0, columnspan=len(column_names), sticky="nsew")
+    table.grid(row=0, column=0, columnspan=len(column_names), sticky="nsew")
     tree.bind("<Button-3>", delete_driver)  # Bind right click to the treeview
 
-    driver_row_counter = 1
-    driver_entries = []
-    driver_entries.append([])
+    entry_row = DriverEntryRow(entry_frame, column_names)
 
-    create_entry_row()
+    store_event = None  # event the table was last loaded from or saved to in the roster store
+    dirty_items = set()  # table rows added since then
+    removed_drivers = set()  # driver names deleted since then
 
     # Create LABELS ONLY here
     for col_num, col_name in enumerate(column_names):
@@ -379,10 +296,16 @@ def open_team_roster(master):
 
 
     add_driver_button = ttk.Button(driver_frame, text="Add Driver", command=add_driver)
-    add_driver_button.grid(row=driver_row_counter + 2, columnspan=len(column_names), sticky='nsew')
+    add_driver_button.grid(row=3, columnspan=len(column_names), sticky='nsew')
 
     save_button = ttk.Button(roster_window, text="Save", command=save_roster)
-    save_button.grid(row= driver_row_counter + 4, column= 0, sticky='ew', padx=10, pady=10)
+    save_button.grid(row=5, column= 0, sticky='ew', padx=10, pady=10)
 
     load_button = ttk.Button(roster_window, text="Load Roster", command=load_roster)
-    load_button.grid(row=driver_row_counter + 5, column=0, columnspan=len(column_names), sticky='ew', padx=10, pady=10)
\ No newline at end of file
+    load_button.grid(row=6, column=0, columnspan=len(column_names), sticky='ew', padx=10, pady=10)
+
+    store_frame = ttk.Frame(roster_window)
+    store_frame.grid(row=7, column=0, sticky='ew', padx=10, pady=(0, 10))
+    store_frame.columnconfigure((0, 1), weight=1)
+    ttk.Button(store_frame, text="Save to Store", command=save_to_store).grid(row=0, column=0, sticky='ew', padx=(0, 5))
+    ttk.Button(store_frame, text="Load from Store", command=load_from_store).grid(row=0, column=1, sticky='ew', padx=(5, 0))
\ No newline at end of file
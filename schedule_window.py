@@ -0,0 +1,266 @@
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import data_handling as dh
+from availability_reader import read_availability_workbook
+from availability_grid import AVAILABILITY_OPTIONS, STATE_CODES, parse_race_start
+from live_clock import LiveRaceMonitor, RaceClock, build_alerts, format_race_time, utc_now
+from race_schedule import RaceScheduler
+from roster import parse_race_length
+
+logger = logging.getLogger(__name__)
+
+POLL_MS = 1000  # only used when Tcl is built without threads and the clock thread can't wake the window
+
+
+def open_schedule_window(master):
+    """Opens the race schedule window for a roster and its filled-in availability sheet."""
+
+    def create_schedule_window(roster, race_length, states, race_times, gmt_times, sim_times, time_block):
+        schedule_window = tk.Toplevel(master)
+        try:
+            icon = tk.PhotoImage(file='racing_flag_PNG.png')
+            schedule_window.iconphoto(False, icon)
+        except:
+            logger.warning("icon not found")
+        schedule_window.configure(bg='#3d3d3d')
+        schedule_window.title("Race Schedule")
+        schedule_window.geometry("650x820")
+        scheduler = None
+        monitor = None
+
+        ttk.Label(schedule_window, text="Stint Length (minutes):", font=("Arial", 12)).grid(row=0, column=0, sticky="w", padx=10, pady=5)
+        stint_entry = ttk.Entry(schedule_window, width=10)
+        stint_entry.insert(0, "60")
+        stint_entry.grid(row=0, column=1, sticky="w", padx=10, pady=5)
+
+        columns = ["Stint", "Race Time", "GMT", "Driver"]
+        tree = ttk.Treeview(schedule_window, columns=columns, show="headings")
+        for col in columns:
+            tree.heading(col, text=col)
+        tree.column("Stint", width=50)
+        tree.column("Race Time", width=80)
+        tree.column("GMT", width=120)
+        tree.column("Driver", width=200)
+        tree.grid(row=2, column=0, columnspan=2, sticky="nsew", padx=10, pady=5)
+        schedule_window.rowconfigure(2, weight=1)
+        schedule_window.columnconfigure(1, weight=1)
+
+        issues_label = ttk.Label(schedule_window, text="", wraplength=600, justify="left")
+        issues_label.grid(row=3, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+
+        def show_schedule(schedule):
+            tree.delete(*tree.get_children())
+            for stint in schedule.stints:
+                last_block = min(stint.end_block, len(gmt_times) - 1)
+                tree.insert("", tk.END, values=[stint.index + 1, int(race_times[stint.start_block]),
+                                                f"{gmt_times[stint.start_block]} - {gmt_times[last_block]}",
+                                                stint.driver_name or "UNFILLED"])
+            if schedule.complete:
+                issues_label.config(text="Every stint has a driver.")
+            else:
+                lines = [f"Stint {issue.stint_index + 1}: {'; '.join(issue.reasons)}" for issue in schedule.issues]
+                issues_label.config(text="\n".join(lines))
+            current = scheduler.current_stint()
+            if current is not None:
+                item = tree.get_children()[current]
+                tree.selection_set(item)
+                tree.see(item)
+
+        def race_block(text):
+            """Block of a race time given as HH:MM since the green flag."""
+            try:
+                hours, minutes = map(int, text.strip().split(":"))
+            except ValueError:
+                raise ValueError("Race times must be HH:MM since the green flag.")
+            return (hours * 60 + minutes) // time_block
+
+        def calculate():
+            nonlocal scheduler
+            try:
+                stint_minutes = int(stint_entry.get())
+                if not time_block:
+                    raise ValueError("The availability sheet needs at least two time blocks.")
+                stint_blocks = max(1, round(stint_minutes / time_block))
+                # The sheet's last row is the checkered flag, so only plan the blocks inside the race
+                race_blocks = -(-int(parse_race_length(race_length).total_seconds() // 60) // time_block)
+                scheduler = RaceScheduler(roster, states[:, :max(1, race_blocks)], stint_blocks)
+            except ValueError as e:
+                messagebox.showerror("Invalid Input", str(e), parent=schedule_window)
+                return
+            show_schedule(scheduler.schedule)
+            refresh_alerts()
+
+        def replan(change):
+            """Applies a live change to the calculated schedule and shows the new plan."""
+            if scheduler is None:
+                messagebox.showerror("Error", "Calculate the race schedule first.", parent=schedule_window)
+                return
+            try:
+                schedule = change()
+            except ValueError as e:
+                messagebox.showerror("Invalid Input", str(e), parent=schedule_window)
+                return
+            show_schedule(schedule)
+            refresh_alerts()
+
+        def set_now():
+            replan(lambda: scheduler.set_now(race_block(now_entry.get())))
+
+        def change_availability():
+            def change():
+                if driver_var.get() not in roster.driver_names:
+                    raise ValueError("Select a driver.")
+                start = race_block(from_entry.get())
+                end = race_block(to_entry.get()) if to_entry.get().strip() else start + 1
+                return scheduler.set_state(roster.driver_names.index(driver_var.get()), start,
+                                           STATE_CODES[state_var.get()], end)
+            replan(change)
+
+        def overrun():
+            def change():
+                try:
+                    minutes = int(overrun_entry.get())
+                except ValueError:
+                    raise ValueError("Overrun must be a whole number of minutes.")
+                return scheduler.overrun(round(minutes / time_block))
+            replan(change)
+
+        ttk.Button(schedule_window, text="Calculate Race Schedule", command=calculate).grid(row=1, column=0, columnspan=2, pady=(5, 10), sticky="ew", padx=10)
+
+        # Live changes during the race: only stints that haven't started yet are planned again
+        live_frame = ttk.LabelFrame(schedule_window, text="During the Race")
+        live_frame.grid(row=4, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+
+        ttk.Label(live_frame, text="Race Time (HH:MM):").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        now_entry = ttk.Entry(live_frame, width=8)
+        now_entry.insert(0, "00:00")
+        now_entry.grid(row=0, column=1, sticky="w", padx=5, pady=2)
+        ttk.Button(live_frame, text="Set Now", command=set_now).grid(row=0, column=2, sticky="w", padx=5, pady=2)
+
+        driver_var = tk.StringVar()
+        ttk.Combobox(live_frame, textvariable=driver_var, values=roster.driver_names, state="readonly", width=18).grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        state_var = tk.StringVar(value=AVAILABILITY_OPTIONS[-1])
+        ttk.Combobox(live_frame, textvariable=state_var, values=AVAILABILITY_OPTIONS, state="readonly", width=10).grid(row=1, column=1, sticky="w", padx=5, pady=2)
+        ttk.Label(live_frame, text="From:").grid(row=1, column=2, sticky="e", padx=5, pady=2)
+        from_entry = ttk.Entry(live_frame, width=8)
+        from_entry.grid(row=1, column=3, sticky="w", padx=5, pady=2)
+        ttk.Label(live_frame, text="To:").grid(row=1, column=4, sticky="e", padx=5, pady=2)
+        to_entry = ttk.Entry(live_frame, width=8)
+        to_entry.grid(row=1, column=5, sticky="w", padx=5, pady=2)
+        ttk.Button(live_frame, text="Change Availability", command=change_availability).grid(row=1, column=6, sticky="w", padx=5, pady=2)
+
+        ttk.Label(live_frame, text="Stint Overrun (minutes):").grid(row=2, column=0, sticky="w", padx=5, pady=2)
+        overrun_entry = ttk.Entry(live_frame, width=8)
+        overrun_entry.insert(0, str(time_block or 15))
+        overrun_entry.grid(row=2, column=1, sticky="w", padx=5, pady=2)
+        ttk.Button(live_frame, text="Apply Overrun", command=overrun).grid(row=2, column=2, sticky="w", padx=5, pady=2)
+
+        # Live race clock: an asyncio loop on its own thread sleeps until the next alert or race minute,
+        # and only then wakes the window with a batch of updates
+        clock_frame = ttk.LabelFrame(schedule_window, text="Live Race Clock")
+        clock_frame.grid(row=5, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+        clock_frame.columnconfigure(3, weight=1)
+
+        ttk.Label(clock_frame, text="Green Flag (GMT):").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        green_flag_entry = ttk.Entry(clock_frame, width=18)
+        green_flag_entry.insert(0, f"{utc_now():%Y-%m-%d} {gmt_times[0]}")
+        green_flag_entry.grid(row=0, column=1, sticky="w", padx=5, pady=2)
+        clock_label = ttk.Label(clock_frame, text="", font=("Arial", 12))
+        clock_label.grid(row=0, column=3, sticky="w", padx=5, pady=2)
+        alerts_list = tk.Listbox(clock_frame, height=4, bg='#3d3d3d', fg='white')
+        alerts_list.grid(row=1, column=0, columnspan=4, sticky="ew", padx=5, pady=(2, 5))
+
+        threaded = schedule_window.tk.eval("set tcl_platform(threaded)") == "1"
+
+        def refresh_alerts():
+            if monitor is not None and scheduler is not None:
+                monitor.set_alerts(build_alerts(scheduler.schedule, scheduler.states, monitor.clock, time_block))
+
+        def notify():
+            # Called on the clock thread; with threaded Tcl the event is handed to the Tk thread
+            try:
+                schedule_window.event_generate("<<RaceClockUpdate>>", when="tail")
+            except (tk.TclError, RuntimeError):
+                pass  # window already closed
+
+        def on_clock_update(event=None):
+            if monitor is None:
+                return
+            for update in monitor.drain():
+                if update[0] == "tick":
+                    _, elapsed, sim_time = update
+                    clock_label.config(text=f"Race {format_race_time(elapsed)}" + (f"   Sim {sim_time}" if sim_time else ""))
+                    block = max(0, monitor.clock.block(time_block))
+                    if block != scheduler.now_block:
+                        scheduler.set_now(block)
+                        now_entry.delete(0, tk.END)
+                        now_entry.insert(0, f"{block * time_block // 60:02d}:{block * time_block % 60:02d}")
+                        show_schedule(scheduler.schedule)
+                else:
+                    alert = update[1]
+                    alerts_list.insert(0, f"{alert.when:%H:%M} GMT  {alert.kind}: {alert.message}")
+                    schedule_window.bell()
+
+        def poll_clock():
+            if monitor is not None:
+                on_clock_update()
+                schedule_window.after(POLL_MS, poll_clock)
+
+        def toggle_live():
+            nonlocal monitor
+            if monitor is not None:
+                monitor.stop(wait=False)  # the clock thread may be waiting on this thread in notify
+                monitor = None
+                live_button.config(text="Start Live Clock")
+                return
+            if scheduler is None:
+                messagebox.showerror("Error", "Calculate the race schedule first.", parent=schedule_window)
+                return
+            try:
+                clock = RaceClock(parse_race_start(green_flag_entry.get()), parse_race_length(race_length),
+                                  sim_times[0] if sim_times is not None and len(sim_times) else None)
+            except ValueError:
+                messagebox.showerror("Invalid Input", "Green flag must be YYYY-MM-DD HH:MM or HH:MM.", parent=schedule_window)
+                return
+            monitor = LiveRaceMonitor(clock, notify=notify if threaded else None)
+            refresh_alerts()
+            monitor.start()
+            live_button.config(text="Stop Live Clock")
+            if not threaded:
+                poll_clock()
+
+        def close_window():
+            if monitor is not None:
+                monitor.stop(wait=False)
+            schedule_window.destroy()
+
+        live_button = ttk.Button(clock_frame, text="Start Live Clock", command=toggle_live)
+        live_button.grid(row=0, column=2, sticky="w", padx=5, pady=2)
+        schedule_window.bind("<<RaceClockUpdate>>", on_clock_update)
+        schedule_window.protocol("WM_DELETE_WINDOW", close_window)
+
+    filepath = dh.open_roster_file()
+    if not filepath:
+        return
+    result = dh.check_roster_data(filepath, master)
+    if not result:
+        return
+    race_length, roster = result
+
+    availability_path = filedialog.askopenfilename(defaultextension=".xlsx",
+                                                   filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+                                                   title="Select Filled-In Availability Sheet")
+    if not availability_path:
+        return
+    try:
+        matrix = read_availability_workbook(availability_path)
+        states = matrix.for_roster(roster)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    except Exception as e:
+        messagebox.showerror("Error", f"Could not read availability sheet: {e}")
+        return
+    create_schedule_window(roster, race_length, states, matrix.grid.race_hours, matrix.grid.gmt, matrix.grid.sim_time,
+                           matrix.time_block)
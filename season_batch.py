@@ -0,0 +1,137 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import NamedTuple
+
+MANIFEST_COLUMNS = ("roster", "start", "sim_start", "offset", "block", "output")
+SUMMARY_COLUMNS = ("output", "roster", "drivers", "blocks", "seconds", "error")
+
+
+class SeasonEvent(NamedTuple):
+    roster: str
+    start: str
+    sim_start: str
+    offset: int
+    block: int
+    output: str
+    race_length: str = ""
+
+
+class EventResult(NamedTuple):
+    output: str
+    roster: str
+    drivers: int
+    blocks: int
+    seconds: float
+    error: str
+
+
+def read_manifest(filepath):
+    """Reads a season manifest: a CSV with one event per line.
+
+    Columns are roster, start, sim_start, offset, block, output and optionally race_length. Relative
+    paths are taken relative to the manifest.
+    """
+    base = os.path.dirname(os.path.abspath(filepath))
+    events = []
+    with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        missing = [column for column in MANIFEST_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Manifest is missing columns: {', '.join(missing)}")
+        for line_num, row in enumerate(reader, start=2):
+            if not any((value or "").strip() for value in row.values()):
+                continue
+            try:
+                events.append(SeasonEvent(
+                    roster=os.path.join(base, row["roster"].strip()),
+                    start=row["start"].strip(),
+                    sim_start=(row["sim_start"] or "").strip(),
+                    offset=int(row["offset"] or 0),
+                    block=int(row["block"] or 15),
+                    output=os.path.join(base, row["output"].strip()),
+                    race_length=(row.get("race_length") or "").strip()))
+            except ValueError as e:
+                raise ValueError(f"Manifest line {line_num}: {e}")
+    return events
+
+
+def generate_event(event, use_cache=True):
+    """Worker: generates one event's sheet. Roster and timezone caches live on in the worker process."""
+    from availability_sheet import generate_availability
+    from roster import read_roster
+    from sheet_cache import SheetCache
+
+    started = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(event.output) or ".", exist_ok=True)
+        roster = read_roster(event.roster)
+        sheet = generate_availability(roster, event.start, event.sim_start or None, event.offset, event.block,
+                                      event.race_length or None, output_path=event.output,
+                                      cache=SheetCache() if use_cache else None)
+        return EventResult(event.output, event.roster, sheet.grid.num_drivers, sheet.grid.num_blocks,
+                           time.perf_counter() - started, "")
+    except Exception as e:
+        return EventResult(event.output, event.roster, 0, 0, time.perf_counter() - started, str(e))
+
+
+def run_season(events, workers=None, use_cache=True):
+    """Generates every event's sheet across a process pool (one worker per core by default).
+
+    Events sharing a roster are sent to the pool next to each other so a worker tends to get them
+    together and reuses its parsed roster and timezone tables. Results come back in manifest order.
+    """
+    events = list(events)
+    if not events:
+        return []
+    workers = workers or os.cpu_count() or 1
+    order = sorted(range(len(events)), key=lambda i: (events[i].roster, events[i].start))
+    chunksize = max(1, len(events) // (workers * 2))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(partial(generate_event, use_cache=use_cache), [events[i] for i in order],
+                                chunksize=chunksize))
+    by_event = dict(zip(order, results))
+    return [by_event[i] for i in range(len(events))]
+
+
+def write_summary(results, filepath):
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(SUMMARY_COLUMNS)
+        for result in results:
+            writer.writerow([result.output, result.roster, result.drivers, result.blocks,
+                             f"{result.seconds:.3f}", result.error])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate availability sheets for every event in a season manifest.")
+    parser.add_argument("manifest", help=f"CSV with columns {', '.join(MANIFEST_COLUMNS)} (and optionally race_length)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, ignoring the sheet cache")
+    parser.add_argument("--summary", default=None, help="summary CSV to write (default: next to the manifest)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        events = read_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    results = run_season(events, args.workers, not args.no_cache)
+
+    summary = args.summary or os.path.join(os.path.dirname(os.path.abspath(args.manifest)), "season_summary.csv")
+    write_summary(results, summary)
+    failed = [result for result in results if result.error]
+    for result in failed:
+        print(f"Failed: {result.output}: {result.error}", file=sys.stderr)
+    print(f"Generated {len(results) - len(failed)} of {len(results)} sheets in "
+          f"{time.perf_counter() - started:.1f}s. Summary saved to {summary}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
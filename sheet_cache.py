@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from availability_grid import AvailabilityGrid
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("SIMCALC_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".simracingcalc", "cache")
+CACHE_MAX_BYTES = int(os.environ.get("SIMCALC_CACHE_MAX_MB", "200")) * 2**20
+
+# Bump whenever the workbook layout or grid arrays change, so old entries stop matching
+CACHE_VERSION = 1
+
+
+def sheet_key(driver_names, driver_timezones, race_start, race_length, sim_start, time_block):
+    """Hash of everything that ends up in a generated sheet.
+
+    Only the drivers' names and timezones reach the sheet, so editing iRatings or stint flags keeps the entry.
+    """
+    payload = {
+        "version": CACHE_VERSION,
+        "drivers": [[name, timezone] for name, timezone in zip(driver_names, driver_timezones)],
+        "race_start": race_start.isoformat(),
+        "race_length": race_length.total_seconds(),
+        "sim_start": sim_start or None,
+        "time_block": time_block,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def save_grid(grid, filepath):
+    """Writes a grid's arrays to an .npz file."""
+    with open(filepath, 'wb') as f:
+        np.savez_compressed(f,
+                            block_times=grid.block_times.asi8,
+                            race_hours=grid.race_hours,
+                            gmt=grid.gmt,
+                            sim_time=grid.sim_time if grid.sim_time is not None else np.array([], dtype=grid.gmt.dtype),
+                            has_sim_time=grid.sim_time is not None,
+                            driver_names=np.array(grid.driver_names, dtype=str),
+                            driver_timezones=np.array(grid.driver_timezones, dtype=str),
+                            local_times=grid.local_times,
+                            time_block=grid.time_block)
+
+
+def load_grid(filepath):
+    with np.load(filepath) as data:
+        block_times = pd.DatetimeIndex(data["block_times"]).tz_localize("UTC")
+        return AvailabilityGrid(block_times, data["race_hours"], data["gmt"],
+                                data["sim_time"] if bool(data["has_sim_time"]) else None,
+                                data["driver_names"].tolist(), data["driver_timezones"].tolist(),
+                                data["local_times"], int(data["time_block"]))
+
+
+class SheetCache:
+    """Finished availability workbooks and their grids, stored by sheet_key in a directory.
+
+    Each entry is <key>.xlsx plus <key>.npz. Hits refresh the files' modification time and the least
+    recently used entries are evicted once the directory grows past max_bytes. Files are written to a
+    temporary name and renamed, so several processes can share one cache.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or CACHE_DIR
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".xlsx", base + ".npz"
+
+    def get(self, key):
+        """The cached (workbook path, grid) for key, or None."""
+        xlsx_path, grid_path = self.paths(key)
+        try:
+            grid = load_grid(grid_path)
+            os.utime(xlsx_path)
+            os.utime(grid_path)
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning("Ignoring unreadable cache entry %s: %s", key, e)
+            return None
+        return xlsx_path, grid
+
+    def put(self, key, workbook_path, grid):
+        """Copies a finished workbook into the cache with its grid. Cache problems never fail a generation."""
+        xlsx_path, grid_path = self.paths(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(grid_path, lambda temp_path: save_grid(grid, temp_path))
+            self._write(xlsx_path, lambda temp_path: shutil.copyfile(workbook_path, temp_path))
+            self.evict()
+        except OSError as e:
+            logger.warning("Could not cache sheet %s: %s", key, e)
+
+    def _write(self, filepath, write):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, filepath)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def entries(self):
+        """(last used, total bytes, key) for every entry, oldest first."""
+        entries = {}
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        for name in names:
+            key, ext = os.path.splitext(name)
+            if ext not in (".xlsx", ".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            used, size = entries.get(key, (0, 0))
+            entries[key] = (max(used, stat.st_mtime), size + stat.st_size)
+        return sorted((used, size, key) for key, (used, size) in entries.items())
+
+    def size(self):
+        return sum(size for used, size, key in self.entries())
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for used, size, key in entries)
+        for used, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self.paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        for used, size, key in self.entries():
+            for path in self.paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,68 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Keeps track of how long the launcher takes to come up and how long each lazy import costs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = []  # (label, seconds since start)
+        self.imports = {}  # module name -> seconds spent importing it
+        self.first_paint = None
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def mark(self, label):
+        self.marks.append((label, self.elapsed()))
+
+    def import_module(self, name):
+        """Imports a module on first use and records how long it took.
+
+        Always goes through importlib, which waits on the module's import lock, so a click while the
+        warm-up thread is still importing gets the finished module rather than a half-loaded one.
+        """
+        loaded = name in sys.modules  # maybe only partly, if another thread is importing it right now
+        begin = time.perf_counter()
+        module = importlib.import_module(name)
+        if not loaded:
+            seconds = time.perf_counter() - begin
+            with self._lock:
+                self.imports.setdefault(name, seconds)
+        return module
+
+    def mark_first_paint(self):
+        if self.first_paint is None:
+            self.first_paint = self.elapsed()
+
+    def warm_up(self, module_names):
+        """Imports modules in a background thread so the first click on a feature is instant."""
+        def run():
+            for name in module_names:
+                try:
+                    self.import_module(name)
+                except Exception as e:
+                    logger.warning("Warm-up import of %s failed: %s", name, e)
+
+        thread = threading.Thread(target=run, name="startup-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def report(self):
+        lines = ["Startup timings:"]
+        for label, seconds in self.marks:
+            lines.append(f"  {label:<30} {seconds * 1000:8.1f} ms")
+        if self.first_paint is not None:
+            lines.append(f"  {'first paint':<30} {self.first_paint * 1000:8.1f} ms")
+        with self._lock:
+            imports = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        for name, seconds in imports:
+            lines.append(f"  import {name:<23} {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,70 @@
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import data_handling as dh
+from driver_stats import STATS_COLUMNS, driver_stats_from_files
+
+logger = logging.getLogger(__name__)
+
+
+def open_stats_window(master):
+    """Opens the driver statistics window for a roster and one or more lap files."""
+
+    def create_stats_window(roster, stats, lap_count, extra_drivers):
+        stats_window = tk.Toplevel(master)
+        try:
+            icon = tk.PhotoImage(file='racing_flag_PNG.png')
+            stats_window.iconphoto(False, icon)
+        except:
+            logger.warning("icon not found")
+        stats_window.configure(bg='#3d3d3d')
+        stats_window.title("Driver Statistics")
+        stats_window.geometry("820x450")
+
+        ttk.Label(stats_window, text=f"{roster.event.get('Event Name', '')}: {lap_count} laps", font=("Arial", 12)).grid(row=0, column=0, sticky="w", padx=10, pady=5)
+
+        tree = ttk.Treeview(stats_window, columns=STATS_COLUMNS, show="headings")
+        for col in STATS_COLUMNS:
+            tree.heading(col, text=col)
+            tree.column(col, width=80, anchor="e")
+        tree.column("Driver", width=180, anchor="w")
+        scrollbar = ttk.Scrollbar(stats_window, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=1, column=0, sticky="nsew", padx=(10, 0), pady=5)
+        scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 10), pady=5)
+        stats_window.rowconfigure(1, weight=1)
+        stats_window.columnconfigure(0, weight=1)
+
+        for row in stats.rows():
+            tree.insert("", tk.END, values=row)
+
+        notes = "Mean and Std Dev leave out laps over 107% of the driver's median (pit, out and incident laps)."
+        if extra_drivers:
+            notes += f"\nIn the lap files but not on the roster: {', '.join(extra_drivers)}"
+        ttk.Label(stats_window, text=notes, wraplength=780, justify="left").grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+
+    filepath = dh.open_roster_file()
+    if not filepath:
+        return
+    result = dh.check_roster_data(filepath, master)
+    if not result:
+        return
+    race_length, roster = result
+
+    lap_paths = filedialog.askopenfilenames(defaultextension=".csv",
+                                            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+                                            title="Select Lap Time Files")
+    if not lap_paths:
+        return
+    try:
+        all_stats, lap_data = driver_stats_from_files(lap_paths)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    except Exception as e:
+        logger.exception("Error reading lap files")
+        messagebox.showerror("Error", f"Could not read lap files: {e}")
+        return
+    on_roster = set(roster.driver_names)
+    extra_drivers = [name for name in all_stats.names if name not in on_roster]
+    create_stats_window(roster, all_stats.for_roster(roster), len(lap_data), extra_drivers)
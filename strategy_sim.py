@@ -0,0 +1,218 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import NamedTuple
+import numpy as np
+from availability_grid import SLEEP
+from race_schedule import MAX_CONSECUTIVE
+from roster import parse_race_length
+
+DEFAULT_TRIALS = 10000
+BATCH_TRIALS = 1000
+
+
+class StrategyModel(NamedTuple):
+    """What can go differently from the plan in a simulated race."""
+    stint_spread: float = 0.08  # std dev of a stint's length as a fraction of the plan (fuel, tyres, traffic)
+    pit_minutes: float = 1.5  # time lost in every stop
+    caution_rate: float = 0.25  # cautions per racing hour
+    caution_minutes: float = 10.0  # mean caution length; cautions save fuel, so they stretch the stint
+    # Chance a driver turns up for a stint, by their availability state at its start
+    # (Available, Monitor, Tentative, Sleep, Blocked)
+    show_probability: tuple = (0.98, 0.9, 0.6, 0.05, 0.0)
+
+
+class StrategyResult:
+    """Outcome of simulate_strategy. Risks are the fraction of trials in which a block had nobody driving."""
+
+    def __init__(self, block_risk, batch_risk, uncovered_minutes, time_block):
+        self.block_risk = block_risk  # [block]
+        self.batch_risk = batch_risk  # [batch, block], for the spread between batches
+        self.uncovered_minutes = uncovered_minutes  # [trial] minutes without a driver
+        self.time_block = time_block
+
+    @property
+    def trials(self):
+        return len(self.uncovered_minutes)
+
+    @property
+    def num_blocks(self):
+        return len(self.block_risk)
+
+    def risk_percentiles(self, percentiles=(5, 50, 95)):
+        """[percentile, block] coverage risk across batches of trials."""
+        return np.percentile(self.batch_risk, percentiles, axis=0)
+
+    def uncovered_percentiles(self, percentiles=(50, 90, 99)):
+        """Minutes without a driver per race at each percentile."""
+        return np.percentile(self.uncovered_minutes, percentiles)
+
+    def clean_race_probability(self):
+        """Fraction of trials where every block had a driver."""
+        return float(np.mean(self.uncovered_minutes == 0))
+
+    def riskiest_blocks(self, count=10):
+        order = np.argsort(-self.block_risk, kind="stable")[:count]
+        return [int(block) for block in order if self.block_risk[block] > 0]
+
+
+def plan_arrays(schedule, roster, time_block, race_minutes):
+    """The schedule as arrays: driver per stint, planned minutes per stint, stints in a row per stint, and
+    each driver's consecutive stint limit."""
+    drivers = np.array([stint.driver for stint in schedule.stints], dtype=np.int64)
+    minutes = np.array([(stint.end_block - stint.start_block) * time_block for stint in schedule.stints], dtype=float)
+    if len(minutes):
+        minutes[-1] = max(minutes[-1], race_minutes - minutes[:-1].sum())
+    streak = np.ones(len(drivers), dtype=np.int64)
+    for i in range(1, len(drivers)):
+        if drivers[i] >= 0 and drivers[i] == drivers[i - 1]:
+            streak[i] = streak[i - 1] + 1
+    limits = np.array([min(driver.max_consecutive_stints, MAX_CONSECUTIVE) for driver in roster.drivers],
+                      dtype=np.int64)
+    return drivers, minutes, streak, limits
+
+
+def simulate_batch(drivers, minutes, streak, limits, states, time_block, race_minutes, model, trials, seed):
+    """Runs one batch of trials as [trial, stint] and [trial, block] arrays.
+
+    Returns the number of trials each block went uncovered and the uncovered minutes of every trial.
+    """
+    rng = np.random.default_rng(seed)
+    num_stints = len(drivers)
+    num_blocks = states.shape[1]
+    blocks = np.arange(num_blocks)
+    block_minutes = blocks * time_block
+
+    # Stint lengths: planned length scaled by the spread, stretched by cautions, plus the stop
+    spread = np.clip(rng.normal(1.0, model.stint_spread, (trials, num_stints)), 0.5, 1.5)
+    cautions = rng.poisson(model.caution_rate * minutes / 60, (trials, num_stints))
+    caution_time = rng.gamma(np.maximum(cautions, 1e-12), model.caution_minutes) * (cautions > 0)
+    durations = minutes * spread + caution_time + model.pit_minutes
+    horizon = race_minutes + 1
+    ends = np.minimum(np.cumsum(durations, axis=1), horizon)
+    ends[:, -1] = horizon  # whoever is in the car at the end takes the flag
+    starts = np.concatenate([np.zeros((trials, 1)), ends[:, :-1]], axis=1)
+
+    # Stint driving each block: count of stint ends at or before the block, one searchsorted for all trials
+    row_offset = (np.arange(trials) * (horizon + 1))[:, None]
+    stint_at = np.searchsorted((ends + row_offset).ravel(), (block_minutes + row_offset).ravel(), side="right")
+    stint_at = stint_at.reshape(trials, num_blocks) - np.arange(trials)[:, None] * num_stints
+    stint_at = np.minimum(stint_at, num_stints - 1)
+
+    # Drivable blocks per driver, with an all-False last row that driver -1 (unfilled) indexes
+    drivable = np.vstack([states < SLEEP, np.zeros((1, num_blocks), dtype=bool)])
+    start_blocks = np.minimum((starts // time_block).astype(np.int64), num_blocks - 1)
+    show_probability = np.asarray(model.show_probability)
+    start_states = np.vstack([states, np.full((1, num_blocks), len(show_probability) - 1)])[drivers, start_blocks]
+    shows = (rng.random((trials, num_stints)) < show_probability[start_states]) & (drivers >= 0)
+
+    # A missing driver is covered by the previous stint's driver if they were there and may go again
+    previous = np.concatenate([[-1], drivers[:-1]])
+    previous_streak = np.concatenate([[0], streak[:-1]])
+    may_continue = (previous >= 0) & (previous_streak + 1 <= limits[np.maximum(previous, 0)])
+    covers = np.concatenate([np.zeros((trials, 1), dtype=bool), shows[:, :-1]], axis=1) & may_continue
+
+    trial_rows = np.arange(trials)[:, None]
+    stint_shows = shows[trial_rows, stint_at]
+    planned = drivers[stint_at]
+    fallback = previous[stint_at]
+    covered = np.where(stint_shows, drivable[planned, blocks],
+                       covers[trial_rows, stint_at] & drivable[fallback, blocks])
+    uncovered = ~covered
+    return uncovered.sum(axis=0), uncovered.sum(axis=1) * time_block
+
+
+def simulate_strategy(roster, states, schedule, time_block, race_length=None, trials=DEFAULT_TRIALS, model=None,
+                      seed=None, workers=None, batch_trials=BATCH_TRIALS):
+    """Monte Carlo robustness check of a RaceSchedule.
+
+    Every trial varies stint lengths, cautions and pit time, and draws whether each planned driver turns
+    up from their availability state. states is the [driver, block] availability the plan was made from.
+    Trials run in batches of batch_trials, across a process pool when workers > 1.
+    """
+    race_length = race_length if race_length is not None else roster.race_length
+    if not isinstance(race_length, timedelta):
+        race_length = parse_race_length(race_length)
+    race_minutes = race_length.total_seconds() / 60
+    if not schedule.stints:
+        raise ValueError("The schedule has no stints to simulate.")
+    model = model or StrategyModel()
+
+    num_blocks = max(1, int(-(-race_minutes // time_block)))
+    states = np.asarray(states, dtype=np.int64)
+    if states.shape[1] < num_blocks:
+        pad = np.full((states.shape[0], num_blocks - states.shape[1]), len(model.show_probability) - 1)
+        states = np.hstack([states, pad])
+    states = states[:, :num_blocks]
+
+    drivers, minutes, streak, limits = plan_arrays(schedule, roster, time_block, race_minutes)
+    sizes = [batch_trials] * (trials // batch_trials) + ([trials % batch_trials] if trials % batch_trials else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(drivers, minutes, streak, limits, states, time_block, race_minutes, model, size, batch_seed)
+            for size, batch_seed in zip(sizes, seeds)]
+
+    if workers and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_batch, *zip(*args)))
+    else:
+        results = [simulate_batch(*batch_args) for batch_args in args]
+
+    counts = np.array([result[0] for result in results], dtype=float)
+    batch_risk = counts / np.array(sizes, dtype=float)[:, None]
+    block_risk = counts.sum(axis=0) / trials
+    uncovered_minutes = np.concatenate([result[1] for result in results])
+    return StrategyResult(block_risk, batch_risk, uncovered_minutes, time_block)
+
+
+def format_result(result, race_times=None, gmt_times=None, count=10):
+    lines = [f"{result.trials} trials: {result.clean_race_probability() * 100:.1f}% of races fully covered"]
+    p50, p90, p99 = result.uncovered_percentiles()
+    lines.append(f"Minutes without a driver: median {p50:.0f}, 90th percentile {p90:.0f}, 99th percentile {p99:.0f}")
+    low, mid, high = result.risk_percentiles()
+    for block in result.riskiest_blocks(count):
+        where = f"block {block}"
+        if gmt_times is not None:
+            where = f"hour {int(race_times[block])} ({gmt_times[block]} GMT)"
+        lines.append(f"  {where}: {result.block_risk[block] * 100:.1f}% uncovered "
+                     f"(5th-95th percentile {low[block] * 100:.1f}-{high[block] * 100:.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from availability_reader import read_availability_workbook
+    from race_schedule import plan_race_schedule
+    from roster import read_roster
+
+    parser = argparse.ArgumentParser(description="Simulate many races to see how robust a stint plan is.")
+    parser.add_argument("roster", help="roster CSV")
+    parser.add_argument("availability", help="filled-in availability sheet")
+    parser.add_argument("--stint", type=int, default=60, help="planned stint length in minutes (default 60)")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help=f"races to simulate (default {DEFAULT_TRIALS})")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, for repeatable runs")
+    args = parser.parse_args(argv)
+
+    try:
+        roster = read_roster(args.roster)
+        matrix = read_availability_workbook(args.availability)
+        states = matrix.for_roster(roster)
+        time_block = matrix.time_block
+        if not time_block:
+            print("Error: the availability sheet needs at least two time rows to tell its block length",
+                  file=sys.stderr)
+            return 1
+        race_blocks = -(-int(parse_race_length(roster.race_length).total_seconds() // 60) // time_block)
+        schedule = plan_race_schedule(roster, states[:, :max(1, race_blocks)], max(1, round(args.stint / time_block)))
+        result = simulate_strategy(roster, states, schedule, time_block, trials=args.trials, seed=args.seed,
+                                   workers=args.workers or os.cpu_count())
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(format_result(result, matrix.grid.race_hours, matrix.grid.gmt))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+import pytest
+import pytz
+from availability_grid import build_availability_grid
+
+ZONES = ["Europe/London", "America/New_York", "Australia/Sydney", "Asia/Kolkata"]
+
+
+@pytest.mark.parametrize("start, hours", [
+    (datetime(2026, 3, 28, 12, 0), 24),  # London springs forward at 01:00 UTC on the 29th
+    (datetime(2026, 3, 7, 18, 0), 24),  # New York springs forward at 07:00 UTC on the 8th
+    (datetime(2026, 10, 24, 20, 0), 30),  # London falls back at 01:00 UTC on the 25th
+    (datetime(2026, 3, 20, 0, 0), 7 * 24),  # a week spanning both, in 15 minute blocks
+])
+def test_local_times_match_pytz_across_dst_changes(start, hours):
+    start = start.replace(tzinfo=pytz.utc)
+    grid = build_availability_grid([f"Driver {i}" for i in range(len(ZONES))], ZONES, start,
+                                   timedelta(hours=hours), 15)
+    for driver, zone in enumerate(ZONES):
+        tz = pytz.timezone(zone)
+        expected = [(start + timedelta(minutes=15 * block)).astimezone(tz).strftime("%H:%M")
+                    for block in range(grid.num_blocks)]
+        assert list(grid.local_times[driver]) == expected, zone
+
+
+def test_london_changeover_is_in_the_grid():
+    start = datetime(2026, 3, 28, 12, 0, tzinfo=pytz.utc)
+    grid = build_availability_grid(["Al"], ["Europe/London"], start, timedelta(hours=24), 30)
+    gmt = list(grid.gmt)
+    # 00:30 GMT is still 00:30 in London, then 01:00 GMT is 02:00 BST
+    assert grid.local_times[0][gmt.index("00:30")] == "00:30"
+    assert grid.local_times[0][gmt.index("01:00")] == "02:00"
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from availability_grid import AVAILABLE, BLOCKED, TENTATIVE
+from availability_intervals import (AvailabilityIntervals, StateIntervals, complement, intersection, longest,
+                                    union)
+
+RACE = 24 * 60
+
+
+def mask_of(intervals, length=RACE):
+    mask = np.zeros(length, dtype=bool)
+    for start, end in intervals:
+        mask[start:end] = True
+    return mask
+
+
+def random_intervals(rng, count=20, length=RACE):
+    starts = rng.integers(-20, length, count)
+    return np.column_stack([starts, starts + rng.integers(0, 200, count)])
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_interval_algebra_matches_minute_masks(seed):
+    rng = np.random.default_rng(seed)
+    a, b = random_intervals(rng), random_intervals(rng)
+    a_mask, b_mask = mask_of(np.clip(a, 0, RACE)), mask_of(np.clip(b, 0, RACE))
+
+    merged = union(a, b)
+    assert (merged[1:, 0] > merged[:-1, 1]).all()  # sorted, disjoint and not touching
+    assert (mask_of(np.clip(merged, 0, RACE)) == (a_mask | b_mask)).all()
+    assert (mask_of(np.clip(intersection(a, b), 0, RACE)) == (a_mask & b_mask)).all()
+    assert (mask_of(complement(np.clip(a, 0, RACE), RACE)) == ~a_mask).all()
+
+
+def test_longest_and_empty_inputs():
+    assert longest([[0, 10], [10, 25], [40, 50]]) == (0, 25)
+    assert longest(np.zeros((0, 2))) is None
+    assert len(union()) == 0
+    assert len(intersection([[0, 10]], [[10, 20]])) == 0  # touching isn't overlapping
+    assert complement([], 30).tolist() == [[0, 30]]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_set_round_trips_through_to_blocks(seed):
+    rng = np.random.default_rng(seed)
+    dense = np.repeat(rng.integers(0, 5, RACE // 7 + 1).astype(np.uint8), 7)[:RACE]
+    driver = StateIntervals.from_blocks(dense, 1)
+    for _ in range(10):
+        start, end = sorted(rng.integers(-10, RACE + 10, 2))
+        state = int(rng.integers(0, 5))
+        driver.set(start, end, state)
+        dense[max(start, 0):min(end, RACE)] = state
+
+    assert driver.starts[0] == 0 and (driver.states[1:] != driver.states[:-1]).all()
+    assert (driver.to_blocks(1, RACE) == dense).all()
+    assert (StateIntervals.from_blocks(driver.to_blocks(1, RACE), 1).starts == driver.starts).all()
+    for time_block in (5, 15, 45):
+        num_blocks = RACE // time_block
+        worst = dense[:num_blocks * time_block].reshape(num_blocks, time_block).max(axis=1)
+        assert (driver.to_blocks(time_block, num_blocks) == worst).all()
+
+
+def test_zero_length_race():
+    driver = StateIntervals.from_blocks([AVAILABLE, BLOCKED], 15, end=0)
+    assert driver.state_at(0) == AVAILABLE
+    assert driver.to_blocks(15, 1).tolist() == [AVAILABLE]
+
+    empty = StateIntervals([], [], 0)
+    assert empty.state_at(5) == TENTATIVE
+    assert empty.set(0, 10, BLOCKED).to_blocks(1, 2).tolist() == [TENTATIVE, TENTATIVE]
+
+
+def test_who_covers_and_coverage():
+    intervals = AvailabilityIntervals.blank(["Al", "Bob"], 120, BLOCKED)
+    intervals.set("Al", 0, 60, AVAILABLE).set("Bob", 50, 100, AVAILABLE)
+    assert intervals.who_covers(55).tolist() == [0, 1]
+    assert intervals.who_covers(100).tolist() == []
+    assert intervals.longest_coverage() == (0, 100)
+    assert intervals.coverage_gaps().tolist() == [[100, 120]]
+    assert intervals.longest_run("Bob") == (50, 100)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_set_blocks_matches_dense_writes(seed):
+    rng = np.random.default_rng(seed)
+    dense = rng.integers(0, 5, 60).astype(np.uint8)
+    intervals = AvailabilityIntervals.from_states(["A"], dense[None, :], 5)
+    blocks = rng.choice(60, int(rng.integers(0, 60)), replace=False)
+    codes = rng.integers(0, 5, len(blocks))
+    intervals.set_blocks("A", blocks, codes, 5)
+    dense[blocks] = codes
+    assert (intervals.to_blocks(5, 60)[0] == dense).all()
+    driver = intervals.drivers[0]
+    assert (driver.states[1:] != driver.states[:-1]).all()
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+from availability_grid import AVAILABILITY_OPTIONS, AVAILABLE, TENTATIVE
+from availability_merge import _named_driver, merge_availability_returns
+from availability_reader import read_availability_workbook
+from availability_sheet import generate_availability
+from roster import Driver, Roster, EVENT_COLUMNS
+from xlsx_writer import write_availability_workbook
+
+
+def make_roster(names):
+    event = {"Event Name": "Test", "Race Length": "02:00"}
+    return Roster(EVENT_COLUMNS, [event.get(name, "") for name in EVENT_COLUMNS],
+                  [Driver(1500, name, timezone="UTC") for name in names])
+
+
+def write_return(path, grid, filled):
+    states = np.full((len(grid.driver_names), len(grid.gmt)), TENTATIVE, dtype=np.uint8)
+    for driver in filled:
+        states[grid.driver_names.index(driver)] = AVAILABLE
+    write_availability_workbook(grid, path, np.array(AVAILABILITY_OPTIONS, dtype=object)[states])
+
+
+def test_named_driver_matches_whole_words_only():
+    names = ["Al", "Bob", "Sally", "Al Smith"]
+    assert _named_driver("Sally final.xlsx", names) == "Sally"
+    assert _named_driver("/returns/al_smith-v2.xlsx", names) == "Al Smith"
+    assert _named_driver("Bob.xlsx", names) == "Bob"
+    assert _named_driver("Salad.xlsx", names) is None
+
+
+def test_file_named_for_one_driver_with_another_filled_in(tmp_path):
+    roster = make_roster(["Al", "Bob", "Sally"])
+    grid = generate_availability(roster, "2025-06-14 12:00", None, 0, 30).grid
+    write_return(os.path.join(tmp_path, "Sally final.xlsx"), grid, ["Bob"])
+
+    result = merge_availability_returns([os.path.join(tmp_path, "Sally final.xlsx")], roster, workers=1)
+
+    assert list(result.submissions) == ["Bob"]
+    assert "Al" in result.missing_drivers and "Bob" not in result.missing_drivers
+    assert (result.matrix.states[1] == AVAILABLE).all()
+    assert len(result.warnings) == 1 and "Sally" in result.warnings[0] and "Bob" in result.warnings[0]
+    assert "Warning:" in result.report()
+
+
+def test_file_named_for_its_driver_counts_for_that_driver_only(tmp_path):
+    roster = make_roster(["Al", "Bob", "Sally"])
+    grid = generate_availability(roster, "2025-06-14 12:00", None, 0, 30).grid
+    write_return(os.path.join(tmp_path, "Sally.xlsx"), grid, ["Sally", "Bob"])
+
+    result = merge_availability_returns([os.path.join(tmp_path, "Sally.xlsx")], roster, workers=1)
+
+    assert list(result.submissions) == ["Sally"]
+    assert not result.warnings
+
+
+def test_merge_keeps_runs_and_saves_the_master_sheet(tmp_path):
+    roster = make_roster(["Al", "Bob"])
+    grid = generate_availability(roster, "2025-06-14 12:00", None, 0, 5).grid
+    write_return(os.path.join(tmp_path, "Al.xlsx"), grid, ["Al"])
+
+    result = merge_availability_returns([os.path.join(tmp_path, "Al.xlsx")], roster, workers=1)
+
+    assert [len(driver) for driver in result.intervals.drivers] == [1, 1]
+    path = os.path.join(tmp_path, "master.xlsx")
+    result.save(path)
+    master = read_availability_workbook(path)
+    assert master.time_block == 5 and np.array_equal(master.states, result.matrix.states)
+    assert (master.states[0] == AVAILABLE).all() and (master.states[1] == TENTATIVE).all()
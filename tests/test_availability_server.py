@@ -0,0 +1,84 @@
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import numpy as np
+import pytest
+from availability_server import AvailabilityCollection, AvailabilityServer
+from availability_grid import AVAILABLE, TENTATIVE
+from availability_reader import read_availability_workbook
+from availability_sheet import generate_availability
+from roster import Driver, Roster, EVENT_COLUMNS
+
+
+@pytest.fixture
+def server():
+    event = {"Event Name": "Test", "Race Length": "06:00"}
+    roster = Roster(EVENT_COLUMNS, [event.get(name, "") for name in EVENT_COLUMNS],
+                    [Driver(1500, f"Driver {i}", timezone=zone)
+                     for i, zone in enumerate(["UTC", "America/New_York", "Europe/Berlin"] * 4)])
+    grid = generate_availability(roster, "2025-06-14 12:00", "14:00", 0, 15).grid
+    server = AvailabilityServer(AvailabilityCollection(grid), port=0).start()
+    yield server
+    server.stop()
+
+
+def post(url, states):
+    data = urllib.parse.urlencode({f"b{block}": code for block, code in enumerate(states)}).encode()
+    return urllib.request.urlopen(urllib.request.Request(url, data=data)).read().decode()
+
+
+def test_concurrent_submissions_land_in_their_own_rows(server):
+    collection = server.collection
+    rng = np.random.default_rng(0)
+    expected = rng.integers(0, 5, (len(collection.grid.driver_names), collection.num_blocks))
+    threads = [threading.Thread(target=post, args=(server.url_for(driver), expected[driver]))
+               for driver in range(len(expected))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (collection.snapshot().states == expected).all()
+    assert all(submitted is not None for submitted in collection.submitted)
+
+
+def test_form_shows_driver_local_times(server):
+    page = urllib.request.urlopen(server.url_for(1)).read().decode()
+    assert "America/New_York" in page and "<td>08:00</td>" in page  # 12:00 GMT in June
+
+
+def test_bad_requests(server):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(f"http://{server.link_host}:{server.port}/d/not-a-token")
+    assert e.value.code == 404
+    with pytest.raises(urllib.error.HTTPError) as e:
+        post(server.url_for(0), [9])
+    assert e.value.code == 400
+
+
+def test_stop_without_waiting_returns_at_once(server):
+    begin = time.perf_counter()
+    server.stop(wait=False)
+    assert time.perf_counter() - begin < 0.5
+    server._thread.join(timeout=5)
+    assert not server.running
+
+
+def test_collection_keeps_runs_and_saves_at_another_block_size(tmp_path):
+    roster = Roster(EVENT_COLUMNS, ["Test", "", "", "", "24:00"], [Driver(1500, "Al"), Driver(1500, "Bo")])
+    sheet = generate_availability(roster, "2025-06-14 12:00", None, 0, 1)
+    collection = AvailabilityCollection(sheet.grid)
+    # One-minute blocks over 24 hours: Al is Available for 90 minutes, in one submission of every block
+    form = {block: TENTATIVE for block in range(collection.num_blocks)}
+    form.update({block: AVAILABLE for block in range(60, 150)})
+    collection.submit(0, form)
+    assert collection.intervals.num_changes == 4  # not one per minute
+    assert (collection.driver_states(0)[60:150] == AVAILABLE).all()
+
+    path = str(tmp_path / "coarse.xlsx")
+    collection.save(path, sheet.grid_at(30))
+    coarse = read_availability_workbook(path)
+    assert coarse.time_block == 30 and coarse.num_blocks == 49
+    # Only the 30 minute blocks Al is Available for the whole of are Available
+    assert list(np.flatnonzero(coarse.states[0] == AVAILABLE)) == [2, 3, 4]
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import pytest
+import driver_avail
+from driver_avail import SheetGenerationJob
+from roster import Driver, Roster, EVENT_COLUMNS, write_roster
+from sheet_cache import SheetCache
+
+
+@pytest.fixture
+def job_dirs(tmp_path, monkeypatch):
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    monkeypatch.setattr(driver_avail, "SheetCache", lambda: SheetCache(str(tmp_path / "cache")))
+    roster_path = str(tmp_path / "roster.csv")
+    event = {"Event Name": "Test", "Race Length": "24:00"}
+    write_roster(Roster(EVENT_COLUMNS, [event.get(name, "") for name in EVENT_COLUMNS],
+                        [Driver(1500, f"Driver {i}", timezone="Europe/London") for i in range(20)]), roster_path)
+    return roster_path, temp_dir
+
+
+def test_discard_deletes_a_finished_sheet_nobody_saved(job_dirs):
+    roster_path, temp_dir = job_dirs
+    job = SheetGenerationJob(roster_path, "2025-06-14 12:00", None, 0, 15).start()
+    job.thread.join(timeout=60)
+    assert len(os.listdir(temp_dir)) == 1  # the finished sheet, waiting on the queue
+    job.discard()
+    assert os.listdir(temp_dir) == []
+
+
+def test_discard_while_running_leaves_nothing_behind(job_dirs):
+    roster_path, temp_dir = job_dirs
+    job = SheetGenerationJob(roster_path, "2025-06-14 12:00", None, 0, 1).start()
+    job.discard()
+    job.thread.join(timeout=60)
+    assert os.listdir(temp_dir) == []
+    messages = []
+    while not job.messages.empty():
+        messages.append(job.messages.get_nowait()[0])
+    assert "done" not in messages  # once discarded, the worker can't hand a sheet over
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from driver_stats import CLEAN_LAP_FACTOR, compute_driver_stats, read_lap_file, read_lap_files
+
+
+def write_laps(path, header, rows):
+    path.write_text("\n".join([",".join(header)] + [",".join(str(value) for value in row) for row in rows]) + "\n",
+                    encoding="utf-8")
+    return str(path)
+
+
+def parse_time(text):
+    parts = str(text).strip().split(":")
+    try:
+        return sum(float(part) * 60 ** i for i, part in enumerate(reversed(parts)))
+    except ValueError:
+        return np.nan
+
+
+def session(rng, names, num_laps, stint_column):
+    """Lap rows of one session: each driver takes runs of laps in turn, with the odd slow or invalid lap."""
+    rows, lap, stint = [], 1, 0
+    while lap <= num_laps:
+        name = names[stint % len(names)]
+        for _ in range(int(rng.integers(3, 9))):
+            seconds = 90 + rng.normal(0, 1) + (rng.random() < 0.1) * 40
+            time = "-1" if rng.random() < 0.05 else f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+            rows.append([lap, name, time] + ([stint + 1] if stint_column else []))
+            lap += 1
+        stint += 1
+    rng.shuffle(rows)  # files aren't always in lap order
+    return rows
+
+
+def oracle(files):
+    """Per-driver stats with plain pandas groupbys. files are (DataFrame, has stint column) per file."""
+    frames = []
+    for number, (frame, has_stints) in enumerate(files):
+        frame = frame.copy()
+        frame["Driver"] = frame["Driver"].astype(str).str.strip()
+        frame["Seconds"] = frame["Lap Time"].map(parse_time)
+        frame = frame[(frame["Seconds"] > 0) & (frame["Driver"] != "")].sort_values("Lap", kind="stable")
+        if has_stints:
+            frame["StintKey"] = frame["Stint"].astype(int)
+        else:
+            frame["StintKey"] = (frame["Driver"] != frame["Driver"].shift()).cumsum()
+        frame["File"] = number
+        frames.append(frame)
+    laps = pd.concat(frames)
+    grouped = laps.groupby("Driver")["Seconds"]
+    result = pd.DataFrame({"laps": grouped.size(), "best": grouped.min(), "median": grouped.median()})
+    clean = laps[laps["Seconds"] <= laps["Driver"].map(result["median"]) * CLEAN_LAP_FACTOR]
+    result["clean_laps"] = clean.groupby("Driver").size()
+    result["mean"] = clean.groupby("Driver")["Seconds"].mean()
+    result["std"] = clean.groupby("Driver")["Seconds"].std()
+    stint_laps = laps.groupby(["File", "StintKey", "Driver"]).size().groupby("Driver")
+    result["stints"] = stint_laps.size()
+    result["mean_stint_laps"] = stint_laps.mean()
+    result["longest_stint_laps"] = stint_laps.max()
+    return result
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stats_match_a_pandas_groupby_with_mixed_stint_columns(tmp_path, seed):
+    rng = np.random.default_rng(seed)
+    with_stints = session(rng, ["Al", "Bo", "Cy"], 120, stint_column=True)
+    without_stints = session(rng, ["Bo", " Al ", "Di"], 90, stint_column=False)
+    without_stints += [[91, "   ", "1:30.000"], [92, "", "1:31.000"]]  # unnamed laps are dropped
+    paths = [write_laps(tmp_path / "race.csv", ["Lap", "Driver", "Lap Time", "Stint"], with_stints),
+             write_laps(tmp_path / "practice.csv", ["Lap", "Driver", "Lap Time"], without_stints)]
+
+    stats = compute_driver_stats(read_lap_files(paths, chunk_bytes=256))
+    expected = oracle([(pd.DataFrame(with_stints, columns=["Lap", "Driver", "Lap Time", "Stint"]), True),
+                       (pd.DataFrame(without_stints, columns=["Lap", "Driver", "Lap Time"]), False)])
+
+    assert sorted(stats.names) == sorted(expected.index) == ["Al", "Bo", "Cy", "Di"]
+    order = [stats.index()[name] for name in expected.index]
+    for column in ("laps", "clean_laps", "stints", "longest_stint_laps"):
+        assert list(getattr(stats, column)[order]) == list(expected[column]), column
+    for column in ("best", "median", "mean", "std", "mean_stint_laps"):
+        assert np.allclose(getattr(stats, column)[order], expected[column], rtol=1e-5, equal_nan=True), column
+
+
+def test_chunk_size_doesnt_change_the_laps(tmp_path):
+    rng = np.random.default_rng(0)
+    path = write_laps(tmp_path / "race.csv", ["Lap", "Driver Name", "Lap Time"], session(rng, ["Al", "Bo"], 500, False))
+    whole, chunked = read_lap_file(path), read_lap_file(path, chunk_bytes=64)
+    assert whole.driver_names == chunked.driver_names
+    assert np.array_equal(whole.drivers, chunked.drivers) and np.array_equal(whole.lap_times, chunked.lap_times)
+    assert np.array_equal(whole.laps, chunked.laps)
+
+
+def test_whitespace_names_are_not_a_driver(tmp_path):
+    path = write_laps(tmp_path / "laps.csv", ["Driver", "Lap Time"], [["  ", "90.0"], ["Al", "91.5"], [" Al", "92.5"]])
+    lap_data = read_lap_file(path)
+    assert lap_data.driver_names == ["Al"] and len(lap_data) == 2
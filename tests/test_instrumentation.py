@@ -0,0 +1,23 @@
+import json
+from instrumentation import RunTimings, run, span, write_json_log
+
+
+def test_log_rotates_instead_of_growing(tmp_path):
+    log_path = str(tmp_path / "timings.jsonl")
+    for i in range(50):
+        write_json_log(RunTimings(f"run {i}"), log_path, max_bytes=1000)
+    current = (tmp_path / "timings.jsonl").read_text().splitlines()
+    previous = (tmp_path / "timings.jsonl.1").read_text().splitlines()
+    assert json.loads(current[-1])["run"] == "run 49"
+    assert (tmp_path / "timings.jsonl").stat().st_size < 1000 + len(current[-1]) + 1
+    assert len(list(tmp_path.iterdir())) == 2
+    assert json.loads(previous[-1])["run"] == f"run {49 - len(current)}"
+
+
+def test_run_logs_its_spans(tmp_path):
+    log_path = str(tmp_path / "timings.jsonl")
+    with run("test", log_path):
+        with span("phase"):
+            pass
+    record = json.loads((tmp_path / "timings.jsonl").read_text())
+    assert record["run"] == "test" and [entry["name"] for entry in record["spans"]] == ["phase"]
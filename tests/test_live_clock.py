@@ -0,0 +1,36 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytz
+from live_clock import LiveRaceMonitor, RaceClock
+
+
+def test_stop_while_notify_blocks():
+    # notify stands in for event_generate waiting on a busy Tk thread
+    release = threading.Event()
+    notified = []
+
+    def notify():
+        notified.append(time.perf_counter())
+        release.wait(5)
+
+    clock = RaceClock(datetime.now(pytz.utc), timedelta(hours=1))
+    monitor = LiveRaceMonitor(clock, notify=notify).start()
+    while not notified:
+        time.sleep(0.01)
+    begin = time.perf_counter()
+    monitor.stop(wait=False)
+    assert time.perf_counter() - begin < 0.5
+    release.set()
+    monitor._thread.join(timeout=5)
+    assert not monitor.running
+    assert len(notified) == 1
+
+
+def test_nothing_is_published_after_stop():
+    clock = RaceClock(datetime.now(pytz.utc), timedelta(hours=1))
+    monitor = LiveRaceMonitor(clock).start()
+    monitor.stop()
+    monitor.drain()
+    monitor._publish([("tick", timedelta(0), None)])
+    assert monitor.drain() == []
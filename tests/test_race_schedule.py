@@ -0,0 +1,95 @@
+import itertools
+import numpy as np
+import pytest
+from availability_grid import AVAILABLE, MONITOR, TENTATIVE, SLEEP, BLOCKED
+from race_schedule import RaceScheduler, UNFILLED_COST, solve_stints
+from roster import Driver, Roster, EVENT_COLUMNS
+
+
+def brute_force(costs, max_consecutive, initial=None):
+    """Cheapest total over every assignment of drivers (or nobody) to stints."""
+    num_stints, num_drivers = costs.shape
+    best = np.inf
+    for plan in itertools.product(range(-1, num_drivers), repeat=num_stints):
+        driver, run = initial if initial is not None else (-1, 0)
+        total = 0.0
+        for s, d in enumerate(plan):
+            run = run + 1 if d == driver and d >= 0 else 1
+            driver = d
+            if d >= 0 and run > max_consecutive[d]:
+                break
+            total += UNFILLED_COST if d < 0 else costs[s, d]
+        else:
+            best = min(best, total)
+    return best
+
+
+def plan_cost(costs, plan):
+    return sum(UNFILLED_COST if d < 0 else costs[s, d] for s, d in enumerate(plan))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_solve_stints_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    num_stints, num_drivers = int(rng.integers(1, 7)), int(rng.integers(1, 4))
+    costs = rng.choice([0.0, 1.0, 2.0, 3.0, 5.0, np.inf], size=(num_stints, num_drivers))
+    max_consecutive = rng.integers(1, 4, num_drivers)
+    initial = None
+    if seed % 2:
+        initial = (int(rng.integers(-1, num_drivers)), int(rng.integers(1, 4)))
+        if initial[0] >= 0:
+            initial = (initial[0], min(initial[1], int(max_consecutive[initial[0]])))
+    plan, total = solve_stints(costs, max_consecutive, initial)
+    assert total == pytest.approx(brute_force(costs, max_consecutive, initial))
+    assert plan_cost(costs, plan) == pytest.approx(total)
+
+
+def make_roster(num_drivers, rng):
+    event = {"Event Name": "Test", "Race Length": "06:00"}
+    drivers = [Driver(int(rng.integers(1000, 4000)), f"Driver {i}", back_to_back=bool(rng.integers(2)),
+                      triple_stint=bool(rng.integers(2))) for i in range(num_drivers)]
+    return Roster(EVENT_COLUMNS, [event.get(name, "") for name in EVENT_COLUMNS], drivers)
+
+
+def started(scheduler):
+    return [(s.index, s.start_block, s.end_block, s.driver) for s in scheduler.stints
+            if s.start_block < scheduler.now_block]
+
+
+def check_tiling(scheduler):
+    blocks = [(s.start_block, s.end_block) for s in scheduler.stints]
+    assert blocks[0][0] == 0 and blocks[-1][1] == scheduler.num_blocks
+    assert all(a[1] == b[0] for a, b in zip(blocks, blocks[1:]))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_live_changes_never_touch_started_stints(seed):
+    rng = np.random.default_rng(seed)
+    num_drivers, num_blocks = int(rng.integers(2, 6)), int(rng.integers(12, 40))
+    states = rng.choice([AVAILABLE, MONITOR, TENTATIVE, SLEEP, BLOCKED], size=(num_drivers, num_blocks),
+                        p=[0.5, 0.15, 0.15, 0.1, 0.1])
+    scheduler = RaceScheduler(make_roster(num_drivers, rng), states, int(rng.integers(1, 5)))
+    for _ in range(30):
+        before, now = started(scheduler), scheduler.now_block
+        action = rng.integers(3)
+        if action == 0:
+            scheduler.set_now(now + int(rng.integers(0, 4)))
+            # moving the clock only fixes more stints, it never re-plans
+            assert started(scheduler)[:len(before)] == before
+            continue
+        current = scheduler.current_stint()
+        in_car = current is not None and scheduler.stints[current].start_block < now
+        if action == 1:
+            start = int(rng.integers(now, num_blocks))
+            scheduler.set_state(int(rng.integers(num_drivers)), start, int(rng.choice([AVAILABLE, SLEEP])),
+                                start + int(rng.integers(1, 4)))
+        elif current is not None:
+            scheduler.overrun(int(rng.integers(-2, 3)))
+        after = {stint[0]: stint for stint in started(scheduler)}
+        for index, start, end, driver in before:
+            assert after[index][1:2] + after[index][3:] == (start, driver)
+            if not (in_car and index == current):  # only the stint in the car may be cut short or run long
+                assert after[index][2] == end
+        check_tiling(scheduler)
+        stints = scheduler.schedule.stints
+        assert scheduler.schedule.total_cost == pytest.approx(sum(stint.cost for stint in stints))
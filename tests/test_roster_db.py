@@ -0,0 +1,95 @@
+import pytest
+from roster import Driver, Roster, RosterError, EVENT_COLUMNS, read_roster
+from roster_db import RosterStore
+
+EVENT = ["Spa 24", "Team", "Spa", "GT3", "24:00"]
+
+
+def driver(name, irating=1500, timezone="Europe/London", **flags):
+    return Driver(irating, name, timezone=timezone, **flags)
+
+
+@pytest.fixture
+def store():
+    with RosterStore(":memory:") as store:
+        yield store
+
+
+def event_names(store, event_name):
+    return store.load_roster(event_name).driver_names
+
+
+def test_upsert_updates_in_place_and_returns_the_same_id(store):
+    first = store.upsert_driver(driver("Al"))
+    other = store.upsert_driver(driver("Bo"))
+    again = store.upsert_driver(driver("Al", irating=2500, timezone="America/New_York", back_to_back=True))
+    assert again == first != other
+    assert store.get_driver("Al") == driver("Al", 2500, "America/New_York", back_to_back=True)
+    assert [d.name for d in store.drivers()] == ["Al", "Bo"]
+    assert [d.name for d in store.drivers(timezone="America/New_York")] == ["Al"]
+
+    event_id = store.upsert_event(EVENT)
+    assert store.upsert_event(EVENT[:1] + ["Other Team"]) == event_id
+    assert store.load_roster("Spa 24").event["Team Name"] == "Other Team"
+    with pytest.raises(RosterError):
+        store.upsert_event(["", "Team"])
+
+
+def test_put_event_driver_appends_and_updates_in_place(store):
+    store.upsert_event(EVENT)
+    for name in ("Al", "Bo", "Cy"):
+        store.put_event_driver("Spa 24", driver(name))
+    store.put_event_driver("Spa 24", driver("Al", start=True))  # already on the roster: keeps its place
+    roster = store.load_roster("Spa 24")
+    assert roster.driver_names == ["Al", "Bo", "Cy"]
+    assert roster.drivers[0].start and not roster.drivers[1].start
+
+    store.remove_event_driver("Spa 24", "Bo")
+    store.put_event_driver("Spa 24", driver("Di"))
+    assert event_names(store, "Spa 24") == ["Al", "Cy", "Di"]
+    with pytest.raises(KeyError):
+        store.put_event_driver("Unknown", driver("Al"))
+
+
+def test_remove_event_driver_keeps_the_driver(store):
+    store.save_roster(Roster(EVENT_COLUMNS, EVENT, [driver("Al"), driver("Bo")]))
+    assert store.remove_event_driver("Spa 24", "Al")
+    assert not store.remove_event_driver("Spa 24", "Al")
+    assert event_names(store, "Spa 24") == ["Bo"]
+    assert store.get_driver("Al") is not None
+
+    assert store.delete_driver("Bo")  # deleting a driver takes them off every roster
+    assert event_names(store, "Spa 24") == []
+
+
+def test_incremental_changes_match_a_full_save(store):
+    store.save_roster(Roster(EVENT_COLUMNS, EVENT, [driver("Al"), driver("Bo"), driver("Cy")]))
+    store.remove_event_driver("Spa 24", "Bo")
+    store.put_event_driver("Spa 24", driver("Di", finish=True))
+    store.put_event_driver("Spa 24", driver("Al", irating=3000))
+    incremental = store.load_roster("Spa 24")
+
+    with RosterStore(":memory:") as full_store:
+        full_store.save_roster(Roster(EVENT_COLUMNS, EVENT, [driver("Al", irating=3000), driver("Cy"),
+                                                             driver("Di", finish=True)]))
+        full = full_store.load_roster("Spa 24")
+    assert incremental.drivers == full.drivers
+    assert incremental.event_values == full.event_values
+
+    # A full save replaces the driver list, in its order
+    store.save_roster(Roster(EVENT_COLUMNS, EVENT, [driver("Cy"), driver("Al")]))
+    assert event_names(store, "Spa 24") == ["Cy", "Al"]
+
+
+def test_csv_round_trip(store, tmp_path):
+    roster = Roster(EVENT_COLUMNS, EVENT, [driver("Al", start=True, back_to_back=True, triple_stint=True),
+                                           driver("Bo", 2100, "Asia/Tokyo", finish=True)])
+    path = str(tmp_path / "roster.csv")
+    store.save_roster(roster)
+    store.export_csv("Spa 24", path)
+
+    with RosterStore(str(tmp_path / "rosters.db")) as other:
+        assert other.import_csv(path) == "Spa 24"
+        loaded = other.load_roster("Spa 24")
+    assert loaded.drivers == roster.drivers == read_roster(path).drivers
+    assert loaded.event_values == tuple(EVENT)
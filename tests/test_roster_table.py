@@ -0,0 +1,141 @@
+import pytest
+import roster_table
+from roster_table import RosterTable
+
+ROW_PIXELS = 20
+
+
+class FakeTreeview:
+    """Just enough of ttk.Treeview to run RosterTable without a display."""
+
+    def __init__(self, master, columns, show, height):
+        self.values = {}  # item -> values
+        self.children = []  # attached items in order
+        self.inserted = 0
+        self.updates = 0
+
+    def insert(self, parent, index, iid, values):
+        self.values[iid] = tuple(values)
+        self.children.append(iid)
+        self.inserted += 1
+
+    def item(self, iid, values):
+        self.values[iid] = tuple(values)
+        self.updates += 1
+
+    def detach(self, *iids):
+        self.children = [iid for iid in self.children if iid not in iids]
+
+    def move(self, iid, parent, index):
+        self.children.insert(index, iid)
+
+    def identify_row(self, y):
+        slot = y // ROW_PIXELS
+        return self.children[slot] if slot < len(self.children) else ""
+
+    def shown(self):
+        return [self.values[iid] for iid in self.children]
+
+    def bind(self, *args):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+
+class FakeScrollbar:
+    def __init__(self, master, orient, command):
+        self.command = command
+        self.fractions = None
+
+    def set(self, first, last):
+        self.fractions = (first, last)
+
+    def grid(self, **kwargs):
+        pass
+
+
+class FakeFrame:
+    def __init__(self, master):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+    def columnconfigure(self, *args, **kwargs):
+        pass
+
+    rowconfigure = columnconfigure
+
+
+class FakeTtk:
+    Frame, Treeview, Scrollbar = FakeFrame, FakeTreeview, FakeScrollbar
+
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(roster_table, "ttk", FakeTtk)
+    return RosterTable(None, ["n", "name"], height=10)
+
+
+def rows(count):
+    return [(i, f"Driver {i}") for i in range(count)]
+
+
+def test_paging(table):
+    table.load(rows(100))
+    assert table.tree.shown() == rows(10)
+    assert table.scrollbar.fractions == (0, 0.1)
+
+    table.scroll_to(95)  # clamped so the last page is full
+    assert table.tree.shown() == rows(100)[90:]
+    table.yview("moveto", "0.5")
+    assert table.tree.shown()[0] == (50, "Driver 50")
+    table.yview("scroll", "1", "pages")
+    assert table.tree.shown()[0] == (60, "Driver 60")
+    table.yview("scroll", "-3", "units")
+    assert table.tree.shown()[0] == (57, "Driver 57")
+    assert table.scrollbar.fractions == (0.57, 0.67)
+    table.scroll_to(-5)
+    assert table.tree.shown() == rows(10)
+
+    table.load(rows(4))  # a short roster shows no blank rows
+    assert table.tree.shown() == rows(4)
+    assert table.scrollbar.fractions == (0, 1)
+    table.scroll_to(3)
+    assert table.tree.shown() == rows(4)
+
+
+def test_row_ids_stay_valid_across_load_and_delete(table):
+    first_ids = table.load(rows(30))
+    ids = table.load(rows(30))
+    assert not set(first_ids) & set(ids)  # ids aren't reused after a reload
+    table.delete(ids[5])
+    assert table.values(ids[6]) == (6, "Driver 6") and table.index(ids[6]) == 5
+    assert len(table) == 29 and ids[5] not in table.row_ids()
+
+    new_id = table.insert((99, "New"))
+    assert new_id not in ids and table.rows()[-1] == (99, "New")
+    assert table.tree.shown()[-1] == (99, "New")  # scrolled to show the new row
+    assert table.row_at(9 * ROW_PIXELS) == new_id
+    assert table.row_at(0) == ids[21]
+
+    table.scroll_to(0)
+    table.delete(ids[0])
+    assert table.row_at(0) == ids[1] and table.values(ids[29]) == (29, "Driver 29")
+
+
+def test_scrolling_reuses_the_pooled_items(table):
+    table.load(rows(1000))
+    pool = list(table.tree.children)
+    updates = table.tree.updates
+    table.scroll_to(500)
+    assert table.tree.children == pool  # same ten items, new values
+    assert table.tree.inserted == 10
+    assert table.tree.updates - updates == 10  # one page of updates, however far it scrolled
+    assert table.tree.shown() == rows(1000)[500:510]
+
+    table.load(rows(3))
+    assert table.tree.children == pool[:3]
+    table.load(rows(20))
+    assert table.tree.children == pool and table.tree.inserted == 10
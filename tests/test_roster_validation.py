@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import pytest
+import roster
+from roster import RosterError, read_roster, read_roster_rows
+from roster_validation import validate_drivers, validate_roster_file
+
+ROSTER = """Event Name,Team Name,Track,Car,Race Length
+Test,Team,Spa,GT3,6:00
+  ,   
+iRating,Driver Name,Back to Back Stints,Triple Stint,Timezone,Start,Finish
+1500,Al,True,False,UTC,False,False
+
+2000,Bo,False,False,Mars/Base,False,False
+2000,al,False,False,UTC,False,False
+"""
+
+
+@pytest.fixture
+def roster_file(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(ROSTER, encoding="utf-8")
+    return str(path)
+
+
+def test_problems_are_on_file_lines_across_blank_rows(roster_file):
+    problems = [(problem.line, problem.column) for problem in validate_roster_file(roster_file)]
+    assert problems == [(5, "Driver Name"), (7, "Timezone"), (8, "Driver Name")]
+    with pytest.raises(RosterError, match="Row 7"):
+        read_roster(roster_file)
+
+
+def test_validation_and_loading_share_one_read(roster_file, monkeypatch):
+    validate_roster_file(roster_file)
+    monkeypatch.setattr(roster, "open", lambda *args, **kwargs: pytest.fail("read twice"), raising=False)
+    assert read_roster_rows(roster_file)[0][0] == 1
+    with pytest.raises(RosterError):
+        read_roster(roster_file)
+
+
+def test_validate_drivers_reports_every_bad_cell():
+    header = ["iRating", "Driver Name", "Back to Back Stints", "Triple Stint", "Timezone"]
+    problems = validate_drivers([["x", "", "False", "True", "UTC"], ["1", "Cy", "nope", "False", "UTC"]], header,
+                                existing_names=["cy"])
+    assert [(problem.line, problem.column) for problem in problems] == [
+        (1, "iRating"), (1, "Driver Name"), (1, "Triple Stint"), (2, "Driver Name"), (2, "Back to Back Stints")]
+
+
+def test_validation_does_not_import_pandas(roster_file):
+    code = f"import sys, roster_validation; roster_validation.validate_roster_file({roster_file!r}); " \
+           "sys.exit('pandas' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(roster.__file__))).returncode == 0
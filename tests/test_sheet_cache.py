@@ -0,0 +1,69 @@
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+import pytz
+from availability_grid import build_availability_grid
+from availability_sheet import generate_availability
+from roster import Driver, Roster, EVENT_COLUMNS
+from sheet_cache import SheetCache, sheet_key
+
+START = datetime(2025, 6, 14, 12, 0, tzinfo=pytz.utc)
+KEY_ARGS = dict(driver_names=["Al", "Bo"], driver_timezones=["Europe/London", "America/New_York"], race_start=START,
+                race_length=timedelta(hours=6), sim_start="14:00", time_block=15)
+
+
+def make_roster(timezones=("Europe/London", "America/New_York"), names=("Al", "Bo"), race_length="06:00"):
+    event = {"Event Name": "Test", "Race Length": race_length}
+    return Roster(EVENT_COLUMNS, [event.get(name, "") for name in EVENT_COLUMNS],
+                  [Driver(1500, name, timezone=zone) for name, zone in zip(names, timezones)])
+
+
+def test_hit_after_put_copies_the_file_and_returns_the_same_grid(tmp_path):
+    cache = SheetCache(str(tmp_path / "cache"))
+    first_path, second_path = str(tmp_path / "first.xlsx"), str(tmp_path / "second.xlsx")
+    first = generate_availability(make_roster(), START, "14:00", 30, 15, output_path=first_path, cache=cache)
+    second = generate_availability(make_roster(), START, "14:00", 30, 15, output_path=second_path, cache=cache)
+
+    assert not first.cached and second.cached
+    with open(first_path, "rb") as a, open(second_path, "rb") as b:
+        assert a.read() == b.read()
+    for name in ("race_hours", "gmt", "sim_time", "local_times"):
+        assert np.array_equal(getattr(first.grid, name), getattr(second.grid, name)), name
+    assert (first.grid.block_times == second.grid.block_times).all()
+    assert list(second.grid.driver_names) == ["Al", "Bo"] and second.grid.time_block == 15
+
+
+@pytest.mark.parametrize("change", [
+    dict(driver_names=["Al", "Cy"]), dict(driver_names=["Bo", "Al"]),
+    dict(driver_timezones=["Europe/London", "Asia/Tokyo"]), dict(race_start=START + timedelta(minutes=1)),
+    dict(race_length=timedelta(hours=6, minutes=15)), dict(time_block=5), dict(sim_start="14:01"),
+    dict(sim_start=None)])
+def test_any_input_change_misses(tmp_path, change):
+    cache = SheetCache(str(tmp_path / "cache"))
+    workbook = tmp_path / "sheet.xlsx"
+    workbook.write_bytes(b"workbook")
+    grid = build_availability_grid(KEY_ARGS["driver_names"], KEY_ARGS["driver_timezones"], START,
+                                   KEY_ARGS["race_length"], 15, "14:00")
+    cache.put(sheet_key(**KEY_ARGS), str(workbook), grid)
+    assert cache.get(sheet_key(**KEY_ARGS)) is not None
+    assert cache.get(sheet_key(**dict(KEY_ARGS, **change))) is None
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = SheetCache(str(tmp_path / "cache"), max_bytes=10**9)
+    grid = build_availability_grid(["Al"], ["UTC"], START, timedelta(hours=1), 15)
+    workbook = tmp_path / "sheet.xlsx"
+    workbook.write_bytes(b"x" * 10000)
+    keys = [sheet_key(["Al"], ["UTC"], START, timedelta(hours=1), None, block) for block in (1, 2, 3, 4)]
+    for age, key in enumerate(keys):
+        cache.put(key, str(workbook), grid)
+        for path in cache.paths(key):
+            os.utime(path, (1000 + age, 1000 + age))  # put in order, oldest first
+    cache.get(keys[0])  # a hit makes the oldest the most recently used
+
+    entry_bytes = cache.entries()[0][1]
+    cache.max_bytes = 2 * entry_bytes
+    cache.evict()
+    assert [key for used, size, key in cache.entries()] == [keys[3], keys[0]]
+    assert cache.get(keys[1]) is None and cache.get(keys[2]) is None
@@ -0,0 +1,18 @@
+import sys
+import threading
+from startup import StartupTimer
+
+
+def test_import_during_warm_up_waits_for_the_whole_module(tmp_path, monkeypatch):
+    # A module that takes a while to import, with its function defined only at the end
+    (tmp_path / "slow_feature.py").write_text("import time\ntime.sleep(0.3)\n\ndef open_window():\n    return 'open'\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_feature", raising=False)
+
+    timer = StartupTimer()
+    warm_up = timer.warm_up(["slow_feature"])
+    while "slow_feature" not in sys.modules:  # the warm-up thread has started importing it
+        pass
+    assert timer.import_module("slow_feature").open_window() == "open"
+    warm_up.join()
+    assert timer.imports["slow_feature"] >= 0.3
@@ -0,0 +1,42 @@
+import numpy as np
+import availability_reader
+from availability_grid import AVAILABLE, BLOCKED
+from race_schedule import plan_race_schedule
+from roster import Driver, Roster, EVENT_COLUMNS, write_roster
+from strategy_sim import main, simulate_strategy
+
+
+def make_roster(num_drivers):
+    event = {"Event Name": "Test", "Race Length": "06:00"}
+    return Roster(EVENT_COLUMNS, [event.get(name, "") for name in EVENT_COLUMNS],
+                  [Driver(1500, f"Driver {i}", back_to_back=True) for i in range(num_drivers)])
+
+
+class OneRowMatrix:
+    time_block = None  # what the reader gives for a sheet with a single time row
+
+    def for_roster(self, roster):
+        return np.zeros((len(roster.drivers), 1), dtype=np.uint8)
+
+
+def test_one_row_sheet_is_an_error(tmp_path, monkeypatch, capsys):
+    roster_path = str(tmp_path / "roster.csv")
+    write_roster(make_roster(2), roster_path)
+    monkeypatch.setattr(availability_reader, "read_availability_workbook", lambda path: OneRowMatrix())
+    assert main([roster_path, "sheet.xlsx", "--trials", "10"]) == 1
+    assert capsys.readouterr().err.startswith("Error:")
+
+
+def test_simulation_is_repeatable_and_sees_missing_drivers():
+    roster = make_roster(3)
+    states = np.full((3, 24), AVAILABLE, dtype=np.uint8)
+    schedule = plan_race_schedule(roster, states, 4)
+    first = simulate_strategy(roster, states, schedule, 15, trials=300, seed=1, batch_trials=100)
+    second = simulate_strategy(roster, states, schedule, 15, trials=300, seed=1, batch_trials=100)
+    assert np.array_equal(first.uncovered_minutes, second.uncovered_minutes)
+    assert first.trials == 300 and first.batch_risk.shape[0] == 3
+
+    # Nobody can turn up: every block is uncovered in every trial
+    blocked = np.full((3, 24), BLOCKED, dtype=np.uint8)
+    result = simulate_strategy(roster, blocked, schedule, 15, trials=50, seed=1)
+    assert result.clean_race_probability() == 0.0
@@ -0,0 +1,131 @@
+from bisect import bisect_right
+from datetime import datetime, timezone
+from functools import lru_cache
+import numpy as np
+import pytz
+
+EPOCH = datetime(1970, 1, 1)
+
+timezone_mapping = {
+    # North America
+    "EST": "America/New_York",
+    "CST": "America/Chicago",
+    "MST": "America/Denver",
+    "PST": "America/Los_Angeles",
+    "AKST": "America/Anchorage",  # Alaska Standard Time
+    "HST": "Pacific/Honolulu",    # Hawaii Standard Time
+    "EDT": "America/New_York",  #Eastern Daylight Time
+    "CDT": "America/Chicago",  #Central Daylight Time
+    "MDT": "America/Denver",  #Mountain Daylight Time
+    "PDT": "America/Los_Angeles",  #Pacific Daylight Time
+    "ADT": "America/Halifax", #Atlantic Daylight Time
+    "NST": "America/St_Johns", #Newfoundland Standard Time
+    "AST": "America/Puerto_Rico", #Atlantic Standard Time
+
+    # Europe
+    "GMT": "UTC",  # Use UTC for GMT
+    "BST": "Europe/London",
+    "CET": "Europe/Berlin",
+    "CEST": "Europe/Berlin",
+    "EET": "Europe/Athens",
+    "EEST": "Europe/Athens",
+    "WET": "Europe/Lisbon",
+    "WEST": "Europe/Lisbon",
+
+    # Australia
+    "AEST": "Australia/Sydney",
+    "AEDT": "Australia/Sydney",
+    "ACST": "Australia/Adelaide",
+    "ACDT": "Australia/Adelaide",
+    "AWST": "Australia/Perth",
+
+    # Asia
+    "JST": "Asia/Tokyo",
+    "IST": "Asia/Kolkata",  # India Standard Time
+    "ChST": "Asia/Shanghai", #China Standard Time
+    "KST": "Asia/Seoul", #Korea Standard Time
+
+    # Other
+    "MSK": "Europe/Moscow",
+    "UTC": "UTC",
+    "Z": "UTC", #Zulu Time
+}
+
+
+
+def _label_index():
+    labels = {}
+    for label, zone in timezone_mapping.items():
+        labels.setdefault(zone, label)  # first listed abbreviation wins, so EST rather than EDT
+    for zone in timezone_mapping.values():
+        if zone in timezone_mapping:
+            labels[zone] = zone  # "UTC" shows as UTC, not GMT
+    return labels
+
+
+# IANA zone -> the abbreviation the roster window shows for it
+timezone_labels = _label_index()
+
+
+def timezone_label(zone):
+    """The timezone_mapping abbreviation for an IANA zone, or the zone itself if it has none."""
+    return timezone_labels.get(zone, zone)
+
+
+@lru_cache(maxsize=None)
+def resolve_timezone(name):
+    """Returns the pytz zone for an IANA name or one of the abbreviations in timezone_mapping."""
+    name = name.strip()
+    return pytz.timezone(timezone_mapping.get(name, name))
+
+
+class ZoneOffsets:
+    """A zone's UTC offsets over a time window, as sorted transition times and the offset in force after each."""
+    __slots__ = ("zone", "transitions", "offsets")
+
+    def __init__(self, zone, transitions, offsets):
+        self.zone = zone
+        self.transitions = transitions  # int64 epoch seconds (UTC); the first entry covers the window start
+        self.offsets = offsets  # int64 seconds east of UTC
+
+    def offsets_at(self, utc_seconds):
+        """UTC offset in seconds for each epoch second in utc_seconds."""
+        index = np.searchsorted(self.transitions, utc_seconds, side="right") - 1
+        return self.offsets[np.maximum(index, 0)]
+
+    def local_seconds(self, utc_seconds):
+        """Local wall-clock time, as epoch seconds, for each epoch second in utc_seconds."""
+        utc_seconds = np.asarray(utc_seconds, dtype=np.int64)
+        return utc_seconds + self.offsets_at(utc_seconds)
+
+    @property
+    def has_transitions(self):
+        """True when the offset changes (DST starts or ends) inside the window."""
+        return len(self.offsets) > 1
+
+
+def _epoch_seconds(naive_utc):
+    return int((naive_utc - EPOCH).total_seconds())
+
+
+@lru_cache(maxsize=256)
+def zone_offsets(name, window_start, window_end):
+    """Offset table for a zone between two epoch seconds (UTC).
+
+    Each distinct zone and race window is resolved once; sheet generations and scheduler runs for
+    the same race share the table.
+    """
+    tz = resolve_timezone(name)
+    utc_transition_times = getattr(tz, "_utc_transition_times", None)
+    if not utc_transition_times:
+        offset = tz.utcoffset(datetime.fromtimestamp(window_start, timezone.utc).replace(tzinfo=None))
+        return ZoneOffsets(tz.zone, np.array([window_start], dtype=np.int64),
+                           np.array([int(offset.total_seconds())], dtype=np.int64))
+
+    start = datetime.fromtimestamp(window_start, timezone.utc).replace(tzinfo=None)
+    end = datetime.fromtimestamp(window_end, timezone.utc).replace(tzinfo=None)
+    first = max(bisect_right(utc_transition_times, start) - 1, 0)
+    last = bisect_right(utc_transition_times, end)
+    transitions = [window_start] + [_epoch_seconds(t) for t in utc_transition_times[first + 1:last]]
+    offsets = [int(info[0].total_seconds()) for info in tz._transition_info[first:last]]
+    return ZoneOffsets(tz.zone, np.array(transitions, dtype=np.int64), np.array(offsets, dtype=np.int64))
@@ -0,0 +1,134 @@
+import numpy as np
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.datavalidation import DataValidation
+from availability_grid import AVAILABILITY_OPTIONS
+from instrumentation import span
+
+SHEET_TITLE = "Driver Availability"
+
+HEADER_STYLE = "Availability Header"
+CELL_STYLE = "Availability Cell"
+CHOICE_STYLE = "Availability Choice"
+
+
+def _thin_border():
+    thin = Side(style='thin')
+    return Border(left=thin, right=thin, top=thin, bottom=thin)
+
+
+class AvailabilityWorkbookWriter:
+    """Streams an AvailabilityGrid into a write-only workbook.
+
+    Every cell in a column shares one named style, and each driver's availability column
+    gets a single list validation over its whole range, so memory stays flat as the race grows.
+    """
+
+    def __init__(self, grid, availability=None):
+        self.grid = grid
+        self.availability = availability  # optional [driver, block] array of state names
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(SHEET_TITLE)
+        self.driver_start_col = 4 if grid.sim_time is not None else 3
+
+    def availability_columns(self):
+        """1-based column numbers of the driver availability columns."""
+        return [self.driver_start_col + driver * 2 + 1 for driver in range(self.grid.num_drivers)]
+
+    def add_styles(self):
+        """Registers the shared named styles used by every cell."""
+        border = _thin_border()
+        header = NamedStyle(name=HEADER_STYLE, font=Font(bold=True), border=border,
+                            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True))
+        cell = NamedStyle(name=CELL_STYLE, border=border,
+                          alignment=Alignment(horizontal='center', vertical='center', wrap_text=True))
+        choice = NamedStyle(name=CHOICE_STYLE, border=border,
+                            alignment=Alignment(horizontal='left', vertical='top', wrap_text=True))
+        for style in (header, cell, choice):
+            if style.name not in self.workbook.named_styles:
+                self.workbook.add_named_style(style)
+
+    def set_column_widths(self):
+        """Sizes columns from the grid arrays. Write-only sheets need this before the first row."""
+        grid = self.grid
+        columns = [grid.race_hours.astype(str), grid.gmt]
+        if grid.sim_time is not None:
+            columns.append(grid.sim_time)
+        choice_length = max(len(option) for option in AVAILABILITY_OPTIONS)
+        for driver in range(grid.num_drivers):
+            columns.append(grid.local_times[driver])
+            columns.append(None)  # availability values are always one of the options
+
+        for col_num, (header, values) in enumerate(zip(grid.headers(), columns), start=1):
+            if values is None:
+                max_length = choice_length
+            else:
+                max_length = int(np.char.str_len(values).max()) if len(values) else 0
+            adjusted_width = max(max_length, len(header)) + 2
+            self.sheet.column_dimensions[get_column_letter(col_num)].width = adjusted_width
+
+    def write_rows(self, progress=None):
+        """Emits the header and one row per block, reusing one styled cell per column."""
+        headers = self.grid.headers()
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.style = HEADER_STYLE
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+
+        choice_columns = set(self.availability_columns())
+        row_cells = []
+        for col_num in range(1, len(headers) + 1):
+            cell = WriteOnlyCell(self.sheet)
+            cell.style = CHOICE_STYLE if col_num in choice_columns else CELL_STYLE
+            row_cells.append(cell)
+
+        for block, row in enumerate(self.grid.rows(self.availability)):
+            for cell, value in zip(row_cells, row):
+                cell.value = value
+            self.sheet.append(row_cells)
+            if progress:
+                progress(block + 1, self.grid.num_blocks)
+
+    def add_validations(self):
+        """One dropdown validation per driver availability column."""
+        last_row = self.grid.num_blocks + 1
+        formula = '"{}"'.format(",".join(AVAILABILITY_OPTIONS))
+        for col_num in self.availability_columns():
+            letter = get_column_letter(col_num)
+            dv = DataValidation(type="list", formula1=formula)
+            dv.add(f"{letter}2:{letter}{last_row}")
+            self.sheet.data_validations.append(dv)
+
+    def save(self, filename):
+        self.workbook.save(filename)
+
+    def discard(self):
+        """Closes the row stream of an abandoned write so its temporary file is cleaned up."""
+        if not self.sheet.closed:
+            self.sheet.close()
+
+
+def write_availability_workbook(grid, filename, availability=None, progress=None):
+    """Writes the availability sheet for grid to filename in a single streaming pass.
+
+    progress(blocks_written, num_blocks) is called after every row; raising from it abandons the write.
+    """
+    writer = AvailabilityWorkbookWriter(grid, availability)
+    try:
+        with span("formatting"):
+            writer.add_styles()
+            writer.set_column_widths()
+        with span("rows"):
+            writer.write_rows(progress)
+    except BaseException:
+        writer.discard()
+        raise
+    with span("data validation"):
+        writer.add_validations()
+    with span("save"):
+        writer.save(filename)
+    return filename